@@ -26,6 +26,7 @@ from common.util.api_fixes import (
     getFocusedWindowIndex,
 )
 from common.types.bool_s import BoolS
+from common.settings import SettingHandle
 import plugins
 
 
@@ -34,10 +35,15 @@ class ActivityState:
     Maintains the currently selected plugin or window
     """
 
-    def __init__(self) -> None:
+    def __init__(self, history_length: SettingHandle) -> None:
         """
         Create an ActivityState object
+
+        ### Args:
+        * `history_length` (`SettingHandle`): handle to the maximum number of
+          plugins and windows to keep in the history
         """
+        self._history_length = history_length
         self._do_update = True
         self._split = False
         self._window = WindowIndex(0)
@@ -94,7 +100,6 @@ class ActivityState:
         """
         Called frequently when we need to update the current window
         """
-        from common.context_manager import getContext
         self._changed = False
         # If the current plugin name has changed, we should unpause the updates
         if self._plug_active and not self._do_update:
@@ -141,8 +146,7 @@ class ActivityState:
                 else:
                     self._history.insert(0, self.getActive())
             # If there are too many things in the history
-            hist_len = \
-                getContext().settings.get("advanced.activity_history_length")
+            hist_len = self._history_length.value
             if len(self._history) >= hist_len:
                 self._history = self._history[:hist_len]
 
@@ -26,12 +26,17 @@ from fl_classes import FlMidiMsg
 
 from .settings import Settings
 from .activity_state import ActivityState
+from .forward_session import ForwardSession
 from .exceptions import UcsError
 from .util.api_fixes import catchUnsafeOperation
 from .util.misc import NoneNoPrintout
-from .util.events import isEventForwarded, isEventForwardedHere
+from .util.events import (
+    isEventForwarded,
+    isEventForwardedHere,
+    isForwardControlMessage,
+)
 from .util.catch_exception_decorator import catchExceptionDecorator
-from .profiler import ProfilerManager
+from .profiler import ProfilerManager, enableProfiling, disableProfiling
 
 from .states import (
     IScriptState,
@@ -60,13 +65,21 @@ class DeviceContextManager:
         modules
         """
         self.settings = Settings()
-        self.activity = ActivityState()
+        self._drop_tick_time = self.settings.handle("advanced.drop_tick_time")
+        self._slow_tick_time = self.settings.handle("advanced.slow_tick_time")
+        self.activity = ActivityState(
+            self.settings.handle("advanced.activity_history_length"))
+        self.forwarding = ForwardSession(
+            self.settings.handle("advanced.forward_batch_size"))
         # Set the state of the script to wait for the device to be recognized
         self.state: Optional[IScriptState] = None
         if self.settings.get("debug.profiling"):
+            enableProfiling()
             trace = self.settings.get("debug.exec_tracing")
-            self.profiler: Optional[ProfilerManager] = ProfilerManager(trace)
+            self.profiler: Optional[ProfilerManager] = ProfilerManager(
+                trace, self.settings.get("debug.profiler_spans"))
         else:
+            disableProfiling()
             self.profiler = None
         # Time the script last ticked at
         self._last_tick = time_ns()
@@ -83,7 +96,9 @@ class DeviceContextManager:
         * `trace` (`bool`, optional): Whether to print traces. Defaults to
           `False`.
         """
-        self.profiler = ProfilerManager(trace)
+        enableProfiling()
+        self.profiler = ProfilerManager(
+            trace, self.settings.get("debug.profiler_spans"))
 
     @catchExceptionDecorator(StateChangeException)
     @catchExceptionDecorator(UcsError, toErrorState)
@@ -106,11 +121,18 @@ class DeviceContextManager:
         """Deinitialize the controller when FL Studio closes or begins a render
         """
         if self._device is not None:
+            # Send events that are still waiting in the output queue first,
+            # since the device may change its mode while deinitializing (eg
+            # disabling InControl), and they would otherwise arrive after it
+            self._device.getOutputQueue().flush(force=True)
             self._device.deinitialize()
             self._device = None
         if self.state is not None:
             self.state.deinitialize()
             self.state = None
+        # Make sure events forwarded while deinitializing get sent
+        self.forwarding.flush()
+        logger.log.flush()
 
     @catchUnsafeOperation
     @catchExceptionDecorator(StateChangeException)
@@ -124,6 +146,12 @@ class DeviceContextManager:
         """
         # Filter out events that shouldn't be forwarded here
         if isEventForwarded(event):
+            # Handshake messages for the forwarding session
+            if isForwardControlMessage(event):
+                if self._device is not None:
+                    self.forwarding.processControl(event)
+                event.handled = True
+                return
             # If device is none, ignore all forwarded messages
             if self._device is None or not isEventForwardedHere(event):
                 event.handled = True
@@ -131,6 +159,8 @@ class DeviceContextManager:
         if self.state is None:
             raise MissingContextException("State not set")
         self.state.processEvent(event)
+        # Send any events that were forwarded as a result of this event
+        self.forwarding.flush()
 
     @catchUnsafeOperation
     @catchExceptionDecorator(StateChangeException)
@@ -148,7 +178,7 @@ class DeviceContextManager:
         # Skip this tick to compensate
         last_tick = self._last_tick
         self._last_tick = time_ns()
-        drop_tick_time = self.settings.get("advanced.drop_tick_time")
+        drop_tick_time = self._drop_tick_time.value
         if (self._last_tick - last_tick) / 1_000_000 > drop_tick_time:
             self._dropped_ticks += 1
             return
@@ -157,8 +187,12 @@ class DeviceContextManager:
         self.activity.tick()
         # Tick the current script state
         self.state.tick()
+        # Send events that were forwarded during the tick
+        self.forwarding.flush()
+        # Write buffered items to the binary log, if it's enabled
+        logger.log.flush()
         tick_end = time_ns()
-        slow_tick_time = self.settings.get("advanced.slow_tick_time")
+        slow_tick_time = self._slow_tick_time.value
         if (tick_end - tick_start) / 1_000_000 > slow_tick_time:
             self._slow_ticks += 1
 
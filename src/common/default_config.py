@@ -60,6 +60,12 @@ CONFIG = {
         # How long to wait after sending a universal device enquiry until the
         # fallback device recognition method is used, in seconds.
         "detection_timeout": 3.0,
+        # Whether to remember the device recognized on each port, so that it
+        # can be loaded straight away next time the script starts, rather than
+        # waiting for the device to respond to the universal device enquiry.
+        # The device's response is still checked after it is loaded, and the
+        # script switches devices if it doesn't match.
+        "detection_cache": True,
         # Associations between device name (as shown in FL Studio) and device
         # id to register (listed in class under getId() function)
         # This can be used to skip using universal device enquiry messages, if
@@ -76,7 +82,16 @@ CONFIG = {
         # Whether profiling should print the tracing of profiler contexts
         # within the script. Useful for troubleshooting crashes in FL Studio's
         # MIDI API. Requires profiling to be enabled.
-        "exec_tracing": False
+        "exec_tracing": False,
+        # Number of recent profiles to keep so that they can be exported to a
+        # flamegraph viewer using `getContext().profiler.export(path)`. Use 0
+        # to not keep them. Requires profiling to be enabled.
+        "profiler_spans": 0,
+        # Whether colors should be matched to device palettes by comparing
+        # them against every color in the palette, rather than using a lookup
+        # table of approximate matches. This is much slower, but can help to
+        # check whether a color is being displayed incorrectly.
+        "exact_color_matching": False,
     },
     # Logging settings
     "logger": {
@@ -97,6 +112,18 @@ CONFIG = {
         # Verbosity levels at or above this will be discarded entirely be the
         # logger to improve performance
         "discard_verbosity": verbosity.NOTE,
+        # Maximum number of logged messages to keep in the log's history.
+        # Once this is reached, the oldest messages are discarded to make room
+        # for new ones.
+        "max_history": 1000,
+        # Whether logged messages should also be written to a binary log file
+        # (ucs_config/log.ucslog), so that they can be analysed after FL
+        # Studio is closed using `python src/common/logger/log_query.py`.
+        "binary_log": False,
+        # Maximum verbosity for which logged messages will be written to the
+        # binary log. This is separate from `discard_verbosity`, so that
+        # events can be recorded without being kept in the log's history.
+        "binary_log_verbosity": verbosity.EVENT,
     },
     # Advanced settings for the script. Don't edit these unless you know what
     # you're doing, as they could cause the script to break, or behave badly.
@@ -112,5 +139,16 @@ CONFIG = {
         "slow_tick_time": 50,
         # The maximum length of the plugin/window tracking history
         "activity_history_length": 25,
+        # The maximum size in bytes of a batch of events forwarded from the
+        # main script to a forwarder script. Events forwarded during a tick
+        # are packed into batches to reduce the number of messages sent.
+        # Set to 0 to disable batching.
+        "forward_batch_size": 1024,
+        # The maximum number of bytes per second to send to each MIDI port
+        # when updating the lights and displays of a device. Some devices drop
+        # or delay messages if too many are sent at once. Messages that don't
+        # fit are sent later, with changes that the user caused being sent
+        # before background refreshes. Set to 0 to disable the limit.
+        "output_rate_limit": 0,
     },
 }
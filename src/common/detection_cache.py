@@ -0,0 +1,144 @@
+"""
+common > detection_cache
+
+Contains the detection cache, which remembers which device was recognized on
+each MIDI port, so that the device can be loaded straight away the next time
+the script starts, rather than waiting for a response to the universal device
+enquiry.
+
+The cache is stored in the `ucs_config` directory, as a text file with one
+line for each port, in the form `port name<TAB>response hash<TAB>device ID`.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+__all__ = [
+    'DetectionCache',
+    'hashResponse',
+]
+
+from typing import Optional
+from fl_classes import FlMidiMsg
+from .settings import scripts_dir
+from .util.misc import fnv1a
+
+DEFAULT_PATH = scripts_dir + '/detection_cache.txt'
+
+
+def hashResponse(event: Optional[FlMidiMsg]) -> str:
+    """
+    Returns a hash of a device's response to the universal device enquiry,
+    which stays the same between runs of the script (unlike the built-in
+    `hash` function). This uses the 32-bit FNV-1a hash function.
+
+    ### Args:
+    * `event` (`Optional[FlMidiMsg]`): response event, or `None` if the device
+      didn't respond
+
+    ### Returns:
+    * `str`: hash, as a hexadecimal string, or an empty string if there was no
+      response
+    """
+    if event is None:
+        return ''
+    return f"{fnv1a(event.sysex):08x}"
+
+
+class DetectionCache:
+    """
+    Cache of the devices previously recognized on each MIDI port
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        """
+        Create a detection cache
+
+        ### Args:
+        * `path` (`str`, optional): path of the cache file. Defaults to the
+          `detection_cache.txt` file in the `ucs_config` directory.
+        """
+        self._path = path
+
+    def _load(self) -> dict[str, tuple[str, str]]:
+        """
+        Load the contents of the cache file, ignoring any lines that aren't
+        valid.
+
+        ### Returns:
+        * `dict[str, tuple[str, str]]`: mapping between port names and the
+          response hash and device ID recognized on that port
+        """
+        entries: dict[str, tuple[str, str]] = {}
+        try:
+            with open(self._path) as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) == 3:
+                        entries[parts[0]] = (parts[1], parts[2])
+        except OSError:
+            # No cache file yet, or it can't be read
+            pass
+        return entries
+
+    def _save(self, entries: dict[str, tuple[str, str]]) -> None:
+        """
+        Write entries to the cache file. Errors are ignored, since the script
+        can still recognize devices without the cache.
+
+        ### Args:
+        * `entries` (`dict[str, tuple[str, str]]`): entries to write
+        """
+        try:
+            with open(self._path, 'w') as f:
+                for port, (response, id) in entries.items():
+                    f.write(f"{port}\t{response}\t{id}\n")
+        except OSError:
+            pass
+
+    def lookup(self, port: str) -> Optional[tuple[str, str]]:
+        """
+        Returns the device previously recognized on a port
+
+        ### Args:
+        * `port` (`str`): name of the port
+
+        ### Returns:
+        * `tuple[str, str]`: response hash and device ID, or
+        * `None`: no device is cached for this port
+        """
+        return self._load().get(port)
+
+    def store(self, port: str, response: str, id: str) -> None:
+        """
+        Store the device recognized on a port
+
+        ### Args:
+        * `port` (`str`): name of the port
+        * `response` (`str`): hash of the device's response to the universal
+          device enquiry, as given by `hashResponse`
+        * `id` (`str`): ID of the recognized device
+        """
+        # Port names can't contain tabs or newlines in FL Studio, but make
+        # sure we don't corrupt the file if they somehow do
+        if '\t' in port or '\n' in port:
+            return
+        entries = self._load()
+        if entries.get(port) == (response, id):
+            return
+        entries[port] = (response, id)
+        self._save(entries)
+
+    def remove(self, port: str) -> None:
+        """
+        Remove the device cached for a port, if there is one
+
+        ### Args:
+        * `port` (`str`): name of the port
+        """
+        entries = self._load()
+        if entries.pop(port, None) is not None:
+            self._save(entries)
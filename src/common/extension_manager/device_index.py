@@ -0,0 +1,190 @@
+"""
+common > extension_manager > device_index
+
+Contains the DeviceIndex class, which allows devices to be recognized without
+checking every registered device in turn.
+
+Universal device enquiry responses (identity replies) are in the form:
+
+```
+F0 7E <channel> 06 02 <manufacturer> <family (2 bytes)> <model (2 bytes)>
+<version (4 bytes)> F7
+```
+
+where the manufacturer ID is either a single byte, or three bytes starting
+with `00`. Devices are indexed using their manufacturer ID and the first byte
+of their family code, so that recognizing a device only requires checking the
+patterns of the few devices with the same key.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+import re
+from typing import TYPE_CHECKING, Any, Optional, Sequence
+from typing_extensions import TypeAlias
+from fl_classes import FlMidiMsg
+
+if TYPE_CHECKING:
+    from devices import Device
+    from control_surfaces.event_patterns import IEventPattern
+
+# Entry for a device in the index, in the form `(registration order, device,
+# enquiry response pattern)`
+IndexEntry: TypeAlias = "tuple[int, type[Device], IEventPattern]"
+
+# Maximum number of values a byte in a pattern can match before the pattern
+# is considered too general to index
+MAX_EXPANSION = 16
+
+
+def _expandByte(b: Any) -> Optional[list[int]]:
+    """
+    Returns the values matched by a byte in a sysex pattern, or `None` if
+    there are too many to index
+    """
+    if isinstance(b, int):
+        return [b]
+    if isinstance(b, (tuple, range)) and len(b) <= MAX_EXPANSION:
+        return list(b)
+    return None
+
+
+def identityKeys(sysex: Sequence[Any]) -> Optional[list[tuple[int, ...]]]:
+    """
+    Returns the index keys matched by the sysex data of a universal device
+    enquiry response, or a pattern for one.
+
+    ### Args:
+    * `sysex` (`Sequence[ByteMatch]`): sysex data or sysex pattern
+
+    ### Returns:
+    * `list[tuple[int, ...]]`: keys matched by the data, or
+    * `None`: the keys can't be determined, so the data could match any key
+    """
+    if len(sysex) < 7 or sysex[3] != 0x06 or sysex[4] != 0x02:
+        return None
+    if not isinstance(sysex[5], int):
+        # The length of the manufacturer ID isn't known
+        return None
+    if sysex[5] == 0x00:
+        # Extended manufacturer ID
+        positions = [5, 6, 7, 8]
+    else:
+        positions = [5, 6]
+    if len(sysex) <= positions[-1]:
+        return None
+    keys: list[tuple[int, ...]] = [()]
+    for i in positions:
+        values = _expandByte(sysex[i])
+        if values is None:
+            return None
+        keys = [k + (v,) for k in keys for v in values]
+    return keys
+
+
+def overridesNameMatch(device: type['Device']) -> bool:
+    """
+    Returns whether a device overrides the default `matchDeviceName` method,
+    meaning that it needs to be called directly when matching device names.
+    """
+    from devices import Device
+    return getattr(device.matchDeviceName, '__func__', None) \
+        is not getattr(Device.matchDeviceName, '__func__')
+
+
+class DeviceIndex:
+    """
+    Index of registered devices, built from their universal device enquiry
+    response patterns and device name patterns.
+    """
+
+    def __init__(self, devices: list[type['Device']]) -> None:
+        """
+        Build an index of the given devices
+
+        ### Args:
+        * `devices` (`list[type[Device]]`): devices to index. Devices earlier
+          in the list are preferred if multiple devices match.
+        """
+        self._sysex: dict[tuple[int, ...], list[IndexEntry]] = {}
+        self._unindexed: list[IndexEntry] = []
+        # Devices with a name pattern, in the order of their groups in the
+        # compiled union
+        self._name_devices: list[type['Device']] = []
+        self._custom_names: list[type['Device']] = []
+        name_patterns: list[str] = []
+
+        for order, device in enumerate(devices):
+            pattern = device.getUniversalEnquiryResponsePattern()
+            if pattern is not None:
+                entry = (order, device, pattern)
+                keys = identityKeys(getattr(pattern, 'sysex')) \
+                    if getattr(pattern, 'sysex_event', False) else None
+                if keys is None:
+                    self._unindexed.append(entry)
+                else:
+                    for key in keys:
+                        self._sysex.setdefault(key, []).append(entry)
+
+            if overridesNameMatch(device):
+                self._custom_names.append(device)
+            else:
+                name = device.getDeviceNamePattern()
+                if name is not None:
+                    self._name_devices.append(device)
+                    name_patterns.append(
+                        f"(?P<_ucs_device_{len(name_patterns)}>{name})")
+
+        if len(name_patterns):
+            self._names: Optional[re.Pattern[str]] \
+                = re.compile('|'.join(name_patterns))
+        else:
+            self._names = None
+
+    def matchSysex(self, event: FlMidiMsg) -> Optional[type['Device']]:
+        """
+        Returns the device matching a universal device enquiry response
+
+        ### Args:
+        * `event` (`FlMidiMsg`): response event
+
+        ### Returns:
+        * `type[Device]`: matching device, or
+        * `None`: no devices matched
+        """
+        keys = identityKeys(event.sysex)
+        candidates = self._unindexed
+        if keys is not None and keys[0] in self._sysex:
+            candidates = sorted(
+                self._sysex[keys[0]] + candidates,
+                key=lambda e: e[0],
+            )
+        for _, device, pattern in candidates:
+            if pattern.matchEvent(event):
+                return device
+        return None
+
+    def matchName(self, name: str) -> Optional[type['Device']]:
+        """
+        Returns the device matching a device name
+
+        ### Args:
+        * `name` (`str`): name of the device
+
+        ### Returns:
+        * `type[Device]`: matching device, or
+        * `None`: no devices matched
+        """
+        if self._names is not None:
+            match = self._names.fullmatch(name)
+            if match is not None:
+                for i, device in enumerate(self._name_devices):
+                    if match.group(f"_ucs_device_{i}") is not None:
+                        return device
+        for device in self._custom_names:
+            if device.matchDeviceName(name):
+                return device
+        return None
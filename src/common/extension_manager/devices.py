@@ -9,21 +9,67 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-from typing import TYPE_CHECKING
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Callable, Optional
 from common.exceptions import DeviceRecognizeError, DeviceInitializeError
 from common.util.events import eventToString
 from fl_classes import FlMidiMsg
+from . import manifest
+from .device_index import DeviceIndex, identityKeys
 
 
 if TYPE_CHECKING:
     from devices import Device
 
 
+# Manifest entry for a device, in the form `(module, class name, supported IDs,
+# enquiry response sysex pattern, matches device name)`
+ManifestEntry = tuple[str, str, tuple[str, ...], Optional[list[Any]], bool]
+
+
 class DeviceCollection:
     """Collection of devices registered to the script
+
+    Devices listed in the extension manifest are only imported (and therefore
+    registered) once they could match the device being recognized.
     """
     def __init__(self) -> None:
         self.__devices: list[type['Device']] = []
+        # Index of registered devices, which is rebuilt when it is next needed
+        # after a device is registered
+        self.__index: Optional[DeviceIndex] = None
+        # Manifest entries for device modules that haven't been imported yet
+        self.__unloaded: list[ManifestEntry] = list(manifest.DEVICES)
+
+    def _loadMatching(
+        self,
+        condition: Callable[[ManifestEntry], bool],
+    ) -> None:
+        """
+        Import the modules of any unloaded devices whose manifest entries
+        match the given condition, so that they are registered.
+
+        ### Args:
+        * `condition` (`Callable[[tuple], bool]`): condition for manifest
+          entries
+        """
+        matches = [e for e in self.__unloaded if condition(e)]
+        if not len(matches):
+            return
+        modules = {module for module, *_ in matches}
+        self.__unloaded = [
+            e for e in self.__unloaded if e[0] not in modules
+        ]
+        # Import in manifest order so that devices are matched in a
+        # consistent order
+        for module, *_ in matches:
+            import_module(module)
+
+    def loadAll(self) -> None:
+        """
+        Import all devices listed in the manifest
+        """
+        self._loadMatching(lambda _: True)
 
     def register(self, device: type['Device']) -> None:
         """
@@ -45,6 +91,15 @@ class DeviceCollection:
         ```
         """
         self.__devices.append(device)
+        self.__index = None
+
+    def _getIndex(self) -> DeviceIndex:
+        """
+        Returns the index of registered devices, building it if required
+        """
+        if self.__index is None:
+            self.__index = DeviceIndex(self.__devices)
+        return self.__index
 
     def get(self, arg: 'FlMidiMsg | str') -> 'Device':
         """
@@ -62,33 +117,51 @@ class DeviceCollection:
         """
         # Device name
         if isinstance(arg, str):
-            for device in self.__devices:
-                if device.matchDeviceName(arg):
-                    # If it matches the pattern, then we found the right device
-                    # create an instance and return it
-                    try:
-                        return device.create(None)
-                    except Exception as e:
-                        raise DeviceInitializeError(
-                            "Failed to initialise device") from e
+            self._loadMatching(lambda e: e[4])
+            device = self._getIndex().matchName(arg)
+            if device is not None:
+                # If it matches the pattern, then we found the right device
+                # create an instance and return it
+                try:
+                    return device.create(None)
+                except Exception as e:
+                    raise DeviceInitializeError(
+                        "Failed to initialise device") from e
             raise DeviceRecognizeError(
                 f"Device not recognized, using device name {arg}")
         # Sysex event
         # elif isinstance(arg, FlMidiMsg):
         # Can't runtime type check for MIDI events
         else:
-            for device in self.__devices:
-                pattern = device.getUniversalEnquiryResponsePattern()
-                if pattern is None:
-                    pass
-                elif pattern.matchEvent(arg):
-                    # If it matches the pattern, then we found the right device
-                    # create an instance and return it
-                    try:
-                        return device.create(arg)
-                    except Exception as e:
-                        raise DeviceInitializeError(
-                            "Failed to initialise device") from e
+            from control_surfaces.event_patterns import BasicPattern
+            event_keys = identityKeys(arg.sysex)
+
+            def mightMatch(pattern: list[Any]) -> bool:
+                """Check the index key before building the full pattern"""
+                keys = identityKeys(pattern)
+                return (
+                    keys is None
+                    or event_keys is None
+                    or event_keys[0] in keys
+                )
+
+            self._loadMatching(
+                lambda e: e[3] is None
+                or (
+                    len(e[3]) > 0
+                    and mightMatch(e[3])
+                    and BasicPattern(e[3]).matchEvent(arg)
+                )
+            )
+            device = self._getIndex().matchSysex(arg)
+            if device is not None:
+                # If it matches the pattern, then we found the right device
+                # create an instance and return it
+                try:
+                    return device.create(arg)
+                except Exception as e:
+                    raise DeviceInitializeError(
+                        "Failed to initialise device") from e
             raise DeviceRecognizeError(
                 f"Device not recognized, using response "
                 f"pattern {eventToString(arg)}"
@@ -107,6 +180,7 @@ class DeviceCollection:
         ### Returns:
         * `Device`: matching device
         """
+        self._loadMatching(lambda e: id in e[2])
         for device in self.__devices:
             if id in device.getSupportedIds():
                 try:
@@ -117,9 +191,18 @@ class DeviceCollection:
         raise DeviceRecognizeError(f"Device with ID {id} not found")
 
     def all(self) -> list[type['Device']]:
+        self.loadAll()
+        return list(self.__devices)
+
+    def loaded(self) -> list[type['Device']]:
+        """
+        Returns the devices that have been registered so far, without
+        importing any others
+        """
         return list(self.__devices)
 
     def __len__(self) -> int:
+        self.loadAll()
         return len(self.__devices)
 
     def inspect(self, dev: type['Device']) -> str:
@@ -0,0 +1,137 @@
+"""
+common > extension_manager > manifest
+
+Lists the devices and plugin integrations provided by each module, so that
+modules can be imported only when they are needed.
+
+THIS FILE IS GENERATED. Don't edit it manually, instead run:
+
+```sh
+cd src
+python -m common.extension_manager.manifest_builder
+```
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+# flake8: noqa
+from typing import Any, Optional
+
+DEVICES: list[
+    tuple[str, str, tuple[str, ...], Optional[list[Any]], bool]
+] = [
+    (
+        'devices.akai.mk3.mpk_mini_mk3',
+        'MpkMiniMk3',
+        ('Akai.Mpk.Mini.Mk3',),
+        [240, 126, 127, 6, 2, 71, 73, 0, 25, 0],
+        False,
+    ),
+    (
+        'devices.akai.plus.mpk_mini_plus',
+        'MpkMiniPlus',
+        ('Akai.Mpk.Mini.Plus',),
+        [240, 126, 127, 6, 2, 71, 84, 0, 25, 0],
+        False,
+    ),
+    (
+        'devices.korg.nano_kontrol.mk1.nano_kontrol',
+        'NanoKontrol',
+        ('Korg.NanoKontrol.Mk1',),
+        [247, 126, Ellipsis, 6, 2, 66, 4, 1, 0, 0],
+        False,
+    ),
+    (
+        'devices.maudio.hammer88pro.hammer88pro',
+        'Hammer88Pro',
+        ('Maudio.Hammer88Pro',),
+        [240, 126, Ellipsis, 6, 2, 0, 1, 5, 0, 60],
+        False,
+    ),
+    (
+        'devices.novation.launchkey.mk2',
+        'LaunchkeyMk2_49_61',
+        ('Novation.Launchkey.Mk2.49', 'Novation.Launchkey.Mk2.61'),
+        [240, 126, Ellipsis, 6, 2, 0, 32, 41, (124, 125)],
+        False,
+    ),
+    (
+        'devices.novation.launchkey.mk2',
+        'LaunchkeyMk2_25',
+        ('Novation.Launchkey.Mk2.25',),
+        [240, 126, 0, 6, 2, 0, 32, 41, 123],
+        False,
+    ),
+    (
+        'devices.novation.launchkey.mk3.lk_25_37',
+        'LaunchkeyMk3_25_37',
+        ('Novation.Launchkey.Mk3.25', 'Novation.Launchkey.Mk3.37'),
+        [240, 126, Ellipsis, 6, 2, 0, 32, 41, (52, 53), 1, 0, 0],
+        False,
+    ),
+    (
+        'devices.novation.launchkey.mk3.lk_49_61',
+        'LaunchkeyMk3_49_61',
+        ('Novation.Launchkey.Mk3.49', 'Novation.Launchkey.Mk3.61', 'Novation.Launchkey.Mk3.88'),
+        [240, 126, Ellipsis, 6, 2, 0, 32, 41, (54, 55, 64), 1, 0, 0],
+        False,
+    ),
+    (
+        'devices.novation.launchkey.mk3_mini.mini',
+        'LaunchkeyMiniMk3',
+        ('Novation.Launchkey.Mk3.Mini',),
+        [240, 126, Ellipsis, 6, 2, 0, 32, 41, 2, 1, 0, 0],
+        False,
+    ),
+    (
+        'devices.novation.sl.mk3.device',
+        'SlMk3',
+        ('Novation.SL.Mk3',),
+        [240, 126, Ellipsis, 6, 2, 0, 32, 41, 1, 1, 0, 0],
+        False,
+    ),
+]
+
+PLUGINS: dict[str, str] = {
+    'Abbey Road One': 'integrations.plugin.spitfire.spitfire_generic',
+    'Abbey Road Two': 'integrations.plugin.spitfire.spitfire_generic',
+    'Appassionata Strings': 'integrations.plugin.spitfire.spitfire_generic',
+    'BBC Symphony Orchestra': 'integrations.plugin.spitfire.spitfire_generic',
+    'DAW Cassette': 'integrations.plugin.klevgrand.daw_cassette',
+    'Eric Whitacre Choir': 'integrations.plugin.spitfire.spitfire_generic',
+    'FLEX': 'integrations.plugin.fl.flex',
+    'FPC': 'integrations.plugin.fl.fpc',
+    'Fink Signatures': 'integrations.plugin.spitfire.spitfire_generic',
+    'Fruity Slicer': 'integrations.plugin.fl.slicers',
+    'Fruity parametric EQ 2': 'integrations.plugin.fl.parametric_eq',
+    'Hammers': 'integrations.plugin.spitfire.spitfire_generic',
+    'Hans Zimmer Strings': 'integrations.plugin.spitfire.spitfire_generic',
+    'Harmless': 'integrations.plugin.fl.harmless',
+    'Heirloom': 'integrations.plugin.spitfire.spitfire_generic',
+    'LABS': 'integrations.plugin.spitfire.spitfire_generic',
+    'OTT': 'integrations.plugin.xfer',
+    'Originals - Cimbalom': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Cinematic Frozen Strings': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Cinematic Pads': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Cinematic Percussion': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Cinematic Soft Piano': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Drumline': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Epic Brass & Woodwinds': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Epic Choir': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Epic Strings': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Felt Piano': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Firewood Piano': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Intimate Grand Piano': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Intimate Strings': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Jangle Box Piano': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Media Toolkit': 'integrations.plugin.spitfire.spitfire_generic',
+    'Originals - Mrs Mills Piano': 'integrations.plugin.spitfire.spitfire_generic',
+    'Polaris': 'integrations.plugin.spitfire.spitfire_generic',
+    'Serum': 'integrations.plugin.xfer',
+    'Slicex': 'integrations.plugin.fl.slicers',
+    'Transistor Bass': 'integrations.plugin.fl.transistor_bass',
+    'Vital': 'integrations.plugin.matt_tytel.vital',
+}
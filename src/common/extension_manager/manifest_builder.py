@@ -0,0 +1,207 @@
+"""
+common > extension_manager > manifest_builder
+
+Generates the extension manifest (`manifest.py`), which allows devices and
+plugin integrations to be imported only when they are needed.
+
+This imports every device and plugin integration module, and records what
+each of them registers. It should be run whenever a device or plugin
+integration is added or changed:
+
+```sh
+cd src
+python -m common.extension_manager.manifest_builder
+```
+
+This module is never imported by the script itself.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+import os
+import pkgutil
+from importlib import import_module
+from typing import Any, Iterator, Optional
+
+from common.extension_manager import ExtensionManager
+from common.extension_manager.device_index import overridesNameMatch
+from control_surfaces.event_patterns import BasicPattern
+from devices import Device
+
+# Packages containing extensions that are loaded lazily
+DEVICE_PACKAGES = ['devices']
+PLUGIN_PACKAGES = ['integrations.plugin']
+
+# Modules that are always imported when the script starts, and so don't need
+# to be included in the manifest
+EAGER_MODULES = {
+    'devices.device',
+    'devices.device_shadow',
+    'integrations.plugin.basic_faders',
+    'integrations.plugin.default_integration',
+}
+
+HEADER = '''"""
+common > extension_manager > manifest
+
+Lists the devices and plugin integrations provided by each module, so that
+modules can be imported only when they are needed.
+
+THIS FILE IS GENERATED. Don't edit it manually, instead run:
+
+```sh
+cd src
+python -m common.extension_manager.manifest_builder
+```
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+'''
+
+
+def _walkModules(package: str) -> Iterator[str]:
+    """
+    Yields the names of all modules within a package, recursively, in the
+    order they should be imported.
+
+    Each package is only imported after its name is yielded, so that the
+    caller can determine what is registered by the package itself.
+
+    ### Args:
+    * `package` (`str`): name of package
+
+    ### Yields:
+    * `str`: module names
+    """
+    yield package
+    pkg = import_module(package)
+    for info in sorted(
+        pkgutil.iter_modules(pkg.__path__),
+        key=lambda i: i.name,
+    ):
+        name = f"{package}.{info.name}"
+        if info.ispkg:
+            yield from _walkModules(name)
+        else:
+            yield name
+
+
+def _getEnquiryPattern(device: type[Device]) -> Optional[list[Any]]:
+    """
+    Returns the sysex data of a device's universal device enquiry response
+    pattern, or `None` if it can't be represented in the manifest, meaning
+    that the device's module needs to be imported to check for a match.
+    """
+    pattern = device.getUniversalEnquiryResponsePattern()
+    if isinstance(pattern, BasicPattern) and pattern.sysex_event:
+        return pattern.sysex
+    # If the device has no pattern, it can't ever be matched using a device
+    # enquiry
+    if pattern is None:
+        return []
+    return None
+
+
+def _matchesName(device: type[Device]) -> bool:
+    """
+    Returns whether a device can be matched using its name, meaning its
+    module needs to be imported when falling back to device name matching.
+    """
+    return overridesNameMatch(device) \
+        or device.getDeviceNamePattern() is not None
+
+
+def buildManifest() -> tuple[list[tuple], dict[str, str]]:
+    """
+    Import all extensions and determine which module provides each of them
+
+    ### Returns:
+    * `list[tuple]`: device entries, each in the form `(module, class name,
+      supported IDs, enquiry response pattern, matches device name)`
+    * `dict[str, str]`: mapping between plugin IDs and the module that
+      provides them
+    """
+    devices = []
+    for package in DEVICE_PACKAGES:
+        for module in _walkModules(package):
+            if module in EAGER_MODULES:
+                continue
+            before = set(ExtensionManager.devices.loaded())
+            import_module(module)
+            for dev in ExtensionManager.devices.loaded():
+                if dev not in before:
+                    devices.append((
+                        module,
+                        dev.__name__,
+                        dev.getSupportedIds(),
+                        _getEnquiryPattern(dev),
+                        _matchesName(dev),
+                    ))
+
+    plugins = {}
+    for package in PLUGIN_PACKAGES:
+        for module in _walkModules(package):
+            if module in EAGER_MODULES:
+                continue
+            before_ids = set(ExtensionManager.plugins.loadedIds())
+            import_module(module)
+            for plug_id in ExtensionManager.plugins.loadedIds():
+                if plug_id not in before_ids:
+                    plugins[plug_id] = module
+
+    return devices, plugins
+
+
+def formatManifest(devices: list[tuple], plugins: dict[str, str]) -> str:
+    """
+    Format the manifest as Python source code
+
+    ### Args:
+    * `devices` (`list[tuple]`): device entries
+    * `plugins` (`dict[str, str]`): plugin entries
+
+    ### Returns:
+    * `str`: contents of `manifest.py`
+    """
+    lines = [
+        HEADER + '# flake8: noqa',
+        'from typing import Any, Optional',
+        '',
+        'DEVICES: list[',
+        '    tuple[str, str, tuple[str, ...], Optional[list[Any]], bool]',
+        '] = [',
+    ]
+    for module, name, ids, pattern, name_match in devices:
+        lines += [
+            '    (',
+            f'        {module!r},',
+            f'        {name!r},',
+            f'        {ids!r},',
+            f'        {pattern!r},',
+            f'        {name_match!r},',
+            '    ),',
+        ]
+    lines += [']', '', 'PLUGINS: dict[str, str] = {']
+    for plug_id, module in sorted(plugins.items()):
+        lines.append(f'    {plug_id!r}: {module!r},')
+    lines += ['}', '']
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    source = formatManifest(*buildManifest())
+    path = os.path.join(os.path.dirname(__file__), 'manifest.py')
+    with open(path, 'w') as f:
+        f.write(source)
+    print(f"Wrote manifest to {path}")
+
+
+if __name__ == '__main__':
+    main()
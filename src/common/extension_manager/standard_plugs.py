@@ -10,7 +10,9 @@ This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
 
+from importlib import import_module
 from typing import TYPE_CHECKING, Optional
+from . import manifest
 
 if TYPE_CHECKING:
     from integrations import PluginIntegration
@@ -19,8 +21,14 @@ if TYPE_CHECKING:
 
 class StandardPluginCollection:
     """Collection of standard plugins registered to the script
+
+    Plugin integrations listed in the extension manifest are only imported
+    (and therefore registered) once their plugin is used.
     """
     def __init__(self) -> None:
+        # Mappings between plugin IDs and the modules that haven't been
+        # imported yet
+        self.__unloaded: dict[str, str] = dict(manifest.PLUGINS)
         self.__mappings: dict[str, type['PluginIntegration']] = {}
         self.__instantiated: dict[str, 'PluginIntegration'] = {}
         self.__fallback: Optional[type['PluginIntegration']] = None
@@ -48,6 +56,26 @@ class StandardPluginCollection:
         for plug_id in plug.getPlugIds():
             self.__mappings[plug_id] = plug
 
+    def _loadModule(self, module: str) -> None:
+        """
+        Import a module containing plugin integrations, so that they are
+        registered
+
+        ### Args:
+        * `module` (`str`): name of module
+        """
+        self.__unloaded = {
+            k: v for k, v in self.__unloaded.items() if v != module
+        }
+        import_module(module)
+
+    def loadAll(self) -> None:
+        """
+        Import all plugin integrations listed in the manifest
+        """
+        for module in sorted(set(self.__unloaded.values())):
+            self._loadModule(module)
+
     def registerFallback(self, plug: type['PluginIntegration']) -> None:
         """
         Register a plugin to be used as a fallback when the default bindings
@@ -67,8 +95,11 @@ class StandardPluginCollection:
         # Plugin already instantiated
         if id in self.__instantiated.keys():
             return self.__instantiated[id]
+        # Plugin exists but hasn't been imported yet
+        if id in self.__unloaded:
+            self._loadModule(self.__unloaded[id])
         # Plugin exists but isn't instantiated
-        elif id in self.__mappings.keys():
+        if id in self.__mappings.keys():
             self.__instantiated[id] \
                 = self.__mappings[id].create(DeviceShadow(device))
             return self.__instantiated[id]
@@ -92,12 +123,21 @@ class StandardPluginCollection:
         self.__fallback_inst = None
 
     def all(self) -> list[type['PluginIntegration']]:
+        self.loadAll()
         return list(self.__mappings.values())
 
+    def loadedIds(self) -> list[str]:
+        """
+        Returns the plugin IDs that have been registered so far, without
+        importing any other plugin integrations
+        """
+        return list(self.__mappings.keys())
+
     def instantiated(self) -> list['PluginIntegration']:
         return list(self.__instantiated.values())
 
     def __len__(self) -> int:
+        self.loadAll()
         return len(self.__mappings)
 
     def _formatPlugin(cls, plug: Optional['PluginIntegration']) -> str:
@@ -122,6 +162,7 @@ class StandardPluginCollection:
             return self._inspect_plug(plug)
 
     def _inspect_plug(self, plug: 'type[PluginIntegration]') -> str:
+        self.loadAll()
         matches: list[tuple[str, Optional['PluginIntegration']]] = []
 
         for id, p in self.__mappings.items():
@@ -146,6 +187,9 @@ class StandardPluginCollection:
             ])
 
     def _inspect_id(self, id: str) -> str:
+        if id in self.__unloaded:
+            return f"{id} associated with: {self.__unloaded[id]} "\
+                    "(not imported)"
         if id in self.__instantiated.keys():
             return f"{id} associated with:\n\n{self.__instantiated[id]}"
         elif id in self.__mappings.keys():
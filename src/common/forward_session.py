@@ -0,0 +1,321 @@
+"""
+common > forward_session
+
+Contains the ForwardSession class, which keeps track of the handshake used to
+agree on a session handle for the version 2 forwarding envelope.
+
+The handshake works as follows:
+
+1. When the main script starts, it allocates a session handle and announces
+   it to all forwarder scripts.
+2. When a forwarder script starts, or receives an announcement for all
+   forwarders, it sends a hello message to the main script, containing the
+   handles it has seen announced for other devices.
+3. When the main script receives a hello message, it makes sure that its
+   handle isn't used by another device, allocating a new one (and announcing
+   it to all forwarders) if it is. It then announces its session handle to
+   that forwarder, and starts using the version 2 envelope for events sent
+   to it.
+4. When a forwarder receives an announcement, it starts using the version 2
+   envelope, unless the handle is used by another device, in which case it
+   sends another hello message so that the main script can pick a new one.
+
+Scripts only accept handshake messages for the same device ID, and older
+scripts ignore them, meaning they continue to use the version 1 envelope.
+Forwarders keep track of the handles announced for other device IDs, so that
+two devices never share a handle. If the main script can't find a free
+handle, it announces the control handle instead, meaning that version 1
+should be used.
+
+Once a forwarder supports the version 2 envelope, events that the main script
+forwards to it are accumulated into batches, which are sent when the script
+finishes processing a tick or event, or when the batch reaches its maximum
+size.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from typing import Optional
+import device
+from fl_classes import FlMidiMsg
+from .logger import log, verbosity
+from .settings import SettingHandle
+from .util.events import (
+    FORWARD_ANNOUNCE,
+    FORWARD_CONTROL,
+    FORWARD_HELLO,
+    decodeForwardControl,
+    encodeForwardControl,
+    encodeForwardedBatch,
+    encodeForwardedBatchEntry,
+    getDeviceId,
+    getDeviceNum,
+    getSessionHandle,
+)
+
+LOG_CAT = "device.forward.bootstrap"
+
+
+def _dispatch(data: bytes) -> None:
+    """
+    Send a message to all available devices, if there are any
+    """
+    for i in range(device.dispatchReceiverCount()):
+        device.dispatch(i, 0xF0, data)
+
+
+class ForwardSession:
+    """
+    Keeps track of the session handle used to forward events
+    """
+
+    def __init__(self, max_batch_size: SettingHandle) -> None:
+        """
+        Create a forwarding session
+
+        ### Args:
+        * `max_batch_size` (`SettingHandle`): handle to the maximum size of
+          batches of forwarded events, in bytes
+        """
+        self.handle: Optional[int] = None
+        """The agreed session handle, or `None` if there isn't one yet"""
+        self._is_main = False
+        # Handles that are used by other devices, as reported by forwarders
+        self._used: set[int] = set()
+        # Handles announced by the main scripts of other devices, for each
+        # device ID
+        self._foreign: dict[str, int] = {}
+        # Device numbers of forwarders that support the version 2 envelope
+        self._v2_devices: set[int] = set()
+        self._max_batch_size = max_batch_size
+        # Batches of events waiting to be sent, for each device number, along
+        # with the total size of their entries
+        self._batches: dict[int, list[bytes]] = {}
+        self._batch_sizes: dict[int, int] = {}
+
+    def getHandle(self, device_num: int) -> Optional[int]:
+        """
+        Returns the session handle to use when encoding an event forwarded
+        to or from the given device number, or `None` if the version 2
+        envelope shouldn't be used.
+
+        ### Args:
+        * `device_num` (`int`): device number
+
+        ### Returns:
+        * `Optional[int]`: session handle
+        """
+        if self._is_main and device_num not in self._v2_devices:
+            return None
+        return self.handle
+
+    def queue(self, event: FlMidiMsg, device_num: int) -> bool:
+        """
+        Add an event to the batch for the given device number, if batching is
+        supported by that device.
+
+        ### Args:
+        * `event` (`FlMidiMsg`): event to forward
+        * `device_num` (`int`): device number to target
+
+        ### Returns:
+        * `bool`: whether the event was added to a batch. If not, it should
+          be forwarded immediately.
+        """
+        if device_num not in self._v2_devices or not self._is_main:
+            return False
+        # Header, category and terminator
+        max_size = self._max_batch_size.value - 7
+        entry = encodeForwardedBatchEntry(event)
+        size = self._batch_sizes.get(device_num, 0)
+        if size + len(entry) > max_size:
+            # Send existing events first, so that events stay in order
+            self.flushDevice(device_num)
+            if len(entry) > max_size:
+                return False
+            size = 0
+        self._batches.setdefault(device_num, []).append(entry)
+        self._batch_sizes[device_num] = size + len(entry)
+        return True
+
+    def flushDevice(self, device_num: int) -> None:
+        """
+        Send the batch of events waiting to be forwarded to a device
+
+        ### Args:
+        * `device_num` (`int`): device number
+        """
+        entries = self._batches.pop(device_num, None)
+        self._batch_sizes.pop(device_num, None)
+        if not entries:
+            return
+        assert self.handle is not None
+        _dispatch(encodeForwardedBatch(entries, self.handle, device_num))
+
+    def flush(self) -> None:
+        """
+        Send all batches of events waiting to be forwarded
+        """
+        for device_num in list(self._batches.keys()):
+            self.flushDevice(device_num)
+
+    def _allocateHandle(self, id: str) -> Optional[int]:
+        """
+        Find a session handle that isn't used by another device, starting
+        from the one preferred by the device ID
+
+        ### Args:
+        * `id` (`str`): device ID
+
+        ### Returns:
+        * `Optional[int]`: session handle, or `None` if they are all in use
+        """
+        start = getSessionHandle(id)
+        for i in range(FORWARD_CONTROL):
+            handle = (start + i) % FORWARD_CONTROL
+            if handle not in self._used:
+                return handle
+        return None
+
+    def announce(self, device_num: int = 0) -> None:
+        """
+        Announce the session handle of the main script, allocating one if
+        required
+
+        ### Args:
+        * `device_num` (`int`, optional): forwarder to announce to. Defaults
+          to `0`, meaning all forwarders.
+        """
+        id = getDeviceId()
+        self._is_main = True
+        if self.handle is None:
+            self.handle = self._allocateHandle(id)
+        # A handle of FORWARD_CONTROL tells forwarders to use version 1
+        handle = FORWARD_CONTROL if self.handle is None else self.handle
+        _dispatch(encodeForwardControl(
+            FORWARD_ANNOUNCE,
+            device_num,
+            bytes([handle]) + id.encode(),
+        ))
+
+    def hello(self) -> None:
+        """
+        Request the session handle of the main script, letting it know which
+        handles are used by other devices
+        """
+        used = sorted(set(self._foreign.values()))
+        _dispatch(encodeForwardControl(
+            FORWARD_HELLO,
+            getDeviceNum(),
+            bytes([len(used)] + used) + getDeviceId().encode(),
+        ))
+
+    def _processHello(self, device_num: int, data: bytes) -> None:
+        """
+        Process a hello message from a forwarder, on the main script
+        """
+        if not data:
+            return
+        num_used = data[0]
+        if data[1 + num_used:].decode() != getDeviceId():
+            return
+        self._used.update(data[1:1 + num_used])
+        if self.handle is None:
+            self.handle = self._allocateHandle(getDeviceId())
+        elif self.handle in self._used:
+            # Another device uses our handle, so we need to pick a new one
+            # and let all forwarders know about it. Send events that are
+            # waiting first, since they use the old handle.
+            self.flush()
+            self.handle = self._allocateHandle(getDeviceId())
+            if self.handle is None:
+                log(
+                    LOG_CAT,
+                    "No free forwarding session handles, using forwarding "
+                    "envelope v1",
+                    verbosity.WARNING,
+                )
+                self._v2_devices.clear()
+                # Tell all forwarders to use version 1
+                self.announce()
+                return
+            log(
+                LOG_CAT,
+                f"Forwarding session handle in use by another device, "
+                f"switching to {self.handle}",
+                verbosity.INFO,
+            )
+            self.announce()
+        if self.handle is not None:
+            self._v2_devices.add(device_num)
+            log(
+                LOG_CAT,
+                f"Device {device_num} supports forwarding envelope v2",
+                verbosity.INFO,
+            )
+        self.announce(device_num)
+
+    def _processAnnounce(self, device_num: int, data: bytes) -> None:
+        """
+        Process an announcement from a main script, on a forwarder
+        """
+        handle = data[0]
+        id = data[1:].decode()
+        if id != getDeviceId():
+            # Keep track of the handles used by other devices, so that we
+            # never accept events intended for them
+            if handle == FORWARD_CONTROL:
+                self._foreign.pop(id, None)
+            else:
+                self._foreign[id] = handle
+            if handle == self.handle:
+                log(
+                    LOG_CAT,
+                    f"Forwarding session handle {handle} is used by {id}, "
+                    f"requesting a new one",
+                    verbosity.INFO,
+                )
+                self.handle = None
+                self.hello()
+            return
+        if device_num not in (0, getDeviceNum()):
+            return
+        if handle == FORWARD_CONTROL:
+            self.handle = None
+            log(
+                LOG_CAT,
+                "Main script requested forwarding envelope v1",
+                verbosity.INFO,
+            )
+            return
+        if handle in self._foreign.values():
+            # The main script doesn't know that this handle is in use yet
+            self.handle = None
+            self.hello()
+            return
+        self.handle = handle
+        log(
+            LOG_CAT,
+            f"Using forwarding envelope v2 with handle {self.handle}",
+            verbosity.INFO,
+        )
+        if device_num == 0:
+            # Let the main script know that we support version 2
+            self.hello()
+
+    def processControl(self, event: FlMidiMsg) -> None:
+        """
+        Process a forwarding control message
+
+        ### Args:
+        * `event` (`FlMidiMsg`): control message
+        """
+        kind, device_num, data = decodeForwardControl(event)
+        if kind == FORWARD_HELLO and getDeviceNum() == 1:
+            self._processHello(device_num, data)
+        elif kind == FORWARD_ANNOUNCE and getDeviceNum() != 1:
+            self._processAnnounce(device_num, data)
@@ -20,6 +20,7 @@ HIERARCHY = {
         },
         "device": {
             "type_detect": {},
+            "detection_cache": {},
             "initialize": {},
         }
     },
@@ -48,3 +49,23 @@ HIERARCHY = {
     },
     "general": {}
 }
+
+
+def getCategories() -> list[str]:
+    """
+    Returns a list of all the categories in the log hierarchy, including
+    parent categories
+
+    ### Returns:
+    * `list[str]`: categories, such as `"device.event.in"`
+    """
+    categories: list[str] = []
+
+    def add(prefix: str, children: dict) -> None:
+        for name, grandchildren in children.items():
+            category = prefix + name
+            categories.append(category)
+            add(category + '.', grandchildren)
+
+    add('', HIERARCHY)
+    return categories
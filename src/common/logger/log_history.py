@@ -0,0 +1,144 @@
+"""
+common > logger > log_history
+
+Contains LogHistory, a fixed-capacity ring buffer used to store the most
+recent entries in the script's log
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from typing import Iterator, Optional
+from .log_item import LogItem
+
+# Number of items to store if the settings can't be loaded
+DEFAULT_CAPACITY = 1000
+
+
+class LogHistory:
+    """
+    Stores the most recent log items in a ring buffer, so that the log doesn't
+    keep growing for as long as the script is running.
+
+    Once the buffer is full, each new item replaces the oldest one. The
+    number of items logged and discarded in each category is counted, so
+    that it's still possible to tell what was lost.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """
+        Create a log history
+
+        ### Args:
+        * `capacity` (`int`, optional): maximum number of items to store.
+          Defaults to `DEFAULT_CAPACITY`.
+        """
+        self.__capacity = max(capacity, 1)
+        self.__items: list[Optional[LogItem]] = [None] * self.__capacity
+        # Position where the next item will be written
+        self.__head = 0
+        self.__length = 0
+        self.__total = 0
+        self.logged: dict[str, int] = {}
+        """Number of items that have been logged in each category"""
+        self.discarded: dict[str, int] = {}
+        """Number of items in each category that have been removed from the
+        history to make room for newer items"""
+
+    @property
+    def capacity(self) -> int:
+        """
+        The maximum number of items stored in the history
+        """
+        return self.__capacity
+
+    def setCapacity(self, capacity: int) -> None:
+        """
+        Change the maximum number of items stored in the history. If the
+        history is shrunk, the oldest items are discarded.
+
+        ### Args:
+        * `capacity` (`int`): new capacity
+        """
+        capacity = max(capacity, 1)
+        if capacity == self.__capacity:
+            return
+        items = list(self)
+        for item in items[:-capacity]:
+            self.__discard(item)
+        items = items[-capacity:]
+        self.__capacity = capacity
+        self.__items = [None] * capacity
+        self.__items[:len(items)] = items
+        self.__length = len(items)
+        self.__head = self.__length % capacity
+
+    @property
+    def total(self) -> int:
+        """
+        The total number of items that have been logged, including items that
+        are no longer stored. This is also the index of the next item.
+        """
+        return self.__total
+
+    def __discard(self, item: LogItem) -> None:
+        self.discarded[item.category] = \
+            self.discarded.get(item.category, 0) + 1
+
+    def append(self, item: LogItem) -> None:
+        """
+        Add an item to the history, replacing the oldest item if the history
+        is full
+
+        ### Args:
+        * `item` (`LogItem`): item to add
+        """
+        old = self.__items[self.__head]
+        if old is not None:
+            self.__discard(old)
+        else:
+            self.__length += 1
+        self.__items[self.__head] = item
+        self.__head = (self.__head + 1) % self.__capacity
+        self.__total += 1
+        self.logged[item.category] = self.logged.get(item.category, 0) + 1
+
+    def get(self, index: int) -> Optional[LogItem]:
+        """
+        Returns the item with the given log index
+
+        ### Args:
+        * `index` (`int`): index of the item, as shown when it is printed.
+          Negative indexes count back from the most recent item.
+
+        ### Returns:
+        * `LogItem`: the item, or
+        * `None`: the item has been removed from the history, or hasn't been
+          logged yet
+        """
+        if index < 0:
+            index += self.__total
+        # Number of items back from the most recent item
+        back = self.__total - 1 - index
+        if back < 0 or back >= self.__length:
+            return None
+        return self.__items[(self.__head - 1 - back) % self.__capacity]
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __iter__(self) -> Iterator[LogItem]:
+        start = self.__head - self.__length
+        for i in range(start, self.__head):
+            item = self.__items[i % self.__capacity]
+            assert item is not None
+            yield item
+
+    def __reversed__(self) -> Iterator[LogItem]:
+        for i in range(self.__head - 1, self.__head - 1 - self.__length, -1):
+            item = self.__items[i % self.__capacity]
+            assert item is not None
+            yield item
@@ -0,0 +1,206 @@
+"""
+common > logger > log_query
+
+A command-line tool used to query the binary log files written when the
+`logger.binary_log` setting is enabled. It runs outside of FL Studio, so that
+a session's log can be analysed without slowing down the script.
+
+```sh
+$ python src/common/logger/log_query.py src/ucs_config/log.ucslog \
+    --category device.event --verbosity EVENT --start 10 --end 20
+```
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import argparse
+import sys
+from typing import Iterable, Iterator, Optional
+
+try:
+    from .log_sink import LogRecord, isInCategory, readLog
+    from . import verbosity as v
+except ImportError:
+    # Running as a standalone script, outside of the package
+    from log_sink import LogRecord, isInCategory, readLog  # type: ignore
+    import verbosity as v  # type: ignore
+
+VERBOSITY_NAMES: dict[str, int] = {
+    name: getattr(v, name)
+    for name in v.__all__
+    if name != 'Verbosity'
+}
+
+
+def parseVerbosity(value: str) -> int:
+    """
+    Parse a verbosity given on the command line, either by name (eg `EVENT`)
+    or as a number
+
+    ### Args:
+    * `value` (`str`): value to parse
+
+    ### Raises:
+    * `argparse.ArgumentTypeError`: unknown verbosity
+
+    ### Returns:
+    * `int`: verbosity
+    """
+    try:
+        return VERBOSITY_NAMES[value.upper()]
+    except KeyError:
+        pass
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Unknown verbosity '{value}'. Expected a number or one of "
+            f"{', '.join(VERBOSITY_NAMES)}"
+        ) from None
+
+
+def filterRecords(
+    records: Iterable[LogRecord],
+    category: Optional[str] = None,
+    verbosity: Optional[int] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    session: Optional[int] = None,
+) -> Iterator[LogRecord]:
+    """
+    Filter log records
+
+    ### Args:
+    * `records` (`Iterable[LogRecord]`): records to filter
+    * `category` (`Optional[str]`, optional): only include records in this
+      category or its sub-categories. Defaults to `None`.
+    * `verbosity` (`Optional[int]`, optional): only include records at this
+      verbosity or lower. Defaults to `None`.
+    * `start` (`Optional[float]`, optional): only include records logged at
+      least this many seconds after the start of their session. Defaults to
+      `None`.
+    * `end` (`Optional[float]`, optional): only include records logged at
+      most this many seconds after the start of their session. Defaults to
+      `None`.
+    * `session` (`Optional[int]`, optional): only include records from this
+      session. Defaults to `None`.
+
+    ### Yields:
+    * `LogRecord`: matching records
+    """
+    for r in records:
+        if session is not None and r.session != session:
+            continue
+        if verbosity is not None and r.verbosity > verbosity:
+            continue
+        if start is not None and r.time < start:
+            continue
+        if end is not None and r.time > end:
+            continue
+        if not isInCategory(r.category, category):
+            continue
+        yield r
+
+
+def formatRecord(record: LogRecord, details: bool = False) -> str:
+    """
+    Format a log record for printing
+
+    ### Args:
+    * `record` (`LogRecord`): record to format
+    * `details` (`bool`, optional): whether to include the detailed message.
+      Defaults to `False`.
+
+    ### Returns:
+    * `str`: formatted record
+    """
+    line = (
+        f"[{record.session}] {record.time:12.6f} | {record.category} "
+        f"({record.verbosity}) : {record.message}"
+    )
+    if details and record.details:
+        line += '\n    ' + record.details.replace('\n', '\n    ')
+    return line
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Run the query tool
+
+    ### Args:
+    * `argv` (`Optional[list[str]]`, optional): command-line arguments.
+      Defaults to `None`, meaning `sys.argv[1:]`.
+
+    ### Returns:
+    * `int`: exit code
+    """
+    parser = argparse.ArgumentParser(
+        description="Query a binary log written by the Universal Controller "
+                    "Script",
+    )
+    parser.add_argument('path', help="path of the log file")
+    parser.add_argument(
+        '-c', '--category',
+        help="only show items in this category or its sub-categories",
+    )
+    parser.add_argument(
+        '-v', '--verbosity',
+        type=parseVerbosity,
+        help="only show items at this verbosity or lower (eg EVENT or 15)",
+    )
+    parser.add_argument(
+        '-s', '--start', type=float,
+        help="only show items logged at least this many seconds after the "
+             "start of their session",
+    )
+    parser.add_argument(
+        '-e', '--end', type=float,
+        help="only show items logged at most this many seconds after the "
+             "start of their session",
+    )
+    parser.add_argument(
+        '--session', type=int,
+        help="only show items from this session, where 0 is the first "
+             "session in the file",
+    )
+    parser.add_argument(
+        '-d', '--details', action='store_true',
+        help="show the detailed message of each item",
+    )
+    parser.add_argument(
+        '--count', action='store_true',
+        help="show the number of matching items in each category, rather "
+             "than the items themselves",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        records = filterRecords(
+            readLog(args.path),
+            args.category,
+            args.verbosity,
+            args.start,
+            args.end,
+            args.session,
+        )
+        if args.count:
+            counts: dict[str, int] = {}
+            for r in records:
+                counts[r.category] = counts.get(r.category, 0) + 1
+            for category, num in sorted(counts.items()):
+                print(f"{category:40} {num:8}")
+        else:
+            for r in records:
+                print(formatRecord(r, args.details))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+common > logger > log_sink
+
+Contains LogSink, which writes log items to an append-only binary file, so
+that the log of a whole session can be analysed after the script has been
+reloaded or FL Studio has been closed, as well as functions to read the file
+back.
+
+This module only uses the standard library, so that the log can be read by
+the `log_query` tool outside of FL Studio.
+
+The file starts with a header (`MAGIC`), followed by a sequence of records,
+each starting with a byte giving its type:
+
+* `RECORD_SESSION`: the script started logging. Contains the monotonic time
+  in nanoseconds and the wall-clock time in seconds at the start of the
+  session. Category IDs are reset at the start of each session.
+* `RECORD_CATEGORY`: defines the ID of a category. Contains the ID and the
+  category name.
+* `RECORD_ITEM`: a logged item. Contains the monotonic time in nanoseconds,
+  the category ID, the verbosity, the message and the detailed message.
+
+All integers are little-endian, and strings are UTF-8 encoded and prefixed
+with their length.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import struct
+import time
+from typing import Iterator, NamedTuple, Optional
+
+MAGIC = b'UCSLOG\x01'
+
+RECORD_SESSION = 0x01
+RECORD_CATEGORY = 0x02
+RECORD_ITEM = 0x03
+
+# Type, monotonic time, wall-clock time
+_SESSION = struct.Struct('<BQd')
+# Type, category ID, name length
+_CATEGORY = struct.Struct('<BHH')
+# Type, monotonic time, category ID, verbosity, message length, details
+# length
+_ITEM = struct.Struct('<BQHBHI')
+
+# Size at which the buffer is written to the file, even if it isn't flushed
+MAX_BUFFER_SIZE = 1 << 16
+
+
+class LogRecord(NamedTuple):
+    """
+    A log item read from a binary log file
+    """
+
+    session: int
+    """Index of the session the item was logged in, starting from 0"""
+
+    time: float
+    """Time since the start of the session, in seconds"""
+
+    wall_time: float
+    """Wall-clock time when the item was logged, in seconds since the epoch"""
+
+    category: str
+    """Category of the item"""
+
+    verbosity: int
+    """Verbosity of the item"""
+
+    message: str
+    """Message of the item"""
+
+    details: str
+    """Detailed message of the item"""
+
+
+class LogSink:
+    """
+    Writes log items to an append-only binary file.
+
+    Records are buffered in memory, and only written to the file when the
+    sink is flushed (which the script does while it is idle), or when the
+    buffer grows too large.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Create a log sink, starting a new session in the file
+
+        ### Args:
+        * `path` (`str`): path of the log file. It is created if it doesn't
+          exist, and appended to otherwise.
+        """
+        self._path = path
+        self._buffer = bytearray()
+        self._categories: dict[str, int] = {}
+        self._failed = False
+        self._buffer += _SESSION.pack(
+            RECORD_SESSION,
+            time.monotonic_ns(),
+            time.time(),
+        )
+
+    def write(
+        self,
+        category: str,
+        verbosity: int,
+        message: str,
+        details: str = '',
+    ) -> None:
+        """
+        Add a log item to the buffer
+
+        ### Args:
+        * `category` (`str`): category of the item
+        * `verbosity` (`int`): verbosity of the item
+        * `message` (`str`): message of the item
+        * `details` (`str`, optional): detailed message. Defaults to `''`.
+        """
+        if self._failed:
+            return
+        category_id = self._categories.get(category)
+        if category_id is None:
+            category_id = len(self._categories)
+            self._categories[category] = category_id
+            name = category.encode()
+            self._buffer += _CATEGORY.pack(
+                RECORD_CATEGORY, category_id, len(name))
+            self._buffer += name
+        msg = message.encode()[:0xFFFF]
+        det = details.encode()
+        self._buffer += _ITEM.pack(
+            RECORD_ITEM,
+            time.monotonic_ns(),
+            category_id,
+            verbosity,
+            len(msg),
+            len(det),
+        )
+        self._buffer += msg
+        self._buffer += det
+        if len(self._buffer) >= MAX_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered records to the file. If the file can't be written,
+        the sink stops recording, since the script can still run without it.
+        """
+        if not self._buffer or self._failed:
+            return
+        try:
+            with open(self._path, 'ab') as f:
+                if f.tell() == 0:
+                    f.write(MAGIC)
+                f.write(self._buffer)
+        except OSError:
+            self._failed = True
+        self._buffer.clear()
+
+
+def readLog(path: str) -> Iterator[LogRecord]:
+    """
+    Read the log items in a binary log file, in the order they were logged.
+
+    Reading stops at the first incomplete record, which can happen if the
+    script was closed while writing to the file.
+
+    ### Args:
+    * `path` (`str`): path of the log file
+
+    ### Raises:
+    * `ValueError`: the file isn't a binary log file
+
+    ### Yields:
+    * `LogRecord`: log items
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"'{path}' is not a binary log file")
+    pos = len(MAGIC)
+    session = -1
+    start = 0
+    wall_start = 0.0
+    categories: dict[int, str] = {}
+    while pos < len(data):
+        kind = data[pos]
+        if kind == RECORD_SESSION:
+            if pos + _SESSION.size > len(data):
+                return
+            _, start, wall_start = _SESSION.unpack_from(data, pos)
+            pos += _SESSION.size
+            session += 1
+            categories = {}
+        elif kind == RECORD_CATEGORY:
+            if pos + _CATEGORY.size > len(data):
+                return
+            _, category_id, length = _CATEGORY.unpack_from(data, pos)
+            pos += _CATEGORY.size
+            if pos + length > len(data):
+                return
+            categories[category_id] = data[pos:pos + length].decode()
+            pos += length
+        elif kind == RECORD_ITEM:
+            if pos + _ITEM.size > len(data):
+                return
+            _, t, category_id, verbosity, msg_len, det_len \
+                = _ITEM.unpack_from(data, pos)
+            pos += _ITEM.size
+            if pos + msg_len + det_len > len(data):
+                return
+            message = data[pos:pos + msg_len].decode(errors='replace')
+            pos += msg_len
+            details = data[pos:pos + det_len].decode(errors='replace')
+            pos += det_len
+            elapsed = (t - start) / 1e9
+            yield LogRecord(
+                session,
+                elapsed,
+                wall_start + elapsed,
+                categories.get(category_id, f"<unknown {category_id}>"),
+                verbosity,
+                message,
+                details,
+            )
+        else:
+            raise ValueError(
+                f"Unknown record type {kind:#x} at offset {pos} of '{path}'"
+            )
+
+
+def isInCategory(category: str, parent: Optional[str]) -> bool:
+    """
+    Returns whether a category is the given parent category, or one of its
+    sub-categories
+
+    ### Args:
+    * `category` (`str`): category to check
+    * `parent` (`Optional[str]`): parent category, or `None` to match all
+      categories
+
+    ### Returns:
+    * `bool`: whether it matches
+    """
+    if parent is None or parent == '' or category == parent:
+        return True
+    return category.startswith(parent + '.')
@@ -12,11 +12,81 @@ more details.
 """
 
 __all__ = [
-    'log'
+    'log',
+    'LogMessage',
 ]
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
 from .log_item import LogItem
-from .verbosity import Verbosity, DEFAULT, ERROR, NOTE
+from .log_history import LogHistory, DEFAULT_CAPACITY
+from .log_hierarchy import getCategories
+from .log_sink import LogSink
+from .verbosity import Verbosity, DEFAULT, ERROR, EVENT, NOTE, INFO
+
+if TYPE_CHECKING:
+    from common.settings import Settings
+
+LogMessage = Union[str, Callable[[], str]]
+"""
+A message to log. This can be a callable that returns the message, so that it
+is only formatted if it will be kept.
+"""
+
+
+# Logger settings, and the values used if the context isn't loaded
+_DEFAULT_SETTINGS: dict[str, Any] = {
+    "logger.critical_verbosity": ERROR,
+    "logger.max_verbosity": DEFAULT,
+    "logger.watched_categories": [],
+    "logger.max_watched_verbosity": INFO,
+    "logger.discard_verbosity": NOTE,
+    "logger.max_history": DEFAULT_CAPACITY,
+    "logger.binary_log": False,
+    "logger.binary_log_verbosity": EVENT,
+}
+
+# Name of the binary log file, within the `ucs_config` directory
+BINARY_LOG_NAME = 'log.ucslog'
+
+
+def _isWatched(category: str, watched: frozenset[str]) -> bool:
+    """
+    Returns whether a category is watched, meaning that it or one of its
+    parent categories is in the set of watched categories
+
+    ### Args:
+    * `category` (`str`): category to check
+    * `watched` (`frozenset[str]`): watched categories
+
+    ### Returns:
+    * `bool`: whether it is watched
+    """
+    if category in watched or '' in watched:
+        return True
+    i = category.find('.')
+    while i != -1:
+        if category[:i] in watched:
+            return True
+        i = category.find('.', i + 1)
+    return False
+
+
+def _formatMessage(msg: LogMessage, args: tuple[Any, ...] = ()) -> str:
+    """
+    Returns the string for a message to log
+
+    ### Args:
+    * `msg` (`LogMessage`): message, or function returning the message
+    * `args` (`tuple[Any, ...]`, optional): arguments to substitute into the
+      message using `str.format`. Defaults to `()`.
+
+    ### Returns:
+    * `str`: formatted message
+    """
+    if callable(msg):
+        return msg()
+    if args:
+        return msg.format(*args)
+    return msg
 
 
 class Log:
@@ -34,142 +104,220 @@ class Log:
             " * length(): returns the length of the log",
             " * recall(): recall log entries",
             " * inspect(index): print detailed info about a log entry",
+            " * counts(): print the number of entries in each category",
+            " * watch(category): print entries from a category",
+            " * unwatch(category): stop watching a category",
         ]))
         return ""
 
     def __init__(self) -> None:
-        self._history: list[LogItem] = []
+        self._history = LogHistory()
+        # Settings that the cached values below were loaded from
+        self._settings: Optional['Settings'] = None
+        self._config: dict[str, Any] = dict(_DEFAULT_SETTINGS)
+        # Compiled greatest verbosity that is kept, that is printed, and that
+        # is written to the binary log, for each category
+        self._thresholds: dict[
+            str, tuple[Verbosity, Verbosity, Verbosity]] = {}
+        self._watched: frozenset[str] = frozenset()
+        self._sink: Optional[LogSink] = None
+        self._compile()
+
+    def _loadSettings(self) -> None:
+        """
+        Make sure the logger settings are loaded from the settings of the
+        current context. Listeners are registered so that the compiled
+        category table is rebuilt when the settings change.
+        """
+        import common
+        try:
+            settings: Optional['Settings'] = common.getContext().settings
+        except common.context_manager.MissingContextException:
+            settings = None
+        if settings is self._settings:
+            return
+        self._settings = settings
+        if settings is None:
+            self._config = dict(_DEFAULT_SETTINGS)
+            self._history.setCapacity(DEFAULT_CAPACITY)
+            self._setSinkEnabled(False)
+            self._compile()
+            return
+        for key in _DEFAULT_SETTINGS:
+            settings.addListener(key, self._listener(settings, key))
 
-    @staticmethod
-    def _shouldPrint(
-        item: LogItem,
-        category: Optional[str] = None,
-        verbosity: Optional[Verbosity] = None
-    ) -> bool:
-        """Returns whether the logger should print an item
-
-        * By default (no category or verbosity specified), it checks whether
-          the item's categories are in the watched categories. If so, it will
-          print out if the verbosity is less than the given verbosity, or the
-          `logger.max_watched_verbosity` setting if that isn't provided.
-          Otherwise it will print out if the verbosity is less than the given
-          verbosity, or the `logger.max_verbosity` setting if that isn't
-          provided.
-        * If a category is specified, it will print if the item is in that
-          category and the verbosity is less than the given verbosity, or the
-          `logger.max_watched_verbosity` setting if that isn't provided.
+    def _listener(
+        self,
+        settings: 'Settings',
+        key: str,
+    ) -> Callable[[Any], None]:
+        """
+        Returns a function to call when one of the logger's settings changes
+        """
+        return lambda value: self._settingChanged(settings, key, value)
 
-        Args:
-        * `item` (`LogItem`): item to check
-        * `category` (`str`, optional): category  to filter by. Defaults to
-          `None`.
-        * `verbosity` (`Verbosity`, optional): greatest verbosity to print.
-          Defaults to `None`.
+    def _settingChanged(
+        self,
+        settings: Optional['Settings'],
+        key: str,
+        value: Any,
+    ) -> None:
+        """
+        Called when one of the logger's settings is changed
+        """
+        # Ignore changes to the settings of previous contexts
+        if settings is not self._settings:
+            return
+        self._config[key] = value
+        if key == "logger.max_history":
+            self._history.setCapacity(value)
+            return
+        if key == "logger.binary_log":
+            self._setSinkEnabled(value)
+        self._compile()
 
-        Returns:
-        * `bool`: whether it was printed
+    def _setSinkEnabled(self, enabled: bool) -> None:
         """
-        # If a category was provided, ignore all events not from it
-        if category is not None and not item.category.startswith(category):
-            return False
+        Start or stop writing log items to the binary log file
+        """
+        if enabled and self._sink is None:
+            from common.settings import scripts_dir
+            self._sink = LogSink(f"{scripts_dir}/{BINARY_LOG_NAME}")
+        elif not enabled and self._sink is not None:
+            self._sink.flush()
+            self._sink = None
+
+    def flush(self) -> None:
+        """
+        Write any buffered log items to the binary log file, if the
+        `logger.binary_log` setting is enabled. This is called while the
+        script is idle.
+        """
+        if self._sink is not None:
+            self._sink.flush()
 
-        # Make sure we log things, even if the context isn't loaded
-        # They will still (hopefully) be recallable later
-        import common
-        try:
-            context = common.getContext()
-        except common.context_manager.MissingContextException:
-            verbosity = DEFAULT
+    def _compile(self) -> None:
+        """
+        Rebuild the table of verbosity thresholds for each category in the
+        log hierarchy. Other categories are added to the table when they are
+        first used.
+        """
+        self._thresholds.clear()
+        self._watched = frozenset(
+            self._config["logger.watched_categories"])
+        for category in getCategories():
+            self._getThresholds(category)
+
+    def _getThresholds(
+        self,
+        category: str,
+    ) -> tuple[Verbosity, Verbosity, Verbosity]:
+        """
+        Returns the greatest verbosity at which messages in a category are
+        kept, the greatest verbosity at which they are printed, and the
+        greatest verbosity at which they are written to the binary log,
+        adding them to the compiled table so that later messages only need a
+        dictionary lookup.
+
+        ### Args:
+        * `category` (`str`): category
+
+        ### Returns:
+        * `tuple[Verbosity, Verbosity, Verbosity]`: greatest verbosity to
+          keep, greatest verbosity to print, and greatest verbosity to
+          record
+        """
+        if _isWatched(category, self._watched):
+            show = self._config["logger.max_watched_verbosity"]
         else:
-            if verbosity is None:
-                # TODO: Potentially buggy if a `.` isn't the next char in the
-                # watched category
-                if any(item.category.startswith(c)
-                       for c in context.settings.get(
-                           "logger.watched_categories"
-                )):
-                    verbosity = context.settings.get(
-                        "logger.max_watched_verbosity")
-                else:
-                    verbosity = context.settings.get("logger.max_verbosity")
-
-        assert verbosity is not None
-        if item.verbosity <= verbosity:
-            return True
+            show = self._config["logger.max_verbosity"]
+        # Critical messages are always printed, but only if they are kept
+        show = max(show, self._config["logger.critical_verbosity"])
+        keep = self._config["logger.discard_verbosity"]
+        # The binary log has its own threshold, so that it can record
+        # messages that are too verbose to keep in the history
+        if self._config["logger.binary_log"]:
+            record = self._config["logger.binary_log_verbosity"]
         else:
-            return False
+            record = Verbosity(0)
+        thresholds = (keep, show, record)
+        self._thresholds[category] = thresholds
+        return thresholds
 
-    @staticmethod
-    def _shouldDetailedPrint(item: LogItem) -> bool:
+    def isKept(self, category: str, verbosity: Verbosity) -> bool:
         """
-        Returns whether the logger should do a detailed printout of the item.
-
-        Reserved for errors that the user should be notified of.
+        Returns whether a message in the given category and verbosity would
+        be kept by the log, or written to the binary log. This can be used to
+        skip expensive work that is only needed for logging.
 
         ### Args:
-        * `item` (`LogItem`): item to check
+        * `category` (`str`): category to log under
+        * `verbosity` (`Verbosity`): verbosity to log under
 
         ### Returns:
-        * `bool`: whether we should detailed print it
+        * `bool`: whether the message would be kept
         """
-        # Make sure we log things, even if the context isn't loaded
-        # They will still (hopefully) be recallable later
-        import common
-        try:
-            verbosity: Verbosity = common.getContext().settings.get(
-                "logger.critical_verbosity"
-            )
-        except common.context_manager.MissingContextException:
-            verbosity = ERROR
-        return item.verbosity <= verbosity
+        self._loadSettings()
+        thresholds = self._thresholds.get(category)
+        if thresholds is None:
+            thresholds = self._getThresholds(category)
+        return verbosity <= thresholds[0] or verbosity <= thresholds[2]
 
     @staticmethod
-    def _conditionalPrint(
+    def _shouldPrint(
         item: LogItem,
-        category: Optional[str] = None,
-        verbosity: Optional[Verbosity] = None
+        category: Optional[str],
+        verbosity: Verbosity,
     ) -> bool:
+        """Returns whether the logger should print an item when recalling
+        the log
+
+        It will print if the item is in the given category (or any category
+        if it is `None`), and its verbosity is less than or equal to the given
+        verbosity.
+
+        Args:
+        * `item` (`LogItem`): item to check
+        * `category` (`str`, optional): category to filter by.
+        * `verbosity` (`Verbosity`): greatest verbosity to print.
+
+        Returns:
+        * `bool`: whether it should be printed
+        """
+        # If a category was provided, ignore all events not from it
+        if category is not None and not item.category.startswith(category):
+            return False
+        return item.verbosity <= verbosity
+
+    def _conditionalPrint(self, item: LogItem, show: Verbosity) -> bool:
         """If the logger should print this particular item, prints it. It does
-        a detailed print if required.
-
-        * By default (no category or verbosity specified), it checks whether
-          the item's categories are in the watched categories. If so, it will
-          print out if the verbosity is less than the given verbosity, or the
-          `logger.max_watched_verbosity` setting if that isn't provided.
-          Otherwise it will print out if the verbosity is less than the given
-          verbosity, or the `logger.max_verbosity` setting if that isn't
-          provided.
-        * If a category is specified, it will print if the item is in that
-          category and the verbosity is less than the given verbosity, or the
-          `logger.max_watched_verbosity` setting if that isn't provided.
+        a detailed print if its verbosity is at or below the
+        `logger.critical_verbosity` setting.
 
         Args:
         * `item` (`LogItem`): item to check
-        * `category` (`str`, optional): category  to filter by. Defaults to
-          `None`.
-        * `verbosity` (`Verbosity`, optional): greatest verbosity to print.
-          Defaults to `None`.
+        * `show` (`Verbosity`): greatest verbosity to print for the item's
+          category
 
         Returns:
         * `bool`: whether it was printed
         """
-        if Log._shouldDetailedPrint(item):
+        if item.verbosity > show:
+            return False
+        if item.verbosity <= self._config["logger.critical_verbosity"]:
             item.printDetails()
-            print()
-            return True
-        elif Log._shouldPrint(item, category, verbosity):
-            print(item)
-            print()
-            return True
         else:
-            return False
+            print(item)
+        print()
+        return True
 
     def __len__(self) -> int:
         return len(self._history)
 
     def length(self) -> int:
         """
-        Returns the length of the log
+        Returns the number of entries stored in the log. Older entries are
+        discarded once the `logger.max_history` limit is reached.
 
         ### Returns:
         * `int`: log length
@@ -227,6 +375,12 @@ class Log:
         for item in prints:
             print(item)
         print(f"({num_skips} item{'s' if num_skips != 1 else ''} skipped)")
+        num_discarded = self._history.total - len(self._history)
+        if num_discarded and num_prints != number:
+            print(
+                f"({num_discarded} older item"
+                f"{'s' if num_discarded != 1 else ''} no longer in history)"
+            )
         print("End recall")
         print("----------------------------------------")
         return NoneNoPrintout
@@ -241,45 +395,139 @@ class Log:
         * `itemNumber` (`int`): entry number
         """
         from common.util.misc import NoneNoPrintout
-        self._history[itemNumber].printDetails()
+        item = self._history.get(itemNumber)
+        if item is None:
+            print(f"Log item #{itemNumber} is not in the history")
+        else:
+            item.printDetails()
+
+        return NoneNoPrintout
+
+    def counts(self):
+        """
+        Print the number of entries logged in each category, including
+        entries that have been discarded from the history.
+
+        This is a helper function for debugging.
+        """
+        from common.util.misc import NoneNoPrintout
+        print("----------------------------------------")
+        print(f"{'Category':40} {'Logged':>8} {'Discarded':>10}")
+        for category, num in sorted(self._history.logged.items()):
+            discarded = self._history.discarded.get(category, 0)
+            print(f"{category:40} {num:8} {discarded:10}")
+        print("----------------------------------------")
+        return NoneNoPrintout
+
+    def watch(self, category: str):
+        """
+        Watch a category, so that messages logged in it and its
+        sub-categories are printed up to the `logger.max_watched_verbosity`
+        setting.
+
+        This is a helper function for debugging.
 
+        ### Args:
+        * `category` (`str`): category to watch, such as `"device.event"`
+        """
+        import common
+        from common.util.misc import NoneNoPrintout
+        settings = common.getContext().settings
+        watched: list[str] = settings.get("logger.watched_categories")
+        if category not in watched:
+            settings.set("logger.watched_categories", watched + [category])
+        return NoneNoPrintout
+
+    def unwatch(self, category: str):
+        """
+        Stop watching a category
+
+        This is a helper function for debugging.
+
+        ### Args:
+        * `category` (`str`): category to stop watching
+        """
+        import common
+        from common.util.misc import NoneNoPrintout
+        settings = common.getContext().settings
+        watched: list[str] = settings.get("logger.watched_categories")
+        if category in watched:
+            settings.set(
+                "logger.watched_categories",
+                [c for c in watched if c != category],
+            )
         return NoneNoPrintout
 
     def __call__(
         self,
         category: str,
-        msg: str,
+        msg: LogMessage,
         verbosity: Verbosity = DEFAULT,
-        detailed_msg: str = ''
+        detailed_msg: LogMessage = '',
+        args: tuple[Any, ...] = (),
     ) -> None:
         """
         Add a message to the log
 
         The message is stored in the log history, as well as being printed if
         it falls under one of the printable categories, or is at a verbosity
-        level high enough to demand attention
+        level high enough to demand attention. If the binary log is enabled,
+        it is also written there if its verbosity is at or below the
+        `logger.binary_log_verbosity` setting, even if it is discarded from
+        the history.
+
+        Messages are only formatted if they will be kept or recorded, so on
+        hot paths, pass a format template with `args`, or a function that
+        returns the message, rather than formatting it beforehand.
+
+        ```py
+        log(
+            "device.event.in",
+            "Recognized event: {}",
+            verbosity.EVENT,
+            args=(control,),
+        )
+        ```
 
         ### Args:
         * `category` (`str`): category to log under
-        * `msg` (`str`): message to log
+        * `msg` (`LogMessage`): message to log, or function returning the
+          message
         * `verbosity` (`Verbosity`, optional): verbosity to log under. Defaults
           to `DEFAULT`.
+        * `detailed_msg` (`LogMessage`, optional): detailed message, or
+          function returning it. Defaults to `''`.
+        * `args` (`tuple[Any, ...]`, optional): arguments to substitute into
+          `msg` using `str.format`. Defaults to `()`.
         """
-        import common
-        try:
-            discarded = common.getContext().settings.get(
-                "logger.discard_verbosity"
-            )
-        except common.context_manager.MissingContextException:
-            discarded = NOTE
-        if verbosity > discarded:
+        self._loadSettings()
+        thresholds = self._thresholds.get(category)
+        if thresholds is None:
+            thresholds = self._getThresholds(category)
+        keep, show, record = thresholds
+        if verbosity > keep:
+            if verbosity <= record and self._sink is not None:
+                # Only written to the binary log
+                self._sink.write(
+                    category,
+                    verbosity,
+                    _formatMessage(msg, args),
+                    _formatMessage(detailed_msg),
+                )
             return
         # TODO: Maybe get traceback
-        item = LogItem(category, msg, detailed_msg,
-                       verbosity, len(self._history))
+        item = LogItem(
+            category,
+            _formatMessage(msg, args),
+            _formatMessage(detailed_msg),
+            verbosity,
+            self._history.total,
+        )
         self._history.append(item)
+        if verbosity <= record and self._sink is not None:
+            self._sink.write(category, verbosity, item.message, item.details)
         # Print if required
-        self._conditionalPrint(item)
+        self._conditionalPrint(item, show)
 
 
 log = Log()
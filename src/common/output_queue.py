@@ -0,0 +1,308 @@
+"""
+common > output_queue
+
+Contains the OutputQueue class, which collects the MIDI events sent to a
+device during a tick, so that each destination (such as an LED) is only
+written once per tick.
+
+The queue can also limit the rate at which data is sent to each port, since
+some devices drop or delay messages if too many are sent at once. Events that
+don't fit within the limit wait until the next time the queue is flushed, with
+feedback for the user (such as changes to a control that was just pressed)
+being sent before background refreshes (such as a plugin repainting the whole
+device).
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from contextlib import contextmanager
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Hashable, Iterator, Optional
+import common
+import device
+from fl_classes import FlMidiMsg, isMidiMsgStandard, isMidiMsgSysex
+from .settings import SettingHandle
+from .util.events import forwardEvent
+
+# Length of the burst of data that can be sent at once when a port hasn't
+# been used recently, in seconds
+BURST_TIME = 0.1
+
+# Time after a control is pressed or tweaked during which changes to it are
+# treated as feedback for the user, in seconds
+FEEDBACK_TIME = 0.5
+
+# Whether events being queued are background refreshes, rather than feedback
+# for the user
+_background = False
+
+
+@contextmanager
+def backgroundOutput(background: bool = True) -> Iterator[None]:
+    """
+    Context manager within which queued events are treated as background
+    refreshes, meaning that they are sent after other events if the output
+    rate is limited.
+
+    ```py
+    with backgroundOutput():
+        manager.onColorChange(color)
+    ```
+
+    ### Args:
+    * `background` (`bool`, optional): whether events are background
+      refreshes. If `False`, events are treated as feedback. Defaults to
+      `True`.
+    """
+    global _background
+    prev = _background
+    _background = background
+    try:
+        yield
+    finally:
+        _background = prev
+
+
+def _send(event: FlMidiMsg, device_num: int) -> None:
+    """
+    Send an event to the given device number
+    """
+    if device_num != 1:
+        forwardEvent(event, device_num)
+    elif isMidiMsgSysex(event):
+        device.midiOutSysex(bytes(event.sysex))
+    else:
+        if TYPE_CHECKING:
+            assert isMidiMsgStandard(event)
+        device.midiOutMsg(
+            event.status + (event.data1 << 8) + (event.data2 << 16)
+        )
+
+
+def _eventSize(event: FlMidiMsg) -> int:
+    """
+    Returns the number of bytes used to send an event
+    """
+    if isMidiMsgSysex(event):
+        return len(event.sysex)
+    return 3
+
+
+class TokenBucket:
+    """
+    Token bucket used to limit the rate at which data is sent to a port.
+
+    Tokens (bytes) are added at a constant rate, up to a maximum burst size,
+    and are removed when data is sent.
+    """
+
+    def __init__(self, clock: Callable[[], float]) -> None:
+        """
+        Create a token bucket, which starts out full
+
+        ### Args:
+        * `clock` (`Callable[[], float]`): function returning the current
+          time in seconds
+        """
+        self._clock = clock
+        self._tokens: Optional[float] = None
+        self._last = clock()
+
+    def refill(self, rate: float) -> None:
+        """
+        Add the tokens accumulated since the bucket was last refilled
+
+        ### Args:
+        * `rate` (`float`): rate at which tokens are added, in bytes per
+          second
+        """
+        now = self._clock()
+        capacity = rate * BURST_TIME
+        if self._tokens is None:
+            self._tokens = capacity
+        else:
+            self._tokens = min(
+                capacity,
+                self._tokens + (now - self._last) * rate,
+            )
+        self._last = now
+
+    def take(self, size: int, rate: float) -> bool:
+        """
+        Remove tokens for the given amount of data, if there are enough
+        available. Data larger than the burst size can be sent when the
+        bucket is full, so that it isn't blocked forever.
+
+        ### Args:
+        * `size` (`int`): number of bytes to send
+        * `rate` (`float`): rate at which tokens are added, in bytes per
+          second
+
+        ### Returns:
+        * `bool`: whether the data can be sent
+        """
+        assert self._tokens is not None
+        if self._tokens < size and self._tokens < rate * BURST_TIME:
+            return False
+        self._tokens -= size
+        return True
+
+
+class OutputQueue:
+    """
+    Queue of MIDI events waiting to be sent to a device.
+
+    Events are keyed by their destination, which is the device number and
+    the status and data1 bytes of standard events, or the address of sysex
+    events. If multiple events are queued for the same destination before the
+    queue is flushed, only the last one is sent. Events are sent in the order
+    that their destinations were first written to, with feedback sent before
+    background refreshes.
+    """
+
+    def __init__(
+        self,
+        rate_limit: Optional[SettingHandle] = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Create an output queue
+
+        ### Args:
+        * `rate_limit` (`Optional[SettingHandle]`, optional): handle to the
+          maximum number of bytes per second to send to each port, where `0`
+          means no limit. Defaults to `None`, meaning no limit.
+        * `clock` (`Callable[[], float]`, optional): function returning the
+          current time in seconds. Defaults to `time.monotonic`.
+        """
+        # Mapping between destinations and the event to send to them, its
+        # device number, and whether it is a background refresh
+        self.__events: dict[Hashable, tuple[FlMidiMsg, int, bool]] = {}
+        self.__rate_limit = rate_limit
+        self.__clock = clock
+        self.__buckets: dict[int, TokenBucket] = {}
+        self.sent = 0
+        """Number of events that have been sent"""
+        self.suppressed = 0
+        """Number of events that were replaced by a later event for the same
+        destination before they could be sent"""
+        self.delayed = 0
+        """Number of times an event was held back until a later flush due to
+        the rate limit"""
+
+    def queue(
+        self,
+        event: FlMidiMsg,
+        device_num: int = 1,
+        address_length: Optional[int] = None,
+    ) -> None:
+        """
+        Add an event to the queue, replacing any event already queued for the
+        same destination.
+
+        Events queued within a `backgroundOutput()` block are sent after
+        other events if the output rate is limited.
+
+        ### Args:
+        * `event` (`FlMidiMsg`): event to send
+        * `device_num` (`int`, optional): device number to send the event
+          to. Events for other device numbers are forwarded. Defaults to `1`.
+        * `address_length` (`Optional[int]`, optional): for sysex events, the
+          number of bytes at the start of the message that identify its
+          destination. Defaults to `None`, meaning that only identical sysex
+          events are replaced.
+        """
+        key: Hashable
+        if isMidiMsgSysex(event):
+            key = (device_num, bytes(event.sysex[:address_length]))
+        else:
+            if TYPE_CHECKING:
+                assert isMidiMsgStandard(event)
+            key = (device_num, event.status, event.data1)
+        background = _background
+        prev = self.__events.get(key)
+        if prev is not None:
+            self.suppressed += 1
+            # Don't let a refresh delay feedback that is still waiting
+            background = background and prev[2]
+        self.__events[key] = (event, device_num, background)
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Send queued events. If the output rate is limited, events that don't
+        fit within the limit are kept until the next flush.
+
+        ### Args:
+        * `force` (`bool`, optional): whether to send all queued events,
+          ignoring the rate limit. This should be used for the last flush
+          before communication stops, such as when the script is
+          deinitialized. Defaults to `False`.
+        """
+        if not self.__events:
+            return
+        if force or self.__rate_limit is None:
+            rate = 0
+        else:
+            rate = self.__rate_limit.value
+        events = self.__events
+        self.__events = {}
+        if rate <= 0:
+            for event, device_num, _ in events.values():
+                _send(event, device_num)
+            self.sent += len(events)
+            return
+
+        for b in self.__buckets.values():
+            b.refill(rate)
+        # Ports that have run out of data for this flush, so that events to
+        # them stay in order
+        blocked: set[int] = set()
+        waiting: set[Hashable] = set()
+        ordered = [k for k, v in events.items() if not v[2]] \
+            + [k for k, v in events.items() if v[2]]
+        for key in ordered:
+            event, device_num, _ = events[key]
+            if device_num not in blocked:
+                bucket = self.__buckets.get(device_num)
+                if bucket is None:
+                    bucket = TokenBucket(self.__clock)
+                    bucket.refill(rate)
+                    self.__buckets[device_num] = bucket
+                if bucket.take(_eventSize(event), rate):
+                    _send(event, device_num)
+                    self.sent += 1
+                    continue
+                blocked.add(device_num)
+            waiting.add(key)
+
+        self.delayed += len(waiting)
+        # Keep waiting events in their original order
+        self.__events = {k: v for k, v in events.items() if k in waiting}
+
+    def __len__(self) -> int:
+        return len(self.__events)
+
+
+def queueOutput(
+    event: FlMidiMsg,
+    device_num: int = 1,
+    address_length: Optional[int] = None,
+) -> None:
+    """
+    Add an event to the output queue of the recognized device, so that it is
+    sent at the end of the current tick.
+
+    ### Args:
+    * `event` (`FlMidiMsg`): event to send
+    * `device_num` (`int`, optional): device number to send the event to.
+      Defaults to `1`.
+    * `address_length` (`Optional[int]`, optional): for sysex events, the
+      number of bytes at the start of the message that identify its
+      destination. Defaults to `None`.
+    """
+    common.getContext().getDevice().getOutputQueue().queue(
+        event, device_num, address_length)
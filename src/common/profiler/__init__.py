@@ -14,7 +14,18 @@ __all__ = [
     'ProfilerContext',
     'profilerDecoration',
     'ProfilerManager',
+    'ProfileName',
+    'isProfilingEnabled',
+    'enableProfiling',
+    'disableProfiling',
 ]
 
-from .profiler_context import ProfilerContext, profilerDecoration
+from .profiler_context import (
+    ProfilerContext,
+    profilerDecoration,
+    ProfileName,
+    isProfilingEnabled,
+    enableProfiling,
+    disableProfiling,
+)
 from .manager import ProfilerManager
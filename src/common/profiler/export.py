@@ -0,0 +1,152 @@
+"""
+common > profiler > export
+
+Contains functions for converting spans recorded by the profiler into formats
+that can be viewed in flamegraph viewers:
+
+* Chrome's trace event format, which can be opened in `chrome://tracing` or
+  [Perfetto](https://ui.perfetto.dev).
+* [Speedscope](https://www.speedscope.app)'s file format.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from typing import Any, Iterable, NamedTuple
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class Span(NamedTuple):
+    """
+    A profile that was recorded by the profiler
+    """
+
+    path: str
+    """Full name of the profile, eg `"tick.main.tick"`"""
+
+    start: int
+    """Time when the profile was opened, in nanoseconds"""
+
+    duration: int
+    """Time taken by the profile, in nanoseconds"""
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the profile, without the names of its parents
+        """
+        return self.path.rsplit('.', 1)[-1]
+
+    @property
+    def end(self) -> int:
+        """
+        Time when the profile was closed, in nanoseconds
+        """
+        return self.start + self.duration
+
+
+def _sortSpans(spans: Iterable[Span]) -> list[Span]:
+    """
+    Sort spans so that each span comes before the spans nested within it
+    """
+    return sorted(
+        spans,
+        key=lambda s: (s.start, -s.duration, s.path.count('.')),
+    )
+
+
+def _isParent(parent: Span, child: Span) -> bool:
+    """
+    Returns whether a span contains another span
+    """
+    return (
+        child.path.startswith(parent.path + '.')
+        and parent.start <= child.start
+        and child.end <= parent.end
+    )
+
+
+def toChromeTrace(spans: Iterable[Span]) -> dict[str, Any]:
+    """
+    Convert spans to Chrome's trace event format
+
+    ### Args:
+    * `spans` (`Iterable[Span]`): spans to convert
+
+    ### Returns:
+    * `dict[str, Any]`: trace, which can be saved as JSON
+    """
+    return {
+        "traceEvents": [
+            {
+                "name": s.name,
+                "cat": "ucs",
+                "ph": "X",
+                "ts": s.start / 1000,
+                "dur": s.duration / 1000,
+                "pid": 1,
+                "tid": 1,
+                "args": {"path": s.path},
+            }
+            for s in _sortSpans(spans)
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def toSpeedscope(spans: Iterable[Span], name: str) -> dict[str, Any]:
+    """
+    Convert spans to Speedscope's file format, as an evented profile
+
+    ### Args:
+    * `spans` (`Iterable[Span]`): spans to convert
+    * `name` (`str`): name of the profile
+
+    ### Returns:
+    * `dict[str, Any]`: profile, which can be saved as JSON
+    """
+    frames: list[dict[str, str]] = []
+    frame_ids: dict[str, int] = {}
+    events: list[dict[str, Any]] = []
+    # Spans that are currently open
+    stack: list[Span] = []
+
+    def close(s: Span) -> None:
+        events.append({"type": "C", "frame": frame_ids[s.name], "at": s.end})
+
+    sorted_spans = _sortSpans(spans)
+    for s in sorted_spans:
+        while stack and not _isParent(stack[-1], s):
+            close(stack.pop())
+        frame = frame_ids.get(s.name)
+        if frame is None:
+            frame = len(frames)
+            frame_ids[s.name] = frame
+            frames.append({"name": s.name})
+        events.append({"type": "O", "frame": frame, "at": s.start})
+        stack.append(s)
+    while stack:
+        close(stack.pop())
+
+    start = sorted_spans[0].start if sorted_spans else 0
+    end = max((s.end for s in sorted_spans), default=0)
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "Universal Controller Script",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "evented",
+                "name": name,
+                "unit": "nanoseconds",
+                "startValue": start,
+                "endValue": end,
+                "events": events,
+            }
+        ],
+    }
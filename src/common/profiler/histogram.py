@@ -0,0 +1,111 @@
+"""
+common > profiler > histogram
+
+Contains LatencyHistogram, which records the distribution of times taken by a
+profile, so that percentiles (such as tail latencies) can be calculated.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+# Number of bits of precision for each bucket. Each power of two is split into
+# 2 ** SUB_BUCKET_BITS linear buckets, so values are recorded to within about
+# 1 / 2 ** SUB_BUCKET_BITS of their value.
+SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Number of bits in the largest time that can be recorded precisely, in
+# nanoseconds (2 ** 40 ns is about 18 minutes). Larger values are recorded in
+# the last bucket.
+MAX_BITS = 40
+
+_NUM_BUCKETS = (MAX_BITS - SUB_BUCKET_BITS + 1) * _SUB_BUCKETS
+
+
+def _bucketIndex(value: int) -> int:
+    """
+    Returns the index of the bucket for a value
+    """
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return max(value, 0)
+    return min((shift << SUB_BUCKET_BITS) + (value >> shift), _NUM_BUCKETS - 1)
+
+
+def _bucketHigh(index: int) -> int:
+    """
+    Returns the largest value recorded in a bucket
+    """
+    shift = max((index >> SUB_BUCKET_BITS) - 1, 0)
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    A histogram of times, using a fixed number of buckets whose size grows
+    with the values they contain (similar to an HDR histogram), so that it
+    uses a bounded amount of memory while keeping the same relative
+    precision for short and long times.
+    """
+
+    def __init__(self) -> None:
+        self._buckets = [0] * _NUM_BUCKETS
+        self._count = 0
+        self._max = 0
+
+    def record(self, value: int) -> None:
+        """
+        Record a time
+
+        ### Args:
+        * `value` (`int`): time in nanoseconds
+        """
+        self._buckets[_bucketIndex(value)] += 1
+        self._count += 1
+        if value > self._max:
+            self._max = value
+
+    def __len__(self) -> int:
+        return self._count
+
+    def percentile(self, p: float) -> int:
+        """
+        Returns the time at or below which the given percentage of recorded
+        times fall. The result is the upper bound of the bucket containing the
+        percentile, so it may be slightly larger than the actual time.
+
+        ### Args:
+        * `p` (`float`): percentile, from `0` to `100`
+
+        ### Raises:
+        * `ValueError`: no times have been recorded
+
+        ### Returns:
+        * `int`: time in nanoseconds
+        """
+        if self._count == 0:
+            raise ValueError("No times recorded")
+        # Number of values at or below the percentile, rounding up so that
+        # the largest value is included in the 100th percentile
+        target = max(-(-self._count * p // 100), 1)
+        seen = 0
+        for i, n in enumerate(self._buckets):
+            seen += n
+            if seen >= target:
+                # The last bucket holds all values that are too large
+                if i == _NUM_BUCKETS - 1:
+                    return self._max
+                return min(_bucketHigh(i), self._max)
+        return self._max
+
+    def reset(self) -> None:
+        """
+        Remove all recorded times
+        """
+        self._buckets = [0] * _NUM_BUCKETS
+        self._count = 0
+        self._max = 0
@@ -10,13 +10,83 @@ This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
 
+from collections import deque
 from typing import Optional
+import json
+import sys
 import time
 
 from common.util.console_helpers import NoneNoPrintout
+from .histogram import LatencyHistogram
+from .export import Span, toChromeTrace, toSpeedscope
 
 MAX_NAME = 48
 
+# Percentiles shown by `ProfilerManager.percentiles()`
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class ProfileStats:
+    """
+    The times recorded for a profile path, such as `"tick.main.tick"`.
+
+    Each path has a single record, which is found when a profile is opened
+    using the record of its parent, so the path only needs to be built the
+    first time it is used.
+    """
+    __slots__ = (
+        'id',
+        'path',
+        'children',
+        'total',
+        'number',
+        'max',
+        'histogram',
+    )
+
+    def __init__(self, id: int, path: str) -> None:
+        """
+        Create a profile record
+
+        ### Args:
+        * `id` (`int`): ID of the path
+        * `path` (`str`): full name of the path
+        """
+        self.id = id
+        self.path = path
+        self.children: dict[str, ProfileStats] = {}
+        """Records of the paths nested within this path, by their names"""
+        self.total = 0
+        """Total time, in nanoseconds"""
+        self.number = 0
+        """Number of samples"""
+        self.max = 0
+        """Maximum time, in nanoseconds"""
+        self.histogram = LatencyHistogram()
+        """Distribution of times"""
+
+    def record(self, t: int) -> None:
+        """
+        Record a sample
+
+        ### Args:
+        * `t` (`int`): time taken, in nanoseconds
+        """
+        self.total += t
+        self.number += 1
+        if t > self.max:
+            self.max = t
+        self.histogram.record(t)
+
+    def reset(self) -> None:
+        """
+        Remove all recorded samples
+        """
+        self.total = 0
+        self.number = 0
+        self.max = 0
+        self.histogram.reset()
+
 
 class ProfileNode:
     """
@@ -25,25 +95,32 @@ class ProfileNode:
     Manages our position in the profile by allowing us to build a stack of
     profiler nodes.
     """
-    def __init__(self, parent: Optional['ProfileNode'], name: str):
+    def __init__(
+        self,
+        parent: Optional['ProfileNode'],
+        name: str,
+        stats: ProfileStats,
+    ):
         """
         Create a profile node
 
         ### Args:
         * `parent` (`Optional[ProfileNode]`): parent node
         * `name` (`str`): name of this node
+        * `stats` (`ProfileStats`): record of this node's path
         """
         self.parent = parent
         self.name = name
+        self.stats = stats
         self._children: list[ProfileNode] = []
-        self._opened = time.time_ns()
+        self._opened = time.perf_counter_ns()
         self._time: Optional[int] = None
 
     def close(self):
         """
         Close this profile node
         """
-        self._time = time.time_ns() - self._opened
+        self._time = time.perf_counter_ns() - self._opened
 
     def addChild(self, child: 'ProfileNode'):
         """
@@ -54,6 +131,15 @@ class ProfileNode:
         """
         self._children.append(child)
 
+    def getStart(self) -> int:
+        """
+        Return the time when this node was opened
+
+        ### Returns:
+        * `int`: time in nanoseconds, from `time.perf_counter_ns()`
+        """
+        return self._opened
+
     def getTime(self) -> int:
         """
         Return the time this node took
@@ -81,14 +167,7 @@ class ProfilerManager:
     It is called upon by profiler context managers in order to manage
     profiling.
     """
-    @staticmethod
-    def _getProfileName(n: ProfileNode) -> str:
-        if n.parent is None:
-            return n.name
-        else:
-            return ProfilerManager._getProfileName(n.parent) + "." + n.name
-
-    def __init__(self, print_traces: bool) -> None:
+    def __init__(self, print_traces: bool, max_spans: int = 0) -> None:
         """
         Create a ProfilerManager
 
@@ -96,28 +175,56 @@ class ProfilerManager:
         * `print_traces` (`bool`): whether to print the trace of which profiles
           are entered and exited. This has a massive performance impact, but
           can be helpful when debugging crashes in FL Studio's API.
+        * `max_spans` (`int`, optional): number of recent profiles to keep,
+          so that they can be exported using `export()`. Defaults to `0`,
+          meaning that they aren't kept.
         """
         self._print = print_traces
+        # Most recently closed profiles, if they are being kept
+        self._spans: Optional[deque[Span]] \
+            = deque(maxlen=max_spans) if max_spans > 0 else None
         # Current profiler node
         self._current: Optional[ProfileNode] = None
         # Current depth of the profiler
         self._depth = 0
-        # Name of the longest category
-        self._max_name = 0
-        # Total times from each profiler
-        self._totals: dict[str, float] = {}
-        # Number of samples from each profiler
-        self._number: dict[str, float] = {}
-        # Max times from each profiler
-        self._maxes: dict[str, float] = {}
+        # Records of each profile path, indexed by their ID
+        self._records: list[ProfileStats] = []
+        # Records of the outermost profile paths, by their names
+        self._roots: dict[str, ProfileStats] = {}
 
     def __repr__(self) -> str:
-        if not len(self._totals):
+        total = sum(r.number for r in self._records)
+        if not total:
             return "Profiler (inactive)"
         else:
-            total = sum(self._number.values())
             return f"Profiler ({total} profiles taken)"
 
+    def _getStats(
+        self,
+        parent: Optional[ProfileStats],
+        name: str,
+    ) -> ProfileStats:
+        """
+        Returns the record for a profile path, creating it if it doesn't
+        exist yet
+
+        ### Args:
+        * `parent` (`Optional[ProfileStats]`): record of the parent path, or
+          `None` for an outermost profile
+        * `name` (`str`): name of the profile
+
+        ### Returns:
+        * `ProfileStats`: record of the path
+        """
+        children = self._roots if parent is None else parent.children
+        stats = children.get(name)
+        if stats is None:
+            path = name if parent is None else f"{parent.path}.{name}"
+            stats = ProfileStats(len(self._records), sys.intern(path))
+            self._records.append(stats)
+            children[name] = stats
+        return stats
+
     def openProfile(self, name: str):
         """
         Open a new profile
@@ -128,9 +235,14 @@ class ProfilerManager:
         self._depth += 1
         if self._print:
             print("+"*self._depth + name)
-        n = ProfileNode(self._current, name)
-        if self._current is not None:
-            self._current.addChild(n)
+        current = self._current
+        n = ProfileNode(
+            current,
+            name,
+            self._getStats(None if current is None else current.stats, name),
+        )
+        if current is not None:
+            current.addChild(n)
         self._current = n
 
     def closeProfile(self):
@@ -140,64 +252,161 @@ class ProfilerManager:
         ### Raises:
         * `ValueError`: no profile to close
         """
-        if self._current is None:
+        n = self._current
+        if n is None:
             raise ValueError("No profile to close")
         if self._print:
-            print("-"*self._depth + self._current.name)
+            print("-"*self._depth + n.name)
         self._depth -= 1
-        self._current.close()
-        parent = self._current.parent
-        name = self._getProfileName(self._current)
-        t = self._current.getTime() / 1_000_000
-        if len(name) > self._max_name:
-            self._max_name = len(name)
-        if name in self._totals:
-            self._totals[name] += t
-            self._number[name] += 1
-            if self._maxes[name] < t:
-                self._maxes[name] = t
-        else:
-            self._totals[name] = t
-            self._number[name] = 1
-            self._maxes[name] = t
-        self._current = parent
+        n.close()
+        t = n.getTime()
+        n.stats.record(t)
+        if self._spans is not None:
+            self._spans.append(Span(n.stats.path, n.getStart(), t))
+        self._current = n.parent
+
+    def _getRecorded(self) -> list[ProfileStats]:
+        """
+        Returns the records of paths that have samples
+        """
+        return [r for r in self._records if r.number]
+
+    def _getMaxName(self, records: list[ProfileStats]) -> int:
+        """
+        Returns the length of the longest path name
+        """
+        return max((len(r.path) for r in records), default=0)
 
     def inspect(self):
         """
         Inspect details about the profiler
         """
+        records = self._getRecorded()
+        max_name = self._getMaxName(records)
         header = (
-            f" {'Name'.ljust(self._max_name)} | Total (ms)     "
+            f" {'Name'.ljust(max_name)} | Total (ms)     "
             f"| Samples | Ave (ms)   | Max (ms)"
         )
         print()
         print(header)
         print('=' * len(header))
-        for (name, total), number, max in zip(
-            self._totals.items(), self._number.values(), self._maxes.values()
-        ):
-            ave = total / number
+        for r in records:
+            total = r.total / 1_000_000
+            ave = total / r.number
             print(
-                f" {name.ljust(self._max_name)} | {total: 14.5f} | {number:7} "
-                f"| {ave: 10.5f} | {max: 10.5f}"
+                f" {r.path.ljust(max_name)} | {total: 14.5f} | {r.number:7} "
+                f"| {ave: 10.5f} | {r.max / 1_000_000: 10.5f}"
             )
         print()
         return NoneNoPrintout
 
-    def getTotals(self):
+    def percentiles(self):
+        """
+        Print the 50th, 90th, 99th and 99.9th percentile times of each
+        profile, which show how long the slowest samples took
+        """
+        records = self._getRecorded()
+        max_name = self._getMaxName(records)
+        header = f" {'Name'.ljust(max_name)} | Samples" + "".join(
+            f" | {'p' + format(p, 'g'):>9}" for p in PERCENTILES)
+        print()
+        print(header)
+        print('=' * len(header))
+        for r in records:
+            times = "".join(
+                f" | {r.histogram.percentile(p) / 1_000_000: 9.5f}"
+                for p in PERCENTILES
+            )
+            print(f" {r.path.ljust(max_name)} | {r.number:7}{times}")
+        print()
+        return NoneNoPrintout
+
+    def reset(self):
+        """
+        Remove all the times recorded by the profiler, so that performance
+        can be compared before and after a change
+        """
+        for r in self._records:
+            r.reset()
+        if self._spans is not None:
+            self._spans.clear()
+        return NoneNoPrintout
+
+    def getSpans(self) -> list[Span]:
+        """
+        Return the most recently closed profiles, in the order they were
+        closed. This is empty unless the `debug.profiler_spans` setting is
+        greater than zero.
+
+        ### Returns:
+        * `list[Span]`: recent profiles
+        """
+        return [] if self._spans is None else list(self._spans)
+
+    def export(self, path: str, format: str = "chrome"):
+        """
+        Export the most recently closed profiles to a JSON file, so that they
+        can be viewed in a flamegraph viewer.
+
+        This requires the `debug.profiler_spans` setting to be greater than
+        zero.
+
+        ### Args:
+        * `path` (`str`): path of the file to write
+        * `format` (`str`, optional): format to use, either `"chrome"` (for
+          `chrome://tracing` or Perfetto) or `"speedscope"`. Defaults to
+          `"chrome"`.
+
+        ### Raises:
+        * `ValueError`: unknown format
+        """
+        spans = self.getSpans()
+        if format == "chrome":
+            data = toChromeTrace(spans)
+        elif format == "speedscope":
+            data = toSpeedscope(spans, "Universal Controller Script")
+        else:
+            raise ValueError(
+                f"Unknown format '{format}'. Expected 'chrome' or "
+                f"'speedscope'"
+            )
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        print(f"Exported {len(spans)} profiles to '{path}'")
+        return NoneNoPrintout
+
+    def getPercentile(self, p: float) -> dict[str, float]:
+        """
+        Return a dictionary with the given percentile time for each category,
+        in milliseconds
+
+        ### Args:
+        * `p` (`float`): percentile, from `0` to `100`
+
+        ### Returns:
+        * `dict[str, float]`: percentile times
+        """
+        return {
+            r.path: r.histogram.percentile(p) / 1_000_000
+            for r in self._getRecorded()
+        }
+
+    def getTotals(self) -> dict[str, float]:
         """
-        Return a dictionary with the total times for each category
+        Return a dictionary with the total times for each category, in
+        milliseconds
         """
-        return self._totals
+        return {r.path: r.total / 1_000_000 for r in self._getRecorded()}
 
-    def getNumbers(self):
+    def getNumbers(self) -> dict[str, int]:
         """
-        Return a dictionary with the total times for each category
+        Return a dictionary with the number of samples for each category
         """
-        return self._number
+        return {r.path: r.number for r in self._getRecorded()}
 
-    def getMaxes(self):
+    def getMaxes(self) -> dict[str, float]:
         """
-        Return a dictionary with the total times for each category
+        Return a dictionary with the maximum times for each category, in
+        milliseconds
         """
-        return self._maxes
+        return {r.path: r.max / 1_000_000 for r in self._getRecorded()}
@@ -3,6 +3,12 @@ common > profiler > profiler_context
 
 Context manager definition for profiler
 
+Profiling is enabled by the context when the `debug.profiling` setting is
+set, or when the profiler is enabled from the console. When it is disabled,
+`ProfilerContext` returns a shared context that does nothing, and functions
+decorated with `profilerDecoration` call the original function directly, so
+that profiling costs no more than checking a flag.
+
 Authors:
 * MaddyGuthridge [hello@maddyguthridge.com, HDSQ#2154]
 
@@ -11,9 +17,47 @@ more details.
 """
 
 import common
-from typing import TypeVar, Callable
+from typing import TYPE_CHECKING, Optional, TypeVar, Callable, Union
 from typing_extensions import ParamSpec
 
+if TYPE_CHECKING:
+    from .manager import ProfilerManager
+
+ProfileName = Union[str, Callable[[], str]]
+"""
+The name of a profile. This can be a callable that returns the name, so that
+names built from other values are only formatted when profiling is enabled.
+"""
+
+_enabled = False
+
+
+def isProfilingEnabled() -> bool:
+    """
+    Returns whether profiling is enabled
+
+    ### Returns:
+    * `bool`: whether profiling is enabled
+    """
+    return _enabled
+
+
+def enableProfiling() -> None:
+    """
+    Enable profiling. Profiles are recorded by the profiler of the current
+    context, if it has one.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disableProfiling() -> None:
+    """
+    Disable profiling, so that profiles aren't recorded
+    """
+    global _enabled
+    _enabled = False
+
 
 class ProfilerContext:
     """
@@ -27,19 +71,52 @@ class ProfilerContext:
     >>>     costlyOperation()
     >>> # Outside context
     "'Costly operation' (1000 ns)": [sub operations]
+
+    If the name needs to be built from other values, pass a function that
+    returns it, so that it is only built if profiling is enabled:
+
+    >>> with ProfilerContext(lambda: f"tick-{type(plug).__name__}"):
+    >>>     plug.tick()
+    """
+
+    def __new__(cls, name: ProfileName) -> 'ProfilerContext':
+        if not _enabled:
+            return _DISABLED
+        return super().__new__(cls)
+
+    def __init__(self, name: ProfileName) -> None:
+        self._name = name if isinstance(name, str) else name()
+        self._profiler: Optional['ProfilerManager'] \
+            = common.getContext().profiler
+
+    def __enter__(self):
+        if self._profiler is not None:
+            self._profiler.openProfile(self._name)
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if self._profiler is not None:
+            self._profiler.closeProfile()
+
+
+class _DisabledProfilerContext(ProfilerContext):
     """
-    def __init__(self, name: str) -> None:
-        self._name = name
+    Profiler context used when profiling is disabled, which does nothing
+    """
+
+    def __new__(cls) -> '_DisabledProfilerContext':
+        return object.__new__(cls)
+
+    def __init__(self, name: ProfileName = '') -> None:
+        pass
 
     def __enter__(self):
-        c = common.getContext()
-        if c.profiler is not None:
-            c.profiler.openProfile(self._name)
+        pass
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        c = common.getContext()
-        if c.profiler is not None:
-            c.profiler.closeProfile()
+        pass
+
+
+_DISABLED = _DisabledProfilerContext()
 
 
 Params = ParamSpec("Params")
@@ -49,6 +126,10 @@ RT = TypeVar("RT")
 def profilerDecoration(name: str):
     def decorator(func: Callable[Params, RT]) -> Callable[Params, RT]:
         def wrapper(*args, **kwargs):
+            # Checked on each call, so that profiling can be enabled after
+            # the function is decorated
+            if not _enabled:
+                return func(*args, **kwargs)
             with ProfilerContext(name):
                 return func(*args, **kwargs)
         return wrapper
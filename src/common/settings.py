@@ -12,11 +12,12 @@ more details.
 """
 
 __all__ = [
-    'Settings'
+    'Settings',
+    'SettingHandle',
 ]
 
 import sys
-from typing import Any
+from typing import Any, Callable
 from .util import dict_tools
 from . import default_config as d
 from .exceptions import InvalidConfigError
@@ -43,6 +44,27 @@ except Exception as e:
     config_errors = f'Unknown error: {e}'
 
 
+class SettingHandle:
+    """
+    A bound accessor for a single setting.
+
+    The handle's `value` is kept up to date by the `Settings` object that
+    created it, so code on hot paths can keep a reference to the handle rather
+    than looking the setting up each time.
+    """
+    __slots__ = ('key', 'value')
+
+    def __init__(self, key: str, value: Any) -> None:
+        self.key = key
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"SettingHandle({self.key!r}, {self.value!r})"
+
+    def _update(self, value: Any) -> None:
+        self.value = value
+
+
 class Settings:
     """
     A container for the configuration of the script
@@ -58,19 +80,26 @@ class Settings:
         """
         self.__valid = True
         self.__error_msg = ''
+        self._listeners: dict[str, list[Callable[[Any], None]]] = {}
+        self._handles: dict[str, SettingHandle] = {}
         if had_errors:
             self.__valid = False
             self.__error_msg = config_errors
-            self._settings_dict = d.CONFIG
-            return
-        try:
-            config = dict_tools.expandDictShorthand(CONFIG)
             self._settings_dict = dict_tools.recursiveMergeDictionaries(
-                d.CONFIG, config)
-        except (KeyError, TypeError) as e:
-            self.__valid = False
-            self.__error_msg = str(e)
-            self._settings_dict = d.CONFIG
+                d.CONFIG, {})
+        else:
+            try:
+                config = dict_tools.expandDictShorthand(CONFIG)
+                self._settings_dict = dict_tools.recursiveMergeDictionaries(
+                    d.CONFIG, config)
+            except (KeyError, TypeError) as e:
+                self.__valid = False
+                self.__error_msg = str(e)
+                self._settings_dict = dict_tools.recursiveMergeDictionaries(
+                    d.CONFIG, {})
+        # Flattened copy of the settings, keyed by dotted path, so that
+        # looking up a value doesn't require walking the nested dictionaries
+        self._flat = dict_tools.flattenDict(self._settings_dict)
 
     def assert_loaded(self) -> None:
         """
@@ -129,6 +158,12 @@ class Settings:
         ### Returns:
         * `Any`: Value
         """
+        try:
+            return self._flat[key]
+        except KeyError:
+            pass
+        # Fall back to searching the nested dictionaries, in case a category
+        # was requested
         try:
             return Settings._recursiveGet(key.split('.'), self._settings_dict)
         except KeyError as e:
@@ -150,7 +185,7 @@ class Settings:
         * `KeyError`: Unable to find settings
         """
         try:
-            return Settings._recursiveSet(
+            Settings._recursiveSet(
                 key.split('.'),
                 self._settings_dict,
                 value
@@ -161,3 +196,71 @@ class Settings:
             ) from None
         except IndexError:
             raise KeyError(f"Unable to find setting at '{key}'") from None
+        if key in self._flat and type(value) is not dict:
+            self._flat[key] = value
+            self._notify(key, value)
+        else:
+            # A whole category was replaced, so rebuild the flattened settings
+            # and notify any listeners of values that changed
+            old = self._flat
+            self._flat = dict_tools.flattenDict(self._settings_dict)
+            for k, v in self._flat.items():
+                if k not in old or old[k] is not v:
+                    self._notify(k, v)
+
+    def _notify(self, key: str, value: Any) -> None:
+        """
+        Notify the listeners of a setting that its value changed
+
+        ### Args:
+        * `key` (`str`): key of setting
+        * `value` (`Any`): new value
+        """
+        for callback in self._listeners.get(key, []):
+            callback(value)
+
+    def addListener(self, key: str, callback: Callable[[Any], None]) -> None:
+        """
+        Register a function to be called with the value of a setting, and
+        again whenever that setting is changed.
+
+        This can be used to cache settings that are used frequently, without
+        needing to look them up every time.
+
+        ### Args:
+        * `key` (`str`): key of setting to listen to
+        * `callback` (`Callable[[Any], None]`): function to call with the
+          value of the setting
+
+        ### Raises:
+        * `KeyError`: Unable to find settings
+        """
+        value = self.get(key)
+        self._listeners.setdefault(key, []).append(callback)
+        callback(value)
+
+    def handle(self, key: str) -> SettingHandle:
+        """
+        Returns a bound accessor for a setting, whose `value` is updated
+        whenever the setting is changed.
+
+        Handles are shared, so requesting the same key twice gives the same
+        handle.
+
+        ### Args:
+        * `key` (`str`): key of setting
+
+        ### Raises:
+        * `KeyError`: Unable to find settings
+
+        ### Returns:
+        * `SettingHandle`: handle to the setting
+        """
+        try:
+            return self._handles[key]
+        except KeyError:
+            pass
+        handle = SettingHandle(key, None)
+        self.addListener(key, handle._update)
+        self._handles[key] = handle
+        return handle
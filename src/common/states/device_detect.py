@@ -12,36 +12,122 @@ more details.
 """
 
 import time
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import device
 
 import common
 from consts import UNIVERSAL_DEVICE_ENQUIRY
 from common.exceptions import DeviceRecognizeError
 from common import log, verbosity
+from common.detection_cache import DetectionCache, hashResponse
 from fl_classes import isMidiMsgSysex, FlMidiMsg
 from common.util.events import eventToString
 
 from . import IScriptState, ErrorState, DeviceState
 
+if TYPE_CHECKING:
+    from devices import Device
+
 LOG_CAT = "bootstrap.device.type_detect"
+CACHE_LOG_CAT = "bootstrap.device.detection_cache"
+
+
+def isEnquiryResponse(event: FlMidiMsg) -> bool:
+    """
+    Returns whether an event is a response to the universal device enquiry
+    """
+    return (
+        isMidiMsgSysex(event)
+        and len(event.sysex) > 4
+        and event.sysex[0] == 0xF0
+        and event.sysex[1] == 0x7E
+        and event.sysex[3] == 0x06
+        and event.sysex[4] == 0x02
+    )
 
 
 class WaitingForDevice(IScriptState):
     """
     State for when we're trying to recognize a device
     """
-    def __init__(self, switch_to: type[DeviceState]) -> None:
+    def __init__(
+        self,
+        switch_to: type[DeviceState],
+        cache: Optional[DetectionCache] = None,
+    ) -> None:
         """
         Create the WaitingForDevice state
 
         ### Args:
         * `switch_to` (`IScriptState`): state to switch to when the device is
           recognized
+        * `cache` (`DetectionCache`, optional): cache of previously recognized
+          devices. Defaults to the cache in the `ucs_config` directory.
         """
         self._init_time: Optional[float] = None
         self._sent_enquiry = False
         self._to = switch_to
+        self._cache = cache if cache is not None else DetectionCache()
+
+    def useCache(self) -> bool:
+        """
+        Returns whether the detection cache should be used
+        """
+        settings = common.getContext().settings
+        return (
+            settings.get("bootstrap.detection_cache")
+            and not settings.get("bootstrap.skip_enquiry")
+        )
+
+    def cachedDevice(self) -> None:
+        """
+        Uses the detection cache to load the device recognized last time the
+        script ran on this port. The device's response to the universal device
+        enquiry is then checked in the background by the `VerifyingDevice`
+        state.
+        """
+        if not self.useCache():
+            return
+        port = device.getName()
+        cached = self._cache.lookup(port)
+        if cached is None:
+            return
+        response, id = cached
+        try:
+            dev = common.ExtensionManager.devices.getById(id)
+        except DeviceRecognizeError:
+            log(
+                CACHE_LOG_CAT,
+                f"Cached device '{id}' for port '{port}' not found",
+                verbosity.WARNING,
+            )
+            self._cache.remove(port)
+            return
+        log(
+            LOG_CAT,
+            f"Recognized device via detection cache: {dev.getId()}",
+            verbosity.INFO
+        )
+        common.getContext().setState(VerifyingDevice(
+            self._to,
+            dev,
+            self._to.create(dev),
+            self._cache,
+            response,
+        ))
+
+    def cacheDevice(self, dev: 'Device', event: Optional[FlMidiMsg]) -> None:
+        """
+        Store a recognized device in the detection cache
+
+        ### Args:
+        * `dev` (`Device`): device that was recognized
+        * `event` (`Optional[FlMidiMsg]`): the device's response to the
+          universal device enquiry, or `None` if it didn't respond
+        """
+        if self.useCache():
+            self._cache.store(
+                device.getName(), hashResponse(event), dev.getId())
 
     def nameAssociations(self) -> None:
         """
@@ -93,6 +179,7 @@ class WaitingForDevice(IScriptState):
             f"Recognized device via fallback: {dev.getId()}",
             verbosity.INFO
         )
+        self.cacheDevice(dev, None)
         common.getContext().setState(self._to.create(dev))
 
     def sendEnquiry(self) -> None:
@@ -115,6 +202,9 @@ class WaitingForDevice(IScriptState):
         # If so, a StateChangeException will be raised so this function will
         # return early
         self.nameAssociations()
+        # Likewise, if the device was recognized last time, use it straight
+        # away
+        self.cachedDevice()
         log(
             LOG_CAT,
             f"Device is assigned: {bool(device.isAssigned())}",
@@ -159,6 +249,7 @@ class WaitingForDevice(IScriptState):
                     verbosity.INFO,
                     eventToString(event)
                 )
+                self.cacheDevice(dev, event)
                 common.getContext().setState(self._to.create(dev))
             except DeviceRecognizeError as e:
                 log(
@@ -171,3 +262,133 @@ class WaitingForDevice(IScriptState):
                     self.detectFallback()
                 except DeviceRecognizeError:
                     common.getContext().setState(ErrorState(e))
+
+
+class VerifyingDevice(IScriptState):
+    """
+    State for when a device was loaded from the detection cache, but its
+    response to the universal device enquiry hasn't been checked yet.
+
+    Ticks and events are passed through to the state for the cached device,
+    except for the enquiry response. If the response doesn't match the cached
+    one, the device is recognized again, and if it is a different device, the
+    script switches to it.
+    """
+    def __init__(
+        self,
+        switch_to: type[DeviceState],
+        dev: 'Device',
+        state: DeviceState,
+        cache: DetectionCache,
+        response: str,
+    ) -> None:
+        """
+        Create the VerifyingDevice state
+
+        ### Args:
+        * `switch_to` (`type[DeviceState]`): state to switch to if a different
+          device is recognized
+        * `dev` (`Device`): device loaded from the cache
+        * `state` (`DeviceState`): state for the cached device
+        * `cache` (`DetectionCache`): detection cache
+        * `response` (`str`): cached hash of the device's response
+        """
+        self._init_time: Optional[float] = None
+        self._sent_enquiry = False
+        self._to = switch_to
+        self._device = dev
+        self._state = state
+        self._cache = cache
+        self._response = response
+
+    def sendEnquiry(self) -> None:
+        self._sent_enquiry = True
+        self._init_time = time.time()
+        device.midiOutSysex(UNIVERSAL_DEVICE_ENQUIRY)
+        log(
+            CACHE_LOG_CAT,
+            "Sent universal device enquiry to verify cached device",
+            verbosity.INFO,
+        )
+
+    def finish(self) -> None:
+        """
+        Stop verifying the device, and continue using the cached device's
+        state directly
+        """
+        common.getContext().state = self._state
+
+    def initialize(self) -> None:
+        self._state.initialize()
+        if not common.getContext().settings.get("bootstrap.delay_enquiry"):
+            self.sendEnquiry()
+
+    def deinitialize(self) -> None:
+        self._state.deinitialize()
+
+    def tick(self) -> None:
+        if not self._sent_enquiry:
+            self.sendEnquiry()
+        else:
+            assert self._init_time is not None
+            if (
+                time.time() - self._init_time
+                > common.getContext().settings.get(
+                    "bootstrap.detection_timeout"
+                )
+            ):
+                # If the device didn't respond last time either, then this
+                # is expected
+                log(
+                    CACHE_LOG_CAT,
+                    "No response to device enquiry, keeping cached device",
+                    verbosity.INFO,
+                )
+                self.finish()
+        self._state.tick()
+
+    def processEvent(self, event: FlMidiMsg) -> None:
+        if not self._sent_enquiry or not isEnquiryResponse(event):
+            self._state.processEvent(event)
+            return
+        event.handled = True
+        port = device.getName()
+        response = hashResponse(event)
+        if response == self._response:
+            log(CACHE_LOG_CAT, "Cached device verified", verbosity.INFO)
+            self.finish()
+            return
+        try:
+            dev = common.ExtensionManager.devices.get(event)
+        except DeviceRecognizeError:
+            log(
+                CACHE_LOG_CAT,
+                f"Failed to recognize device via sysex, keeping cached "
+                f"device {eventToString(event)}",
+                verbosity.INFO,
+            )
+            self.finish()
+            return
+        self._cache.store(port, response, dev.getId())
+        if dev.getId() == self._device.getId():
+            log(
+                CACHE_LOG_CAT,
+                "Cached device verified with a different response",
+                verbosity.INFO,
+                eventToString(event),
+            )
+            self.finish()
+            return
+        log(
+            CACHE_LOG_CAT,
+            f"Cached device {self._device.getId()} didn't match response, "
+            f"switching to {dev.getId()}",
+            verbosity.WARNING,
+            eventToString(event),
+        )
+        self._state.deinitialize()
+        self._device.deinitialize()
+        # Plugins were created using the cached device, so need to be
+        # recreated for the new one
+        common.ExtensionManager.resetPlugins()
+        common.getContext().setState(self._to.create(dev))
@@ -20,11 +20,13 @@ from common.logger import log
 from fl_classes import FlMidiMsg
 from fl_classes import isMidiMsgStandard, isMidiMsgSysex
 from common.util.events import (
+    decodeForwardedBatch,
     decodeForwardedEvent,
     eventToString,
     forwardEvent,
     isEventForwarded,
-    isEventForwardedHereFrom
+    isEventForwardedHereFrom,
+    isForwardedBatch,
 )
 from .dev_state import DeviceState
 
@@ -36,12 +38,26 @@ def outputForwarded(event: FlMidiMsg):
     """
     Output a received event to this device
 
-    This handles events forwarded from the main script
+    This handles events forwarded from the main script, including batches of
+    events, which are output in order
+
+    ### Args:
+    * `event` (`FlMidiMsg`): event
+    """
+    if isForwardedBatch(event):
+        for e in decodeForwardedBatch(event):
+            outputEvent(e)
+    else:
+        outputEvent(decodeForwardedEvent(event))
+
+
+def outputEvent(event: FlMidiMsg):
+    """
+    Output a decoded event to this device
 
     ### Args:
     * `event` (`FlMidiMsg`): event
     """
-    event = decodeForwardedEvent(event)
     if isMidiMsgSysex(event):
         device.midiOutSysex(event.sysex)
     else:
@@ -52,7 +68,7 @@ def outputForwarded(event: FlMidiMsg):
         )
     log(
         "device.forward.in",
-        "Output event to device: " + eventToString(event)
+        lambda: "Output event to device: " + eventToString(event)
     )
 
 
@@ -71,13 +87,18 @@ class ForwardState(DeviceState):
             )
         self._device = device
         common.getContext().registerDevice(device)
+        # Build the header for forwarded events now, rather than when the
+        # first event is forwarded
+        device.getForwardedHeader(device.getDeviceNumber())
 
     @classmethod
     def create(cls, device: 'Device') -> 'DeviceState':
         return cls(device)
 
     def initialize(self) -> None:
-        pass
+        # Request a session handle so that the v2 forwarding envelope can be
+        # used
+        common.getContext().forwarding.hello()
 
     def deinitialize(self) -> None:
         pass
@@ -93,6 +114,7 @@ class ForwardState(DeviceState):
             forwardEvent(event)
             log(
                 "device.forward.out",
-                "Dispatched event to main script: " + eventToString(event)
+                lambda: "Dispatched event to main script: "
+                + eventToString(event)
             )
         event.handled = True
@@ -47,9 +47,14 @@ class MainState(DeviceState):
 
     def initialize(self) -> None:
         self._device.initialize()
+        # Let forwarder scripts know that we support the v2 forwarding
+        # envelope
+        common.getContext().forwarding.announce()
 
     def deinitialize(self) -> None:
-        pass
+        # Send any events that are still waiting in the output queue, since
+        # this is the last chance to send them
+        self._device.getOutputQueue().flush(force=True)
 
     @profilerDecoration("main.tick")
     def tick(self) -> None:
@@ -61,9 +66,9 @@ class MainState(DeviceState):
         # Tick special plugins
         for p in common.ExtensionManager.special.get(self._device):
             if p.shouldBeActive():
-                with ProfilerContext(f"tick-{type(p).__name__}"):
+                with ProfilerContext(lambda: f"tick-{type(p).__name__}"):
                     p.doTick(plug_idx)
-                with ProfilerContext(f"apply-{type(p).__name__}"):
+                with ProfilerContext(lambda: f"apply-{type(p).__name__}"):
                     # Special plugins should always be thoroughly applied
                     # TODO: Find out why
                     p.apply(thorough=True)
@@ -79,9 +84,9 @@ class MainState(DeviceState):
                 plug_id, self._device
             )
             if plug is not None:
-                with ProfilerContext(f"tick-{type(plug).__name__}"):
+                with ProfilerContext(lambda: f"tick-{type(plug).__name__}"):
                     plug.doTick(plug_idx)
-                with ProfilerContext(f"apply-{type(plug).__name__}"):
+                with ProfilerContext(lambda: f"apply-{type(plug).__name__}"):
                     plug.apply(thorough=changed)
         else:
             assert isinstance(plug_idx, WindowIndex)
@@ -89,17 +94,17 @@ class MainState(DeviceState):
                 plug_idx, self._device
             )
             if window is not None:
-                with ProfilerContext(f"tick-{type(window).__name__}"):
+                with ProfilerContext(lambda: f"tick-{type(window).__name__}"):
                     window.doTick(plug_idx)
-                with ProfilerContext(f"apply-{type(window).__name__}"):
+                with ProfilerContext(lambda: f"apply-{type(window).__name__}"):
                     window.apply(thorough=changed)
 
         # Tick final special plugins
         for p in common.ExtensionManager.super_special.get(self._device):
             if p.shouldBeActive():
-                with ProfilerContext(f"tick-{type(p).__name__}"):
+                with ProfilerContext(lambda: f"tick-{type(p).__name__}"):
                     p.doTick(plug_idx)
-                with ProfilerContext(f"apply-{type(p).__name__}"):
+                with ProfilerContext(lambda: f"apply-{type(p).__name__}"):
                     p.apply(thorough=True)
 
         # Tick the device
@@ -113,7 +118,7 @@ class MainState(DeviceState):
             event.handled = True
             log(
                 "device.event.in",
-                f"Failed to recognize event: {eventToString(event)}",
+                lambda: f"Failed to recognize event: {eventToString(event)}",
                 verbosity.CRITICAL,
                 "This usually means that the device hasn't been configured "
                 "correctly. Please contact the device's maintainer."
@@ -126,9 +131,10 @@ class MainState(DeviceState):
 
         log(
             "device.event.in",
-            f"Recognized event: {mapping.getControl()}",
+            "Recognized event: {}",
             verbosity.EVENT,
-            detailed_msg=eventToString(event)
+            detailed_msg=lambda: eventToString(event),
+            args=(mapping.getControl(),),
         )
 
         # Get active standard plugin
@@ -137,7 +143,7 @@ class MainState(DeviceState):
         # Process for super special plugins
         for p in (common.ExtensionManager.super_special.get(self._device)):
             if p.shouldBeActive():
-                with ProfilerContext(f"process-{type(p).__name__}"):
+                with ProfilerContext(lambda: f"process-{type(p).__name__}"):
                     if p.processEvent(mapping, plug_idx):
                         event.handled = True
                         return
@@ -152,7 +158,7 @@ class MainState(DeviceState):
                 plug_id, self._device
             )
             if plug is not None:
-                with ProfilerContext(f"process-{type(plug).__name__}"):
+                with ProfilerContext(lambda: f"process-{type(plug).__name__}"):
                     if plug.processEvent(mapping, plug_idx):
                         event.handled = True
                         return
@@ -162,7 +168,9 @@ class MainState(DeviceState):
                 plug_idx, self._device
             )
             if window is not None:
-                with ProfilerContext(f"process-{type(window).__name__}"):
+                with ProfilerContext(
+                    lambda: f"process-{type(window).__name__}"
+                ):
                     if window.processEvent(mapping, plug_idx):
                         event.handled = True
                         return
@@ -170,7 +178,7 @@ class MainState(DeviceState):
         # Process for special plugins
         for p in (common.ExtensionManager.special.get(self._device)):
             if p.shouldBeActive():
-                with ProfilerContext(f"process-{type(p).__name__}"):
+                with ProfilerContext(lambda: f"process-{type(p).__name__}"):
                     if p.processEvent(mapping, plug_idx):
                         event.handled = True
                         return
@@ -3,6 +3,7 @@ common > types
 
 Contains type definitions used by the script, including:
 * `Color`, used to manage colors in the script
+* `Palette`, used to match colors to the colors available on a device
 * `FlMidiMsg`, used as a shadow for the real `FlMidiMsg` type when testing and
   type hinting
 
@@ -15,10 +16,12 @@ more details.
 
 __all__ = [
     'Color',
+    'Palette',
     'BoolS',
     'TrueS',
     'FalseS',
 ]
 
 from .color import Color
+from .palette import Palette
 from .bool_s import BoolS, TrueS, FalseS
@@ -19,6 +19,12 @@ __all__ = [
     'Color'
 ]
 
+# Maximum number of gradient tables to cache
+MAX_GRADIENTS = 64
+# Cached gradient tables, keyed by the RGB and grayscale values of the start
+# and end colors, the number of steps and the enabled value
+_gradients: 'dict[tuple, tuple[Color, ...]]' = {}
+
 # Constants for scaling color components when getting distances
 # Higher values contribute more to closeness
 HUE_SCALE = 10.0
@@ -133,62 +139,117 @@ class Color:
     Defines an RGB color, as well as useful functions for converting between
     various color types.
 
+    Colors are immutable: to get a modified color, use one of the creation
+    functions, or a builder method such as `withEnabled()`.
+
     NOTE: colors are stored as separate red, green and blue components
-    internally. Calculations for HSV representations are made when required
+    internally. The HSV representation is calculated when it is first
+    required, and then cached.
     """
-    __slots__ = ['__red', '__green', '__blue', '__grayscale', '__enabled']
-
-    def __init__(self) -> None:
-        """
-        Create an empty color object: Color(0, 0, 0)
+    __slots__ = [
+        '__red',
+        '__green',
+        '__blue',
+        '__integer',
+        '__grayscale',
+        '__enabled',
+        '__hsv',
+    ]
+    __red: int
+    __green: int
+    __blue: int
+    __integer: int
+    __grayscale: float
+    __enabled: bool
+    __hsv: Optional[tuple[float, float, float]]
+
+    # Colors that have been interned, so that equivalent colors can share the
+    # same object (and its cached HSV values)
+    __interned: 'dict[tuple[int, float, bool], Color]' = {}
+
+    def __new__(cls) -> 'Color':
+        """
+        Returns an empty color object: Color(0, 0, 0)
+
+        This is always the same object, since colors are immutable.
 
         To start from another value, use one of the creation functions:
-        * `Color.fromInt()`
+        * `Color.fromInteger()`
         * `Color.fromRgb()`
         * `Color.fromHsv()`
+        * `Color.fromGrayscale()`
         """
-        self.__red = 0
-        self.__green = 0
-        self.__blue = 0
-        self.__grayscale = 0.0
-        self.__enabled = False
+        return Color.BLACK
+
+    @staticmethod
+    def __create(
+        r: int,
+        g: int,
+        b: int,
+        grayscale: Optional[float],
+        enabled: Optional[bool],
+    ) -> 'Color':
+        """
+        Create a color object from valid RGB values, returning the interned
+        color if there is one.
+        """
+        rgb = (r << 16) + (g << 8) + b
+        if grayscale is None:
+            # Value of the color, without needing the full HSV conversion
+            grayscale = max(r, g, b) / 255
+        if enabled is None:
+            enabled = rgb != 0
+        interned = Color.__interned.get((rgb, grayscale, enabled))
+        if interned is not None:
+            return interned
+        c = object.__new__(Color)
+        c.__red = r
+        c.__green = g
+        c.__blue = b
+        c.__integer = rgb
+        c.__grayscale = grayscale
+        c.__enabled = enabled
+        c.__hsv = None
+        return c
+
+    @staticmethod
+    def intern(color: 'Color') -> 'Color':
+        """
+        Intern a color, so that creating an identical color returns the same
+        object rather than a new one. This should be used for colors that are
+        created frequently, such as the colors in a device's palette.
+
+        ### Args:
+        * `color` (`Color`): color to intern
+
+        ### Returns:
+        * `Color`: the interned color, which may be an existing object that is
+          identical to the given color
+        """
+        key = (color.__integer, color.__grayscale, color.__enabled)
+        return Color.__interned.setdefault(key, color)
 
     def __repr__(self) -> str:
         return f"Color(0x{self.integer:06X} | "\
             + f"r={self.red}, g={self.green}, b={self.blue})"
 
     def __hash__(self) -> int:
-        return self.integer
-
-#     def copy(self) -> 'Color':
-#         """
-#         Create an identical copy of this color object
-#
-#         ### Returns:
-#         * `Color`: color object copy
-#         """
-#         c = Color()
-#         c.integer = self.integer
-#         return c
+        return self.__integer
 
-    ###########################################################################
-    # Creation functions
+    def __reduce__(self):
+        return (
+            Color.fromInteger,
+            (self.__integer, self.__grayscale, self.__enabled),
+        )
 
-    def __setGrayscaleEnabled(
-        self,
-        grayscale: Optional[float],
-        enabled: Optional[bool],
-    ):
-        """Update the grayscale and enabled values of this color object"""
-        if grayscale is None:
-            self.__grayscale = self.value
-        else:
-            self.__grayscale = grayscale
+    def __copy__(self) -> 'Color':
+        return self
 
-        if enabled is None:
-            self.__enabled = self != Color()
-        else:
-            self.__enabled = enabled
+    def __deepcopy__(self, memo) -> 'Color':
+        return self
+
+    ###########################################################################
+    # Creation functions
 
     @staticmethod
     def fromInteger(
@@ -209,19 +270,13 @@ class Color:
         ### Returns:
         * `Color`: new color object
         """
-        c = Color()
-
-        r = (rgb & 0xFF0000) >> 16
-        g = (rgb & 0x00FF00) >> 8
-        b = (rgb & 0x0000FF)
-
-        c.__red = r
-        c.__green = g
-        c.__blue = b
-
-        c.__setGrayscaleEnabled(grayscale, enabled)
-
-        return c
+        return Color.__create(
+            (rgb & 0xFF0000) >> 16,
+            (rgb & 0x00FF00) >> 8,
+            (rgb & 0x0000FF),
+            grayscale,
+            enabled,
+        )
 
     @staticmethod
     def fromRgb(
@@ -246,19 +301,13 @@ class Color:
         ### Returns:
         * `Color`: color
         """
-        c = Color()
-
-        r = c.__valCheckRgb(r)
-        g = c.__valCheckRgb(g)
-        b = c.__valCheckRgb(b)
-
-        c.__red = r
-        c.__green = g
-        c.__blue = b
-
-        c.__setGrayscaleEnabled(grayscale, enabled)
-
-        return c
+        return Color.__create(
+            Color.__valCheckRgb(r),
+            Color.__valCheckRgb(g),
+            Color.__valCheckRgb(b),
+            grayscale,
+            enabled,
+        )
 
     @staticmethod
     def fromHsv(
@@ -283,21 +332,13 @@ class Color:
         ### Returns:
         * `Color`: color
         """
-        c = Color()
-
-        hue = c.__valCheckHue(hue)
-        saturation = c.__valCheckSatVal(saturation)
-        value = c.__valCheckSatVal(value)
+        hue = Color.__valCheckHue(hue)
+        saturation = Color.__valCheckSatVal(saturation)
+        value = Color.__valCheckSatVal(value)
 
         r, g, b = hsvToRgb(hue, saturation, value)
 
-        c.__red = r
-        c.__green = g
-        c.__blue = b
-
-        c.__setGrayscaleEnabled(grayscale, enabled)
-
-        return c
+        return Color.__create(r, g, b, grayscale, enabled)
 
     @staticmethod
     def fromGrayscale(
@@ -315,20 +356,53 @@ class Color:
         ### Returns:
         * `Color`: new color object
         """
-        c = Color()
-
         value = int(grayscale*255)
-
-        c.__red = value
-        c.__green = value
-        c.__blue = value
-        c.__grayscale = grayscale
         if enabled is None:
-            c.__enabled = grayscale != 0
-        else:
-            c.__enabled = enabled
+            enabled = grayscale != 0
+        return Color.__create(value, value, value, grayscale, enabled)
 
-        return c
+    ###########################################################################
+    # Builder methods
+
+    def withEnabled(self, enabled: bool) -> 'Color':
+        """
+        Returns a copy of this color with a different enabled value
+
+        ### Args:
+        * `enabled` (`bool`): whether the LED should be on for on/off LEDs
+
+        ### Returns:
+        * `Color`: new color
+        """
+        if enabled == self.__enabled:
+            return self
+        return Color.__create(
+            self.__red,
+            self.__green,
+            self.__blue,
+            self.__grayscale,
+            enabled,
+        )
+
+    def withGrayscale(self, grayscale: float) -> 'Color':
+        """
+        Returns a copy of this color with a different grayscale value
+
+        ### Args:
+        * `grayscale` (`float`): brightness for grayscale LEDs
+
+        ### Returns:
+        * `Color`: new color
+        """
+        if grayscale == self.__grayscale:
+            return self
+        return Color.__create(
+            self.__red,
+            self.__green,
+            self.__blue,
+            grayscale,
+            self.__enabled,
+        )
 
     ###########################################################################
     # Helper functions
@@ -413,11 +487,7 @@ class Color:
         ### Returns:
         * `int`: color rgb
         """
-        return (
-            (self.red << 16)
-            + (self.green << 8)
-            + self.blue
-        )
+        return self.__integer
 
     @property
     def hsv(self) -> tuple[float, float, float]:
@@ -425,8 +495,8 @@ class Color:
         Represents the color as a tuple of floats representing hue,
         saturation, and value
 
-        NOTE: Under the hood, values are still stored as RGB - conversions are
-        made as required.
+        NOTE: Under the hood, values are still stored as RGB - the conversion
+        is made when this is first required, and then cached.
 
         ### Returns:
         * `tuple[float, float, float]`:
@@ -434,7 +504,11 @@ class Color:
             * saturation (0-1.0)
             * value (0-1.0)
         """
-        return rgbToHsv(self.red, self.green, self.blue)
+        hsv = self.__hsv
+        if hsv is None:
+            hsv = rgbToHsv(self.__red, self.__green, self.__blue)
+            self.__hsv = hsv
+        return hsv
 
     @property
     def red(self) -> int:
@@ -548,6 +622,11 @@ class Color:
         Grayscale values are averaged, and enabled values are set to the
         default for the result.
 
+        If the colors have the same hue, and the same saturation or value,
+        fading in the HSV color space is equivalent to fading between their RGB
+        values, so the result is calculated using integer arithmetic. It may
+        differ from the result of `fadeHsv()` by at most one unit.
+
         ### Args:
         * `start` (`Color`): color to fade from
         * `end` (`Color`): color to fade to
@@ -559,8 +638,49 @@ class Color:
         ### Returns:
         * `Color`: faded color
         """
-        hue_start = start.hue
-        hue_end = end.hue
+        h1, s1, v1 = start.hsv
+        h2, s2, v2 = end.hsv
+        if h1 != h2 or (s1 != s2 and v1 != v2) \
+                or not 0.0 <= position <= 1.0:
+            return Color.fadeHsv(start, end, position, enabled)
+        # Weights as 8.8 fixed-point numbers
+        w_end = int(position * 256)
+        w_start = 256 - w_end
+        return Color.__create(
+            (start.__red * w_start + end.__red * w_end) >> 8,
+            (start.__green * w_start + end.__green * w_end) >> 8,
+            (start.__blue * w_start + end.__blue * w_end) >> 8,
+            start.__grayscale * position + end.__grayscale * (1 - position),
+            enabled,
+        )
+
+    @staticmethod
+    def fadeHsv(
+        start: 'Color',
+        end: 'Color',
+        position: float = 0.5,
+        enabled: Optional[bool] = None,
+    ) -> 'Color':
+        """
+        Fade between two colors, always calculating the result in the HSV
+        color space.
+
+        This is slower than `fade()`, and should only be needed to check its
+        results.
+
+        ### Args:
+        * `start` (`Color`): color to fade from
+        * `end` (`Color`): color to fade to
+        * `position` (`float`, optional): position of the fade to use (0-1.0).
+          Defaults to `0.5`.
+        * `enabled` (`bool`, optional): whether the color should be considered
+          enabled. Defaults to `None` to determine based on the result.
+
+        ### Returns:
+        * `Color`: faded color
+        """
+        hue_start, sat_start, val_start = start.hsv
+        hue_end, sat_end, val_end = end.hsv
         # Ensure hues are within 180 deg
         if hue_start - hue_end > 180:
             hue_start -= 360
@@ -572,12 +692,64 @@ class Color:
 
         return Color.fromHsv(
             hue_end * position + hue_start * rev_pos,
-            end.saturation * position + start.saturation * rev_pos,
-            end.value * position + start.value * rev_pos,
+            sat_end * position + sat_start * rev_pos,
+            val_end * position + val_start * rev_pos,
             start.grayscale * position + end.grayscale * rev_pos,
             enabled,
         )
 
+    @staticmethod
+    def gradient(
+        start: 'Color',
+        end: 'Color',
+        steps: int,
+        enabled: Optional[bool] = None,
+    ) -> tuple['Color', ...]:
+        """
+        Returns a table of colors evenly spaced along the fade between two
+        colors, including both ends. Tables are cached, so this can be used
+        for fades that are calculated repeatedly, by picking the entry closest
+        to the required position. For fades between grays, 256 steps is enough
+        for the entries to be within one unit of the exact fade, but fades
+        with a large change in hue need more steps.
+
+        ```py
+        table = Color.gradient(Color.BLACK, Color.WHITE, 256)
+        color = table[round(position * 255)]
+        ```
+
+        ### Args:
+        * `start` (`Color`): color to fade from
+        * `end` (`Color`): color to fade to
+        * `steps` (`int`): number of colors in the table (at least 2)
+        * `enabled` (`bool`, optional): whether the colors should be
+          considered enabled. Defaults to `None` to determine based on each
+          result.
+
+        ### Returns:
+        * `tuple[Color, ...]`: colors of the fade
+        """
+        key = (
+            start.__integer,
+            start.__grayscale,
+            end.__integer,
+            end.__grayscale,
+            steps,
+            enabled,
+        )
+        table = _gradients.get(key)
+        if table is None:
+            if steps < 2:
+                raise ValueError("Gradients require at least 2 steps")
+            table = tuple(
+                Color.fadeHsv(start, end, i / (steps - 1), enabled)
+                for i in range(steps)
+            )
+            if len(_gradients) >= MAX_GRADIENTS:
+                _gradients.clear()
+            _gradients[key] = table
+        return table
+
     def fadeBlack(
         self: 'Color',
         position: float = 0.5,
@@ -758,16 +930,12 @@ class Color:
             return NotImplemented
 
     def __eq__(self, other: object) -> bool:
+        # Only the RGB components are compared
         if isinstance(other, Color):
-            return all([
-                self.red == other.red,
-                self.green == other.green,
-                self.blue == other.blue,
-                # self.grayscale == other.grayscale,
-                # self.enabled == other.enabled,
-            ])
+            return self.__integer == other.__integer
         elif isinstance(other, int):
-            return self == Color.fromInteger(other)
+            # FL Studio sometimes gives negative color integers
+            return self.__integer == other & 0xFFFFFF
         else:
             return NotImplemented
 
@@ -792,19 +960,21 @@ class Color:
     FL_STOP: 'Color'
 
 
-Color.RED = Color.fromRgb(255, 0, 0)
-Color.GREEN = Color.fromRgb(0, 255, 0)
-Color.BLUE = Color.fromRgb(0, 0, 255)
-Color.WHITE = Color.fromGrayscale(1)
-Color.GRAY = Color.fromGrayscale(0.5, enabled=False)
-Color.BLACK = Color()
-
-Color.ENABLED = Color.fromGrayscale(0.7)
-Color.DISABLED = Color.fromGrayscale(0.3, enabled=False)
-
-Color.FL_SONG = Color.fromInteger(0x45F147, 0.6, True)
-Color.FL_SONG_ALT = Color.fromInteger(0x00A0F0, 1.0, True)
-Color.FL_PATTERN = Color.fromInteger(0xF78F41, 0.6, True)
-Color.FL_PATTERN_ALT = Color.fromInteger(0xA43A37, 1.0, True)
-Color.FL_RECORD = Color.fromInteger(0xAF0000, 1.0, True)
-Color.FL_STOP = Color.fromInteger(0xB9413E, 1.0, True)
+# Common colors are interned, so that creating them again returns the same
+# object
+Color.BLACK = Color.intern(Color.fromInteger(0x000000))
+Color.RED = Color.intern(Color.fromRgb(255, 0, 0))
+Color.GREEN = Color.intern(Color.fromRgb(0, 255, 0))
+Color.BLUE = Color.intern(Color.fromRgb(0, 0, 255))
+Color.WHITE = Color.intern(Color.fromGrayscale(1))
+Color.GRAY = Color.intern(Color.fromGrayscale(0.5, enabled=False))
+
+Color.ENABLED = Color.intern(Color.fromGrayscale(0.7))
+Color.DISABLED = Color.intern(Color.fromGrayscale(0.3, enabled=False))
+
+Color.FL_SONG = Color.intern(Color.fromInteger(0x45F147, 0.6, True))
+Color.FL_SONG_ALT = Color.intern(Color.fromInteger(0x00A0F0, 1.0, True))
+Color.FL_PATTERN = Color.intern(Color.fromInteger(0xF78F41, 0.6, True))
+Color.FL_PATTERN_ALT = Color.intern(Color.fromInteger(0xA43A37, 1.0, True))
+Color.FL_RECORD = Color.intern(Color.fromInteger(0xAF0000, 1.0, True))
+Color.FL_STOP = Color.intern(Color.fromInteger(0xB9413E, 1.0, True))
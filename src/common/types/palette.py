@@ -0,0 +1,120 @@
+"""
+common > types > palette
+
+Contains the Palette class, which maps colors to the closest color in a fixed
+set of colors, such as the colors that a device's LEDs are able to display.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from typing import Optional, TypeVar
+from .color import Color
+
+__all__ = [
+    'Palette'
+]
+
+T = TypeVar('T')
+
+# Number of bits of each RGB component used when quantizing colors. Colors
+# are grouped into a cube of (2 ** QUANTIZE_BITS) ** 3 cells, where all colors
+# in a cell are matched to the same palette color.
+QUANTIZE_BITS = 5
+_SHIFT = 8 - QUANTIZE_BITS
+# Offset to move from the corner to the center of a cell
+_CENTER = (1 << _SHIFT) >> 1
+
+
+class Palette(dict[Color, T]):
+    """
+    A mapping between colors and the values used to display them (such as
+    the velocity used to set an LED to that color), which can quickly find the
+    closest palette color to any other color.
+
+    Rather than calculating the distance to every color in the palette each
+    time, the RGB color space is split into a cube of cells, and the closest
+    palette color to the center of each cell is calculated when the cell is
+    first used. Colors that are exactly in the palette always match
+    themselves.
+
+    Palettes shouldn't be modified after they are created.
+
+    ```py
+    COLORS = Palette({
+        Color.fromInteger(0x000000): 0,
+        Color.fromInteger(0xFF0000): 1,
+    })
+    COLORS.lookup(Color.fromInteger(0xEE1100))  # 1
+    ```
+    """
+
+    def __init__(self, colors: dict[Color, T]) -> None:
+        """
+        Create a palette
+
+        ### Args:
+        * `colors` (`dict[Color, T]`): mapping between colors and their
+          values
+        """
+        if len(colors) == 0:
+            raise ValueError("Palette cannot be empty")
+        # Intern palette colors, so that their HSV values are only calculated
+        # once
+        super().__init__({Color.intern(c): v for c, v in colors.items()})
+        self.__colors = list(self.keys())
+        self.__exact = {c.integer: c for c in self.__colors}
+        # Closest palette color to each cell, calculated as cells are used
+        self.__table: list[Optional[Color]] \
+            = [None] * (1 << (QUANTIZE_BITS * 3))
+
+    def closest(self, color: Color, exact: bool = False) -> Color:
+        """
+        Returns the palette color closest to the given color
+
+        ### Args:
+        * `color` (`Color`): color to match
+        * `exact` (`bool`, optional): whether to compare the color against
+          every color in the palette, rather than using the quantized color
+          table. This is slower, but can help with debugging. Defaults to
+          `False`.
+
+        ### Returns:
+        * `Color`: closest palette color
+        """
+        match = self.__exact.get(color.integer)
+        if match is not None:
+            return match
+        if exact:
+            return color.closest(self.__colors)
+        idx = (
+            ((color.red >> _SHIFT) << (QUANTIZE_BITS * 2))
+            | ((color.green >> _SHIFT) << QUANTIZE_BITS)
+            | (color.blue >> _SHIFT)
+        )
+        match = self.__table[idx]
+        if match is None:
+            match = Color.fromRgb(
+                ((color.red >> _SHIFT) << _SHIFT) + _CENTER,
+                ((color.green >> _SHIFT) << _SHIFT) + _CENTER,
+                ((color.blue >> _SHIFT) << _SHIFT) + _CENTER,
+            ).closest(self.__colors)
+            self.__table[idx] = match
+        return match
+
+    def lookup(self, color: Color, exact: bool = False) -> T:
+        """
+        Returns the value of the palette color closest to the given color
+
+        ### Args:
+        * `color` (`Color`): color to match
+        * `exact` (`bool`, optional): whether to compare the color against
+          every color in the palette. Defaults to `False`.
+
+        ### Returns:
+        * `T`: value of the closest palette color
+        """
+        return self[self.closest(color, exact)]
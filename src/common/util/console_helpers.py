@@ -74,6 +74,13 @@ help = ConsoleCommand(
     f" * log(): log a message\n"
     f"    * log.recall([opt] category): recall log entries from a category\n"
     f"    * log.inspect(entry_number): print info about a log entry\n"
+    f"    * log.counts(): print the number of entries in each category\n"
+    f"    * log.watch(category): print entries from a category\n"
+    f" * getContext().profiler: performance profiler, if enabled\n"
+    f"    * inspect(): print total, average and maximum times\n"
+    f"    * percentiles(): print p50, p90, p99 and p99.9 times\n"
+    f"    * reset(): clear recorded times\n"
+    f"    * export(path, [opt] format): export recent profiles to a file\n"
     f" * credits(): print credits for the script\n"
     f" * reset(): reset the script and reload modular components\n"
     f" * pluginParamCheck(): launch the plugin parameter checker interface\n"
@@ -73,6 +73,13 @@ def recursiveMergeDictionaries(
     # when we recurse, effectively making a manual deep copy
     new = ref.copy()
 
+    # Make sure categories that aren't overridden are copied too, so that
+    # modifying the result doesn't modify the reference dictionary
+    for key, ref_value in ref.items():
+        if type(ref_value) is dict and key not in override:
+            key_path = key if path == '' else path + '.' + key
+            new[key] = recursiveMergeDictionaries(ref_value, {}, key_path)
+
     for key, value in override.items():
         # Check for invalid settings value
         if path == '':
@@ -186,6 +193,50 @@ def expandDictShorthand(d: dict[str, Any], path: str = '') -> dict:
     return new
 
 
+def flattenDict(d: dict, path: str = '') -> dict[str, Any]:
+    """
+    Flatten a nested dictionary into a single dictionary, keyed by the dotted
+    path to each value.
+
+    For example,
+    ```py
+    {
+        "foo": {
+            "bar": 1,
+        },
+        "bat": 2
+    }
+    ```
+    would flatten to
+    ```py
+    {
+        "foo.bar": 1,
+        "bat": 2
+    }
+    ```
+
+    As with `recursiveMergeDictionaries`, only values of exactly type `dict`
+    are treated as categories, so that other mapping types can be stored as
+    values.
+
+    ### Args:
+    * `d` (`dict`): dictionary to flatten
+    * `path` (`str`, optional): path of the current dictionary. Defaults to
+      ''.
+
+    ### Returns:
+    * `dict[str, Any]`: flattened dictionary
+    """
+    flat: dict[str, Any] = {}
+    for key, value in d.items():
+        key_path = key if path == '' else path + '.' + key
+        if type(value) is dict:
+            flat.update(flattenDict(value, key_path))
+        else:
+            flat[key_path] = value
+    return flat
+
+
 def greatestKey(d: dict[K, V]) -> K:
     """
     Returns the key which maps to the greatest value
@@ -20,6 +20,44 @@ from common.exceptions import (
     EventDecodeError,
     EventDispatchError,
 )
+from .misc import fnv1a
+
+# Forwarded events use one of two envelopes:
+#
+# * Version 1: `F0 7D <device ID> 00 <device number> <type> <data>`, where the
+#   device ID is an ASCII string.
+# * Version 2: `F0 7D 01 <session handle> <device number> <type> <data>`,
+#   where the session handle is a single byte agreed on by the main and
+#   forwarder scripts during a handshake, which is unique to the device ID.
+#   Since device IDs are printable, the `01` byte can't be the start of a
+#   version 1 envelope.
+#
+# Version 2 is only used once both scripts have shown that they support it,
+# so that they remain compatible with older versions of the script.
+FORWARD_V2 = 0x01
+# Session handle used for control messages, such as the handshake
+FORWARD_CONTROL = 0x7F
+# Types of control messages
+FORWARD_HELLO = 0x00
+"""Sent by forwarder scripts to request a session handle. Data is the number
+of handles used by other devices, followed by those handles, followed by the
+device ID"""
+FORWARD_ANNOUNCE = 0x01
+"""Sent by the main script to give forwarder scripts its session handle. Data
+is the handle, followed by the device ID. A device number of 0 is used when
+announcing to all forwarders. A handle of `FORWARD_CONTROL` means that version
+1 should be used."""
+
+# Event categories of forwarded events
+FORWARD_STANDARD = 0x00
+FORWARD_SYSEX = 0x01
+FORWARD_BATCH = 0x02
+"""Multiple events packed into one forwarded event. Only used with the version
+2 envelope. Data is a sequence of entries, each starting with its category:
+
+* standard events: `00 <data2> <data1> <status>`
+* sysex events: `01 <length (high 7 bits)> <length (low 7 bits)> <sysex>`
+"""
 
 
 def getDeviceId() -> str:
@@ -43,6 +81,23 @@ def getDeviceNum() -> int:
     return common.getContext().getDevice().getDeviceNumber()
 
 
+def getSessionHandle(device_id: str) -> int:
+    """
+    Returns the session handle preferred by the main script for forwarded
+    events with the version 2 envelope. Since different device IDs can have
+    the same preferred handle, the handle that is actually used is decided
+    during the handshake.
+
+    ### Args:
+    * `device_id` (`str`): ID of the device
+
+    ### Returns:
+    * `int`: session handle
+    """
+    # Exclude the handle used for control messages
+    return fnv1a(device_id.encode()) % FORWARD_CONTROL
+
+
 def isEventForwarded(event: FlMidiMsg) -> bool:
     """
     Returns whether an event was forwarded from the Universal Event Forwarder
@@ -72,11 +127,174 @@ def getForwardedEventHeader() -> bytes:
     ### Returns:
     * `bytes`: event header
     """
-    return bytes([
-        0xF0,  # Start sysex
-        0x7D  # Non-commercial sysex ID
-    ]) + getDeviceId().encode() \
-       + bytes([0])
+    return common.getContext().getDevice().getForwardedPrefix()
+
+
+def isEventForwardedV2(event: FlMidiMsg) -> bool:
+    """
+    Returns whether a forwarded event uses the version 2 envelope
+
+    ### Args:
+    * `event` (`FlMidiMsg`): forwarded event
+
+    ### Returns:
+    * `bool`: whether it uses version 2
+    """
+    assert isMidiMsgSysex(event)
+    return event.sysex[2] == FORWARD_V2
+
+
+def isForwardControlMessage(event: FlMidiMsg) -> bool:
+    """
+    Returns whether an event is a forwarding control message, such as a
+    handshake message
+
+    ### Args:
+    * `event` (`FlMidiMsg`): event to check
+
+    ### Returns:
+    * `bool`: whether it is a control message
+    """
+    return (
+        isEventForwarded(event)
+        and len(event.sysex) > 5
+        and event.sysex[2] == FORWARD_V2
+        and event.sysex[3] == FORWARD_CONTROL
+    )
+
+
+def getForwardedEventHeaderV2(handle: int, device_num: int) -> bytes:
+    """
+    Returns a header for a forwarded event using the version 2 envelope
+
+    ### Args:
+    * `handle` (`int`): session handle
+    * `device_num` (`int`): device number
+
+    ### Returns:
+    * `bytes`: event header, up to (but not including) the type byte
+    """
+    return bytes([0xF0, 0x7D, FORWARD_V2, handle, device_num])
+
+
+def encodeForwardControl(kind: int, device_num: int, data: bytes) -> bytes:
+    """
+    Encode a forwarding control message
+
+    ### Args:
+    * `kind` (`int`): type of control message
+    * `device_num` (`int`): device number that the message is from or
+      directed to
+    * `data` (`bytes`): data of the message
+
+    ### Returns:
+    * `bytes`: encoded message
+    """
+    return getForwardedEventHeaderV2(FORWARD_CONTROL, device_num) \
+        + bytes([kind]) + data + bytes([0xF7])
+
+
+def decodeForwardControl(event: FlMidiMsg) -> tuple[int, int, bytes]:
+    """
+    Decode a forwarding control message
+
+    ### Args:
+    * `event` (`FlMidiMsg`): control message
+
+    ### Returns:
+    * `tuple[int, int, bytes]`: type of message, device number and data
+    """
+    assert isMidiMsgSysex(event)
+    return event.sysex[5], event.sysex[4], bytes(event.sysex[6:-1])
+
+
+def encodeForwardedBatchEntry(event: FlMidiMsg) -> bytes:
+    """
+    Encode an event as an entry of a forwarded batch
+
+    ### Args:
+    * `event` (`FlMidiMsg`): event to encode
+
+    ### Returns:
+    * `bytes`: encoded entry
+    """
+    if isMidiMsgStandard(event):
+        return bytes([
+            FORWARD_STANDARD,
+            event.data2,
+            event.data1,
+            event.status,
+        ])
+    else:
+        if TYPE_CHECKING:
+            assert isMidiMsgSysex(event)
+        length = len(event.sysex)
+        if length >= 1 << 14:
+            raise EventEncodeError(
+                f"Sysex event too long to batch ({length} bytes)")
+        return bytes([FORWARD_SYSEX, length >> 7, length & 0x7F]) \
+            + bytes(event.sysex)
+
+
+def encodeForwardedBatch(
+    entries: list[bytes],
+    handle: int,
+    device_num: int,
+) -> bytes:
+    """
+    Encode a batch of events to forward using the version 2 envelope
+
+    ### Args:
+    * `entries` (`list[bytes]`): entries, as given by
+      `encodeForwardedBatchEntry`
+    * `handle` (`int`): session handle
+    * `device_num` (`int`): device number to target
+
+    ### Returns:
+    * `bytes`: encoded batch
+    """
+    return getForwardedEventHeaderV2(handle, device_num) \
+        + bytes([FORWARD_BATCH]) + b''.join(entries) + bytes([0xF7])
+
+
+def isForwardedBatch(event: FlMidiMsg) -> bool:
+    """
+    Returns whether a forwarded event is a batch of events
+
+    ### Args:
+    * `event` (`FlMidiMsg`): forwarded event
+
+    ### Returns:
+    * `bool`: whether it is a batch
+    """
+    return isEventForwardedV2(event) and event.sysex[5] == FORWARD_BATCH
+
+
+def decodeForwardedBatch(event: FlMidiMsg) -> list[FlMidiMsg]:
+    """
+    Decode the events in a forwarded batch, in the order they were sent
+
+    ### Args:
+    * `event` (`FlMidiMsg`): forwarded batch
+
+    ### Returns:
+    * `list[FlMidiMsg]`: decoded events
+    """
+    assert isMidiMsgSysex(event)
+    sysex = event.sysex
+    events = []
+    i = 6
+    # Last byte is the terminator of the batch
+    end = len(sysex) - 1
+    while i < end:
+        if sysex[i] == FORWARD_STANDARD:
+            events.append(FlMidiMsg(sysex[i + 3], sysex[i + 2], sysex[i + 1]))
+            i += 4
+        else:
+            length = (sysex[i + 1] << 7) + sysex[i + 2]
+            events.append(FlMidiMsg(list(sysex[i + 3:i + 3 + length])))
+            i += 3 + length
+    return events
 
 
 def encodeForwardedEvent(event: FlMidiMsg, device_num: int = -1) -> bytes:
@@ -105,19 +323,25 @@ def encodeForwardedEvent(event: FlMidiMsg, device_num: int = -1) -> bytes:
                 "number is unspecified"
             )
 
-    sysex = getForwardedEventHeader() + bytes([device_num])
+    context = common.getContext()
+    handle = context.forwarding.getHandle(device_num)
+    if handle is None:
+        sysex = context.getDevice().getForwardedHeader(device_num)
+    else:
+        sysex = getForwardedEventHeaderV2(handle, device_num)
 
     if isMidiMsgStandard(event):
-        return sysex + bytes([0]) + bytes([
+        return sysex + bytes((
+            FORWARD_STANDARD,
             event.data2,
             event.data1,
             event.status,
-            0xF7
-        ])
+            0xF7,
+        ))
     else:
         if TYPE_CHECKING:  # TODO: Find a way to make this unnecessary
             assert isMidiMsgSysex(event)
-        return sysex + bytes([1]) + bytes(event.sysex)
+        return sysex + bytes([FORWARD_SYSEX]) + bytes(event.sysex)
 
 
 def _getForwardedNameEndIdx(event: FlMidiMsg) -> int:
@@ -145,6 +369,11 @@ def getEventForwardedTo(event: FlMidiMsg) -> str:
     * `str`: device name
     """
     assert isMidiMsgSysex(event)
+    if isEventForwardedV2(event):
+        raise EventInspectError(
+            "Events forwarded with the version 2 envelope don't contain the "
+            "device ID"
+        )
     return event.sysex[2:_getForwardedNameEndIdx(event)].decode()
 
 
@@ -162,12 +391,11 @@ def isEventForwardedHere(event: FlMidiMsg) -> bool:
     if not isEventForwarded(event):
         return False
 
-    if (
-        getEventForwardedTo(event)
-        != getDeviceId()
-    ):
-        return False
-    return True
+    if isEventForwardedV2(event):
+        handle = common.getContext().forwarding.handle
+        return handle is not None and event.sysex[3] == handle
+
+    return event.sysex.startswith(getForwardedEventHeader())
 
 
 def getEventDeviceNum(event: FlMidiMsg) -> int:
@@ -181,6 +409,8 @@ def getEventDeviceNum(event: FlMidiMsg) -> int:
     * `int`: device number
     """
     assert isMidiMsgSysex(event)
+    if isEventForwardedV2(event):
+        return event.sysex[4]
     return event.sysex[_getForwardedNameEndIdx(event) + 1]
 
 
@@ -205,13 +435,17 @@ def isEventForwardedHereFrom(event: FlMidiMsg, device_num: int = -1) -> bool:
                 "No target device specified from main script"
             )
 
-    if not isEventForwardedHere(event):
+    if not isEventForwarded(event):
         return False
 
-    if device_num != getEventDeviceNum(event):
-        return False
+    if isEventForwardedV2(event):
+        # The header can be checked with a single comparison
+        handle = common.getContext().forwarding.handle
+        return handle is not None and event.sysex[:5] \
+            == getForwardedEventHeaderV2(handle, device_num)
 
-    return True
+    return event.sysex.startswith(
+        common.getContext().getDevice().getForwardedHeader(device_num))
 
 
 def decodeForwardedEvent(event: FlMidiMsg, type_idx: int = -1) -> FlMidiMsg:
@@ -233,7 +467,14 @@ def decodeForwardedEvent(event: FlMidiMsg, type_idx: int = -1) -> FlMidiMsg:
         raise EventDecodeError(f"Event not forwarded: {eventToString(event)}")
     assert isMidiMsgSysex(event)
     if type_idx == -1:
-        type_idx = _getForwardedNameEndIdx(event) + 2
+        if isEventForwardedV2(event):
+            type_idx = 5
+        else:
+            type_idx = _getForwardedNameEndIdx(event) + 2
+
+    if event.sysex[type_idx] == FORWARD_BATCH:
+        raise EventDecodeError(
+            "Forwarded batches should be decoded using decodeForwardedBatch")
 
     if event.sysex[type_idx]:
         # Remaining bytes are sysex data
@@ -251,6 +492,9 @@ def forwardEvent(event: FlMidiMsg, device_num: int = -1):
     """
     Encode a forwarded event and send it to all available devices
 
+    If the target device supports it, the event is added to a batch, which is
+    sent at the end of the current tick or event.
+
     ### Args:
     * `event` (`FlMidiMsg`): event to encode and forward
     * `device_num` (`int`, optional): target device number if on main script
@@ -261,13 +505,15 @@ def forwardEvent(event: FlMidiMsg, device_num: int = -1):
             raise EventEncodeError(
                 "No target device specified from main script"
             )
-    output = encodeForwardedEvent(event, device_num)
     # Dispatch to all available devices
     if device.dispatchReceiverCount() == 0:
         raise EventDispatchError(
             f"Unable to forward event to/from device {device_num}."
             f" Is the controller configured correctly?"
         )
+    if common.getContext().forwarding.queue(event, device_num):
+        return
+    output = encodeForwardedEvent(event, device_num)
     for i in range(device.dispatchReceiverCount()):
         device.dispatch(i, 0xF0, output)
 
@@ -320,7 +566,16 @@ def eventToString(event: FlMidiMsg) -> str:
         assert isMidiMsgSysex(event)
         if not isEventForwarded(event):
             return bytesToString(event.sysex)
-        dev = getEventForwardedTo(event)
+        if isForwardControlMessage(event):
+            return f"Forward control {bytesToString(event.sysex)}"
+        if isEventForwardedV2(event):
+            dev = f"#{event.sysex[3]}"
+        else:
+            dev = getEventForwardedTo(event)
         num = getEventDeviceNum(event)
+        if isForwardedBatch(event):
+            decoded = ', '.join(
+                eventToString(e) for e in decodeForwardedBatch(event))
+            return f"{dev}@{num} => [{decoded}]"
         decoded = eventToString(decodeForwardedEvent(event))
         return f"{dev}@{num} => {decoded})"
@@ -99,3 +99,23 @@ def clamp(value: float, lower: float, upper: float) -> float:
     * `float`: clamped value
     """
     return min(max(value, lower), upper)
+
+
+def fnv1a(data: 'bytes | list[int]') -> int:
+    """
+    Returns the 32-bit FNV-1a hash of some data.
+
+    Unlike the built-in `hash` function, this gives the same result every
+    time the script runs, so it can be used for values that are stored or
+    shared between scripts.
+
+    ### Args:
+    * `data` (`bytes | list[int]`): data to hash
+
+    ### Returns:
+    * `int`: hash
+    """
+    h = 0x811c9dc5
+    for b in data:
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
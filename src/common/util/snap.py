@@ -28,7 +28,8 @@ def snap(value: float, to: float) -> float:
     * `float`: snapped value
     """
 
-    if not common.getContext().settings.get("plugins.general.do_snap"):
+    if not common.getContext().settings.handle(
+            "plugins.general.do_snap").value:
         return value
 
     if abs(value - to) <= SNAP_AMOUNT:
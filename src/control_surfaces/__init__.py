@@ -16,6 +16,7 @@ __all__ = [
     'ControlSurface',
     'IControlShadow',
     'ControlShadow',
+    'ControlShadowStore',
     'NullControlShadow',
     'ControlShadowList',
     # Control mappings
@@ -194,6 +195,7 @@ from .controls import (
 from .control_shadow import (
     IControlShadow,
     ControlShadow,
+    ControlShadowStore,
     NullControlShadow,
     ControlShadowList,
 )
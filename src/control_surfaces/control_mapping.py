@@ -14,8 +14,8 @@ more details.
 
 from abc import abstractmethod
 from fl_classes import FlMidiMsg
-from typing import TYPE_CHECKING
-from time import time
+from typing import TYPE_CHECKING, Optional
+from time import monotonic
 
 if TYPE_CHECKING:
     from . import ControlSurface
@@ -27,6 +27,7 @@ class IControlHash:
     Interface for values where their hashes map to a ControlSurface or
     ControlShadow
     """
+    __slots__ = ()
 
     @abstractmethod
     def __hash__(self) -> int:
@@ -49,6 +50,7 @@ class ControlMapping(IControlHash):
     Defines a mapping to a control surface, which has the property that
     different instances of a mapping to the same control have the same hash.
     """
+    __slots__ = ('_map_to',)
 
     def __init__(
         self,
@@ -75,6 +77,14 @@ class ControlEvent(IControlHash):
     surface). Contains info on the channel and value of the event that was
     fired.
     """
+    __slots__ = (
+        '_map_to',
+        'midi',
+        'value',
+        'channel',
+        'double',
+        'press_length',
+    )
 
     def __init__(
         self,
@@ -83,20 +93,43 @@ class ControlEvent(IControlHash):
         value: float,
         channel: int,
         double: bool,
+        timestamp: Optional[float] = None,
     ) -> None:
-        self._midi = midi
+        """
+        Create a control event
+
+        ### Args:
+        * `midi` (`FlMidiMsg`): MIDI message that triggered the event
+        * `map_to` (`ControlSurface`): control that was matched
+        * `value` (`float`): value of the control
+        * `channel` (`int`): channel of the event
+        * `double` (`bool`): whether the event is a double press
+        * `timestamp` (`float`, optional): monotonic time at which the event
+          was matched, so that the clock doesn't need to be checked again.
+          Defaults to the current time.
+        """
         self._map_to = map_to
-        self._value = value
-        self._channel = channel
-        self._double = double
-        self._press_length = (
-            0.0
-            if map_to.isPress(value)
-            else time() - map_to.last_pressed
-        )
+        # MIDI message associated with the event, which can be used to modify
+        # the original event if required.
+        self.midi = midi
+        # Value of this event, between `0-1.0`
+        self.value = value
+        # Channel that this event was fired from.
+        # `-1` if not an event, or not associated with a channel
+        self.channel = channel
+        # Whether this event is a double press or not
+        self.double = double
+        # How long the control was pressed for, or 0 if the control isn't
+        # currently pressed.
+        if map_to.isPress(value):
+            self.press_length = 0.0
+        else:
+            if timestamp is None:
+                timestamp = monotonic()
+            self.press_length = timestamp - map_to.last_pressed
 
     def __repr__(self) -> str:
-        return f"ControlEvent({self._map_to}, {self._value})"
+        return f"ControlEvent({self._map_to}, {self.value})"
 
     def __hash__(self) -> int:
         return hash(self._map_to)
@@ -110,19 +143,6 @@ class ControlEvent(IControlHash):
     def getControl(self) -> 'ControlSurface':
         return self._map_to
 
-    @property
-    def midi(self) -> FlMidiMsg:
-        """MIDI message associated with the event, which can be used to modify
-        the original event if required.
-        """
-        return self._midi
-
-    @property
-    def value(self) -> float:
-        """Value of this event, between `0-1.0`
-        """
-        return self._value
-
     @property
     def value_midi(self) -> int:
         """
@@ -139,33 +159,12 @@ class ControlEvent(IControlHash):
         """
         return round(self.value * (2 ** 16))
 
-    @property
-    def channel(self) -> int:
-        """Channel that this event was fired from.
-        `-1` if not an event, or not associated with a channel
-        """
-        return self._channel
-
-    @property
-    def double(self) -> bool:
-        """Whether this event is a double press or not
-        """
-        return self._double
-
     @property
     def coordinate(self) -> tuple[int, int]:
         """Coordinate of the control (row, column)
         """
         return self._map_to.coordinate
 
-    @property
-    def press_length(self) -> float:
-        """
-        How long the control was pressed for, or 0 if the control isn't
-        currently pressed.
-        """
-        return self._press_length
-
 
 class ControlShadowEvent(IControlHash):
     """
@@ -175,6 +174,7 @@ class ControlShadowEvent(IControlHash):
     Used to represent a single event within the context of plugins, allowing
     for info about this event to be managed.
     """
+    __slots__ = ('_map_from', '_map_to')
 
     def __init__(
         self,
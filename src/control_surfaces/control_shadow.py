@@ -11,7 +11,8 @@ This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
 
-from typing import TYPE_CHECKING, Iterator, overload
+from array import array
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence, overload
 from typing_extensions import TypeGuard
 from common.types import Color
 from .control_mapping import ControlMapping
@@ -30,6 +31,7 @@ class IControlShadow:
     class, but is separate so that a NullControlShadow can be defined, which
     simplifies performing quick assignments of control properties.
     """
+    __slots__ = ()
 
     def isBound(self) -> TypeGuard['ControlShadow']:  # type: ignore
         """
@@ -157,30 +159,170 @@ class IControlShadow:
         return self
 
 
+class ControlShadowStore:
+    """
+    Storage for the state of a set of control shadows.
+
+    Rather than each control shadow owning its own color, annotation and value
+    objects, the state is stored in parallel arrays, indexed by the position
+    of the control. Each `ControlShadow` is a lightweight view into a single
+    index of these arrays, which is only created when the control is first
+    used, meaning that creating a copy of a device shadow only requires
+    allocating a few arrays.
+    """
+
+    def __init__(
+        self,
+        controls: 'Sequence[ControlSurface]',
+        _template: 'Optional[ControlShadowStore]' = None,
+    ) -> None:
+        """
+        Create storage for shadows of the given controls
+
+        ### Args:
+        * `controls` (`Sequence[ControlSurface]`): controls to shadow
+        """
+        if _template is None:
+            self.controls = list(controls)
+        else:
+            # The controls never change, so they can be shared
+            self.controls = _template.controls
+        num = len(self.controls)
+        # Packed 0xRRGGBB colors, with grayscale and enabled values stored
+        # separately so that colors can be rebuilt exactly
+        self.rgb = array('l', bytes(array('l').itemsize * num))
+        self.grayscale = array('d', bytes(array('d').itemsize * num))
+        self.enabled = bytearray(num)
+        self.annotations = [''] * num
+        self.values = array('d', bytes(array('d').itemsize * num))
+        self.changed = bytearray(num)
+        self.connected = bytearray(b'\x01' * num)
+        # Views of the controls that have been used, by index
+        self._shadows: dict[int, ControlShadow] = {}
+
+    def __len__(self) -> int:
+        return len(self.controls)
+
+    def getShadow(self, index: int) -> 'ControlShadow':
+        """
+        Returns the shadow of the control at the given index, creating it if
+        it hasn't been used yet
+
+        ### Args:
+        * `index` (`int`): index of the control
+
+        ### Returns:
+        * `ControlShadow`: control shadow
+        """
+        shadow = self._shadows.get(index)
+        if shadow is None:
+            shadow = ControlShadow(self, index)
+            self._shadows[index] = shadow
+        return shadow
+
+    @property
+    def shadows(self) -> 'list[ControlShadow]':
+        """
+        Shadows of all the controls in the store. This creates the shadows of
+        any controls that haven't been used yet, so should be avoided on hot
+        paths.
+        """
+        return [self.getShadow(i) for i in range(len(self.controls))]
+
+    def indexOf(self, shadow: IControlShadow) -> Optional[int]:
+        """
+        Returns the index of a control shadow within this store
+
+        ### Args:
+        * `shadow` (`IControlShadow`): control shadow
+
+        ### Returns:
+        * `Optional[int]`: index, or `None` if the shadow belongs to a
+          different store
+        """
+        if isinstance(shadow, ControlShadow) and shadow._store is self:
+            return shadow._index
+        return None
+
+    def getColor(self, index: int) -> Color:
+        """
+        Returns the color of the control at the given index
+
+        ### Args:
+        * `index` (`int`): index of the control
+
+        ### Returns:
+        * `Color`: color
+        """
+        rgb = self.rgb[index]
+        enabled = self.enabled[index]
+        grayscale = self.grayscale[index]
+        # Avoid creating a new object for the default color
+        if rgb == 0 and not enabled and grayscale == 0.0:
+            return Color.BLACK
+        return Color.fromInteger(rgb, grayscale, bool(enabled))
+
+    def apply(self, index: int) -> None:
+        """
+        Apply the state of the control at the given index to the control,
+        unless it is disconnected
+
+        ### Args:
+        * `index` (`int`): index of the control
+        """
+        if not self.connected[index]:
+            return
+        control = self.controls[index]
+        control.color = self.getColor(index)
+        control.annotation = self.annotations[index]
+        control.value = self.values[index]
+        self.changed[index] = False
+
+    def applyAll(self) -> None:
+        """
+        Apply the state of all the controls in the store, without creating
+        their shadows
+        """
+        for i in range(len(self.controls)):
+            self.apply(i)
+
+    def blank(self) -> 'ControlShadowStore':
+        """
+        Create a new store for the same controls, with the default state for
+        each control. Only the list of controls is shared with this store.
+
+        ### Returns:
+        * `ControlShadowStore`: new store
+        """
+        return ControlShadowStore(self.controls, self)
+
+
 class ControlShadow(IControlShadow):
     """
     A class that acts as a "shadow" to a physical control surface. This allows
     plugins to control properties of a control surface, with those changes
     only being applied if required.
 
-    This is the class representing a real control.
+    This is the class representing a real control. Its state is stored within
+    a `ControlShadowStore`, which is shared with the other controls of the
+    device shadow.
     """
+    __slots__ = ('_store', '_index', '_control')
 
-    def __init__(self, control: 'ControlSurface') -> None:
+    def __init__(self, store: ControlShadowStore, index: int) -> None:
         """
-        Create an event object
+        Create a control shadow
 
-        This should be called when recognizing an event
+        This is called by the `ControlShadowStore` when the control is first
+        used
 
         ### Args:
-        * `control` (`ControlSurface`): control associated with this event
+        * `store` (`ControlShadowStore`): storage for the shadow's state
+        * `index` (`int`): index of the control within the store
         """
-        self._control = control
-        self._value = 0.0
-        self._color = Color()
-        self._annotation = ""
-        self._changed = False
-        self._connected = True
+        self._store = store
+        self._index = index
+        self._control = store.controls[index]
 
     def __repr__(self) -> str:
         return f"Shadow of {self._control}"
@@ -206,11 +348,11 @@ class ControlShadow(IControlShadow):
         Represents whether this control is connected. If this is set to False,
         the control will not push its properties to the control when applying.
         """
-        return self._connected
+        return bool(self._store.connected[self._index])
 
     @connected.setter
     def connected(self, val: bool):
-        self._connected = val
+        self._store.connected[self._index] = val
 
     @property
     def value(self) -> float:
@@ -218,18 +360,19 @@ class ControlShadow(IControlShadow):
         Represents the value that will be applied to the control after
         the event has been processed, as a float between 0-1
         """
-        return self._value
+        return self._store.values[self._index]
 
     @value.setter
     def value(self, newVal: float) -> None:
-        if self._value != newVal:
+        values = self._store.values
+        if values[self._index] != newVal:
             if not (0 <= newVal <= 1):
                 raise ValueError(
                     f"Value must be within range 0-1 ({newVal}) @ "
                     f"{self}"
                 )
-            self._value = newVal
-            self._changed = True
+            values[self._index] = newVal
+            self._store.changed[self._index] = True
 
     @property
     def color(self) -> Color:
@@ -237,13 +380,18 @@ class ControlShadow(IControlShadow):
         Represents the color that will be applied to the control after the
         event has been processed.
         """
-        return self._color
+        return self._store.getColor(self._index)
 
     @color.setter
     def color(self, newColor: Color) -> None:
-        if self._color != newColor:
-            self._color = newColor
-            self._changed = True
+        store = self._store
+        i = self._index
+        rgb = newColor.integer
+        if store.rgb[i] != rgb:
+            store.rgb[i] = rgb
+            store.grayscale[i] = newColor.grayscale
+            store.enabled[i] = newColor.enabled
+            store.changed[i] = True
 
     @property
     def annotation(self) -> str:
@@ -251,13 +399,14 @@ class ControlShadow(IControlShadow):
         Represents the annotation that will be applied to the control after the
         event has been processed.
         """
-        return self._annotation
+        return self._store.annotations[self._index]
 
     @annotation.setter
     def annotation(self, newAnnotation: str) -> None:
-        if self._annotation != newAnnotation:
-            self._annotation = newAnnotation
-            self._changed = True
+        annotations = self._store.annotations
+        if annotations[self._index] != newAnnotation:
+            annotations[self._index] = newAnnotation
+            self._store.changed[self._index] = True
 
     @property
     def coordinate(self) -> tuple[int, int]:
@@ -335,16 +484,9 @@ class ControlShadow(IControlShadow):
     def apply(self) -> None:
         """
         Apply the configuration of the control shadow to the control it
-        representsApply the configuration of the control shadow to the control
-        it represents
+        represents
         """
-        # If this control shadow is disconnected, don't do anything
-        if not self._connected:
-            return
-        self._control.color = self.color
-        self._control.annotation = self.annotation
-        self._control.value = self.value
-        self._changed = False
+        self._store.apply(self._index)
 
 
 class NullControlShadow(IControlShadow):
@@ -358,6 +500,8 @@ class NullControlShadow(IControlShadow):
     properties can be set easily in simple plugins, without the need for type
     checking.
     """
+    __slots__ = ()
+
     @property
     def value(self) -> float:
         """
@@ -13,10 +13,11 @@ more details.
 # from __future__ import annotations
 
 from fl_classes import FlMidiMsg
-from time import time
+from time import monotonic
 from typing import Optional, final
 from abc import abstractmethod
 from common import getContext
+from common.output_queue import FEEDBACK_TIME, backgroundOutput
 from common.util.abstract_method_error import AbstractMethodError
 from common.types import Color
 from control_surfaces.event_patterns import NullPattern
@@ -34,12 +35,43 @@ from ..managers import (
 )
 
 
+def getDoublePressTime() -> float:
+    """
+    Returns the `controls.double_press_time` setting, using a handle so that
+    it doesn't need to be looked up in the settings on every press.
+
+    ### Returns:
+    * `float`: double press time in seconds
+    """
+    time: float = getContext().settings.handle(
+        "controls.double_press_time").value
+    return time
+
+
 class ControlSurface:
     """
     Defines an abstract base class for a control surface.
 
     This class is extended by all other control surfaces.
     """
+    __slots__ = (
+        '__pattern',
+        '__color',
+        '__prev_color',
+        '__prev_annotation',
+        '__value',
+        '__prev_value',
+        '__value_strategy',
+        '__annotation_manager',
+        '__color_manager',
+        '__value_manager',
+        'coordinate',
+        'annotation',
+        'needs_update',
+        'got_update',
+        'last_pressed',
+        'last_tweaked',
+    )
 
     @staticmethod
     @abstractmethod
@@ -115,18 +147,26 @@ class ControlSurface:
         self.__pattern = event_pattern
         self.__color = Color()
         self.__prev_color = Color()
-        self.__annotation = ""
+        # Represents the annotation of the control
+        # On compatible controllers, this can be displayed as text near the
+        # control.
+        self.annotation = ""
         self.__prev_annotation = ""
         self.__value = 0.0
         self.__prev_value = 0.0
         if value_strategy is None:
             value_strategy = NullStrategy()
         self.__value_strategy = value_strategy
-        self.__coord = coordinate
+        # Coordinate of the control (row, column). This shouldn't be modified.
+        self.coordinate = coordinate
 
         # Attributes to make our pressed thing work better
-        self.__needs_update = False
-        self.__got_update = False
+        # Represents whether the value of the control has changed since the
+        # last time the color was set.
+        self.needs_update = False
+        # Represents whether the value of the control has changed since the
+        # last time the color was set, and was since updated.
+        self.got_update = False
 
         # Managers for control
         if annotation_manager is not None:
@@ -142,17 +182,17 @@ class ControlSurface:
         else:
             self.__value_manager = DummyValueManager()
 
-        # The time that this control was pressed last
-        self.__last_press_time = 0.0
-        # The time that this control was tweaked last
-        self.__last_tweak_time = 0.0
+        # The time that this control was pressed last (monotonic time)
+        self.last_pressed = 0.0
+        # The time that this control was tweaked last (monotonic time)
+        self.last_tweaked = 0.0
 
     def __repr__(self) -> str:
         """
         String representation of the control surface
         """
         return \
-            f"{self.__class__}, ({self.__coord}, {self.value})"
+            f"{self.__class__}, ({self.coordinate}, {self.value})"
 
     @final
     def getPattern(self) -> IEventPattern:
@@ -197,30 +237,31 @@ class ControlSurface:
             self.__value = self.__value_strategy.getValueFromEvent(
                 event, self.__value)
             channel = self.__value_strategy.getChannelFromEvent(event)
-            self.__needs_update = True
-            self.__got_update = False
-            t = time()
-            self.__last_tweak_time = t
+            self.needs_update = True
+            self.got_update = False
+            # Only check the time once per message
+            t = monotonic()
+            self.last_tweaked = t
             if self.isPress(self.value):
-                double_press = t - self.__last_press_time \
-                    <= getContext().settings.get("controls.double_press_time")
-                self.__last_press_time = t
+                double_press = \
+                    t - self.last_pressed <= getDoublePressTime()
+                self.last_pressed = t
             else:
                 double_press = False
-            return ControlEvent(event, self, self.value, channel, double_press)
+            return ControlEvent(
+                event,
+                self,
+                self.value,
+                channel,
+                double_press,
+                t,
+            )
         else:
             return None
 
     ###########################################################################
     # Properties
 
-    @property
-    def coordinate(self) -> tuple[int, int]:
-        """
-        Coordinate of the control (row, column). Read only.
-        """
-        return self.__coord
-
     @property
     def color(self) -> Color:
         """
@@ -233,25 +274,10 @@ class ControlSurface:
 
     @color.setter
     def color(self, c: Color):
-        self.__got_update = True
+        self.got_update = True
         if self.__color != c:
             self.__color = c
 
-    @property
-    def annotation(self) -> str:
-        """
-        Represents the annotation of the control
-
-        On compatible controllers, this can be displayed as text near the
-        control.
-        """
-        return self.__annotation
-
-    @annotation.setter
-    def annotation(self, a: str):
-        if self.__annotation != a:
-            self.__annotation = a
-
     @property
     def value(self) -> float:
         """
@@ -274,8 +300,8 @@ class ControlSurface:
             )
         if self.__value != val:
             self.__value = val
-            self.__needs_update = True
-            self.__got_update = False
+            self.needs_update = True
+            self.got_update = False
 
     @property
     def value_midi(self) -> int:
@@ -301,42 +327,6 @@ class ControlSurface:
     def value_rec(self, val: int) -> None:
         self.value = val / (2 ** 16)
 
-    @property
-    def needs_update(self) -> bool:
-        """
-        Represents whether the value of the control has changed since the last
-        time the color was set.
-        """
-        return self.__needs_update
-
-    @property
-    def got_update(self) -> bool:
-        """
-        Represents whether the value of the control has changed since the last
-        time the color was set, and was since updated.
-        """
-        return self.__got_update
-
-    @property
-    def last_pressed(self) -> float:
-        """
-        Returns the last time that the control was pressed
-
-        ### Returns:
-        * `float`: unix time of last tweak
-        """
-        return self.__last_press_time
-
-    @property
-    def last_tweaked(self) -> float:
-        """
-        Returns the last time that the control was tweaked
-
-        ### Returns:
-        * `float`: unix time of last tweak
-        """
-        return self.__last_tweak_time
-
     @property
     def press_length(self) -> float:
         """
@@ -344,7 +334,7 @@ class ControlSurface:
         currently pressed.
         """
         if self.value:
-            return time() - self.__last_press_time
+            return monotonic() - self.last_pressed
         return 0.0
 
     ###########################################################################
@@ -361,27 +351,46 @@ class ControlSurface:
         ### Args:
         * thorough (`bool`): Whether a full tick should be done.
         """
-        # If it's a thorough tick, force all the properties to update on the
-        # device
-        # Otherwise, only update them if they need it (ie the property changed)
-        if thorough or self.__color != self.__prev_color:
-            self.__color_manager.onColorChange(self.color)
-        if thorough or self.__annotation != self.__prev_annotation:
-            self.__annotation_manager.onAnnotationChange(self.annotation)
-        if thorough or self.__value != self.__prev_value:
-            self.__value_manager.onValueChange(self.value)
+        # Update properties on the device if they changed. Changes are only
+        # treated as feedback if the control was used recently. Otherwise
+        # (eg when a plugin repaints the whole device), they are background
+        # refreshes, so that they don't delay feedback for other controls.
+        color_changed = self.__color != self.__prev_color
+        annotation_changed = self.annotation != self.__prev_annotation
+        value_changed = self.__value != self.__prev_value
+        if color_changed or annotation_changed or value_changed:
+            last_used = max(self.last_pressed, self.last_tweaked)
+            with backgroundOutput(monotonic() - last_used > FEEDBACK_TIME):
+                if color_changed:
+                    self.__color_manager.onColorChange(self.color)
+                if annotation_changed:
+                    self.__annotation_manager.onAnnotationChange(
+                        self.annotation)
+                if value_changed:
+                    self.__value_manager.onValueChange(self.value)
+        # If it's a thorough tick, force the other properties to update as
+        # background refreshes
+        if thorough:
+            with backgroundOutput():
+                if not color_changed:
+                    self.__color_manager.onColorChange(self.color)
+                if not annotation_changed:
+                    self.__annotation_manager.onAnnotationChange(
+                        self.annotation)
+                if not value_changed:
+                    self.__value_manager.onValueChange(self.value)
         self.tick()
         self.__color_manager.tick()
         self.__annotation_manager.tick()
         self.__value_manager.tick()
-        if self.__got_update:
-            self.__needs_update = False
-            self.__got_update = False
+        if self.got_update:
+            self.needs_update = False
+            self.got_update = False
         self.__prev_color = self.__color
         # Set color back to off, so that we don't have to worry about things
         # not getting updated correctly
         self.__color = Color()
-        self.__prev_annotation = self.__annotation
+        self.__prev_annotation = self.annotation
         self.__prev_value = self.__value
 
     def tick(self) -> None:
@@ -19,16 +19,5 @@ __all__ = [
 from .device import Device
 from .device_shadow import DeviceShadow, EventCallback
 
-# Device manufacturers
-from . import (
-    akai,
-    novation,
-    maudio,
-    korg,
-)
-del (
-    akai,
-    novation,
-    maudio,
-    korg,
-)
+# Device manufacturers are imported lazily by the extension manager, using
+# the manifest at `common/extension_manager/manifest.py`
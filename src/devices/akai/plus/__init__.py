@@ -9,7 +9,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-
-__all__ = ['mpk_mini_plus']
-
-from . import (mpk_mini_plus)
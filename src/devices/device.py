@@ -12,12 +12,15 @@ more details.
 """
 # from __future__ import annotations
 
+import re
 from typing import Optional, final
+from common.context_manager import getContext
+from common.output_queue import OutputQueue
 from common.profiler import profilerDecoration, ProfilerContext
 from common.util.abstract_method_error import AbstractMethodError
 from control_surfaces.event_patterns import IEventPattern
 from fl_classes import FlMidiMsg
-from control_surfaces import ControlShadow
+from control_surfaces import ControlShadow, ControlShadowStore
 
 from control_surfaces import ControlEvent
 from control_surfaces.matchers import IControlMatcher
@@ -79,6 +82,12 @@ class Device:
         * `control_matcher` (`IControlMatcher`): Control matching strategy.
         """
         self._matcher = control_matcher
+        # Headers of forwarded events for this device, which are cached so
+        # that they don't need to be rebuilt for every forwarded event
+        self.__forward_prefix: Optional[bytes] = None
+        self.__forward_headers: dict[int, bytes] = {}
+        self.__output = OutputQueue(
+            getContext().settings.handle("advanced.output_rate_limit"))
 
     @classmethod
     @abstractmethod
@@ -144,6 +153,54 @@ class Device:
         """
         return 1
 
+    @final
+    def getOutputQueue(self) -> OutputQueue:
+        """
+        Returns the queue of MIDI events waiting to be sent to this device,
+        which is flushed at the end of each tick.
+
+        ### Returns:
+        * `OutputQueue`: output queue
+        """
+        return self.__output
+
+    @final
+    def getForwardedPrefix(self) -> bytes:
+        """
+        Returns the prefix of events forwarded to or from this device using
+        the version 1 forwarding envelope, up to (but not including) the
+        device number.
+
+        ### Returns:
+        * `bytes`: forwarded event prefix
+        """
+        if self.__forward_prefix is None:
+            self.__forward_prefix = bytes([0xF0, 0x7D]) \
+                + self.getId().encode() + bytes([0])
+        return self.__forward_prefix
+
+    @final
+    def getForwardedHeader(self, device_num: int) -> bytes:
+        """
+        Returns the header of events forwarded to or from the given device
+        number using the version 1 forwarding envelope, up to (but not
+        including) the event category.
+
+        Headers are computed when they are first used, and cached for the
+        lifetime of the device.
+
+        ### Args:
+        * `device_num` (`int`): device number
+
+        ### Returns:
+        * `bytes`: forwarded event header
+        """
+        header = self.__forward_headers.get(device_num)
+        if header is None:
+            header = self.getForwardedPrefix() + bytes([device_num])
+            self.__forward_headers[device_num] = header
+        return header
+
     @classmethod
     def getUniversalEnquiryResponsePattern(cls) -> Optional[IEventPattern]:
         """
@@ -159,6 +216,25 @@ class Device:
         """
         return None
 
+    @classmethod
+    def getDeviceNamePattern(cls) -> Optional[str]:
+        """
+        Returns a regular expression which matches the name of this device,
+        where the name is the return value of `device.getName()`, or None if
+        this device can't be matched by name.
+
+        This is used as a fallback for matching the device if no universal
+        device enquiry response is given. The patterns of all devices are
+        combined, so that only one match is required to recognize a device.
+
+        By default this returns None
+
+        ### Returns:
+        * `str`: regular expression that must match the entire device name,
+          or None if the device can't be matched by name.
+        """
+        return None
+
     @classmethod
     def matchDeviceName(cls, name: str) -> bool:
         """
@@ -168,7 +244,9 @@ class Device:
         This is used as a fallback for  matching the device if no universal
         device enquiry response is given.
 
-        By default, this won't match anything
+        By default, this matches the name against the pattern given by
+        `getDeviceNamePattern()`. Devices should prefer implementing that
+        method, since devices that override this must be checked individually.
 
         ### Args:
         * `name` (`str`): name of the device
@@ -176,7 +254,10 @@ class Device:
         ### Returns:
         * `bool`: whether there was a match
         """
-        return False
+        pattern = cls.getDeviceNamePattern()
+        if pattern is None:
+            return False
+        return re.fullmatch(pattern, name) is not None
 
     @classmethod
     def getDrumPadSize(cls) -> tuple[int, int]:
@@ -221,6 +302,8 @@ class Device:
             self.tick()
         with ProfilerContext("matcher"):
             self._matcher.tick(False)
+        with ProfilerContext("output"):
+            self.__output.flush()
 
     def tick(self) -> None:
         """
@@ -242,6 +325,19 @@ class Device:
         """
         return self._matcher.matchEvent(event)
 
+    @final
+    def getControlShadowStore(self) -> ControlShadowStore:
+        """
+        Returns a new store of control shadows representing all the controls
+        available on the device.
+
+        This shouldn't be overridden by child classes.
+
+        ### Returns:
+        * `ControlShadowStore`: Control shadow storage
+        """
+        return ControlShadowStore(self._matcher.getControls())
+
     @final
     def getControlShadows(self) -> list[ControlShadow]:
         """
@@ -253,4 +349,4 @@ class Device:
         ### Returns:
         * `list[ControlSurface]`: Control shadows
         """
-        return [ControlShadow(c) for c in self._matcher.getControls()]
+        return self.getControlShadowStore().shadows
@@ -22,6 +22,7 @@ from . import Device
 from control_surfaces import (
     IControlShadow,
     ControlShadow,
+    ControlShadowStore,
     NullControlShadow,
     IControlHash,
     ControlEvent,
@@ -87,16 +88,26 @@ class DeviceShadow:
     the device's control surfaces independently of other plugins, and without
     affecting the actual device unless the script chooses to apply this shadow.
     """
-    def __init__(self, device: Device) -> None:
+    def __init__(
+        self,
+        device: Device,
+        store: Optional[ControlShadowStore] = None,
+    ) -> None:
         """
         Create a device shadow
 
         ### Args:
         * `device` (`Device`): device to shadow
+        * `store` (`ControlShadowStore`, optional): storage for the state of
+          the control shadows. Defaults to `None`, in which case a new store
+          is created for the device.
         """
         self._device = device
-        self._all_controls = device.getControlShadows()
-        self._free_controls = self._all_controls.copy()
+        if store is None:
+            store = device.getControlShadowStore()
+        self._store = store
+        # Whether each control in the store is free to bind to
+        self._free = bytearray(b'\x01' * len(store))
         self._assigned_controls: dict[
             IControlHash,
             tuple[ControlShadow, Optional[EventCallback], TickCallback, tuple]
@@ -138,7 +149,7 @@ class DeviceShadow:
         #     for control in self._free_controls
         # ])
 
-        unassigned = f"{len(self._free_controls)} free controls"
+        unassigned = f"{self._free.count(1)} free controls"
 
         return f"{header}\n\n{assigned}\n\n{unassigned}"
 
@@ -160,7 +171,7 @@ class DeviceShadow:
         ### Returns:
         * `DeviceShadow`: copy
         """
-        return DeviceShadow(self.getDevice())
+        return DeviceShadow(self.getDevice(), self._store.blank())
 
     def setMinimal(self, value: bool) -> None:
         """
@@ -212,15 +223,20 @@ class DeviceShadow:
         """
         type_matches: dict[type[ControlSurface], list[ControlShadow]] = {}
         num_type_matches: dict[type[ControlSurface], int] = {}
-        for c in self._free_controls:
+        store = self._store
+        free = self._free
+        for i, control in enumerate(store.controls):
+            if not free[i]:
+                continue
             if one_type:
-                t = type(c.getControl())
+                t = type(control)
             else:
                 t = ControlSurface  # type: ignore
             # If we want to assign this control
-            if expr(c.getControl()):
+            if expr(control):
                 num_type_matches[t] = \
                     num_type_matches.get(t, 0) + 1
+                c = store.getShadow(i)
                 if t in type_matches:
                     type_matches[t].append(c)
                 else:
@@ -381,6 +397,14 @@ class DeviceShadow:
             one_type=one_type,
         ))
 
+    def _isFree(self, control: ControlShadow) -> bool:
+        """
+        Returns whether a control shadow belongs to this device shadow, and
+        is free to bind to
+        """
+        index = self._store.indexOf(control)
+        return index is not None and bool(self._free[index])
+
     def bindControl(
         self,
         control: ControlShadow,
@@ -406,7 +430,8 @@ class DeviceShadow:
         * `ValueError`: Control isn't free to bind to. This indicates a logic
           error in the code assigning controls
         """
-        if control not in self._free_controls:
+        index = self._store.indexOf(control)
+        if index is None or not self._free[index]:
             raise ValueError("Control must be free to bind to")
 
         if args is None:
@@ -415,7 +440,7 @@ class DeviceShadow:
             args_ = args
 
         # Remove from free controls
-        self._free_controls.remove(control)
+        self._free[index] = False
 
         # Bind to callable
         self._assigned_controls[control.getMapping()] = \
@@ -503,7 +528,7 @@ class DeviceShadow:
                     args_iter[i] = (args_iter[i], )
 
         # Ensure all controls are assignable
-        if not all(c in self._free_controls for c in controls):
+        if not all(self._isFree(c) for c in controls):
             raise ValueError("All controls must be free to bind to")
 
         # Bind each control, using the index of it as the argument
@@ -736,8 +761,7 @@ class DeviceShadow:
         represents
         """
         if self._minimal or not thorough:
-            controls = (c for c, *_ in self._assigned_controls.values())
+            for c, *_ in self._assigned_controls.values():
+                c.apply()
         else:
-            controls = (c for c in self._all_controls)
-        for c in controls:
-            c.apply()
+            self._store.applyAll()
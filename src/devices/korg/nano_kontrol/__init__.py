@@ -7,6 +7,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-__all__ = ['mk1']
-
-from . import mk1
@@ -9,8 +9,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-__all__ = [
-    'hammer88pro'
-]
-
-from . import hammer88pro
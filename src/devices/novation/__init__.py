@@ -9,10 +9,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-__all__ = [
-    'launchkey',
-    'sl',
-]
-
-from . import launchkey
-from . import sl
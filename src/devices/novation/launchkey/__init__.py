@@ -7,14 +7,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-__all__ = [
-    'incontrol',
-    'mk2',
-    'mk3',
-    'mk3_mini',
-]
-
-from . import incontrol
-from . import mk2
-from . import mk3
-from . import mk3_mini
@@ -11,7 +11,7 @@ more details.
 """
 from control_surfaces import HintMsg
 from fl_classes import FlMidiMsg
-from common.util.events import forwardEvent
+from common.output_queue import queueOutput
 
 LINE_LEN = 16
 
@@ -25,4 +25,5 @@ class LkNotifMsg(HintMsg):
         sysex = bytes(
             [0xF0, 0x00, 0x20, 0x29, 0x02, 0x0F, 0x04]
         ) + new.encode('ascii') + bytes([0, 0, 0xF7])
-        forwardEvent(FlMidiMsg(sysex), 2)
+        # Only the latest message needs to be shown
+        queueOutput(FlMidiMsg(sysex), 2, address_length=7)
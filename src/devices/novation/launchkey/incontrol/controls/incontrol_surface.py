@@ -10,10 +10,10 @@ This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
 from typing import Optional
-from common import profilerDecoration
+from common import getContext, profilerDecoration
 from fl_classes import FlMidiMsg
-from common.types import Color
-from common.util.events import forwardEvent
+from common.types import Color, Palette
+from common.output_queue import backgroundOutput, queueOutput
 from control_surfaces.managers import IColorManager
 from ..consts import REFRESH_INTERVAL
 
@@ -23,21 +23,67 @@ __all__ = [
 ]
 
 
+class RefreshScheduler:
+    """
+    Spreads the periodic refreshes of controls evenly across ticks, by giving
+    each control a different phase, so that they aren't all refreshed during
+    the same tick.
+    """
+
+    def __init__(self, interval: int = REFRESH_INTERVAL) -> None:
+        """
+        Create a refresh scheduler
+
+        ### Args:
+        * `interval` (`int`, optional): number of ticks between refreshes of
+          each control. Defaults to `REFRESH_INTERVAL`.
+        """
+        self.interval = interval
+        self.__next_phase = 0
+
+    def nextPhase(self) -> int:
+        """
+        Returns the phase to use for the next control, in ticks. Phases are
+        given out in turn, so that controls created together are spread
+        evenly.
+
+        ### Returns:
+        * `int`: phase offset
+        """
+        phase = self.__next_phase
+        self.__next_phase = (self.__next_phase + 1) % self.interval
+        return phase
+
+
+default_scheduler = RefreshScheduler()
+
+
 class InControlSurface(IColorManager):
-    def __init__(self, status: int, note: int) -> None:
+    def __init__(
+        self,
+        status: int,
+        note: int,
+        scheduler: RefreshScheduler = default_scheduler,
+    ) -> None:
         self.__status = status
         self.__note = note
         self.__color = 0
         # Variable to keep the lights working, since sometimes they might be
-        # set to the wrong value through other means
-        self.__ticker_timer = 0
+        # set to the wrong value through other means. Each control starts at
+        # a different phase, so that refreshes are spread across ticks
+        self.__interval = scheduler.interval
+        self.__ticker_timer = scheduler.nextPhase()
+        # Whether the color was sent since the last refresh, meaning that the
+        # next refresh can be skipped
+        self.__written = False
 
     def setColor(self, new: int):
         self.__color = new
 
     def updateColor(self) -> None:
         """Send a color update event from the recent color"""
-        forwardEvent(
+        self.__written = True
+        queueOutput(
             FlMidiMsg(
                 self.__status,
                 self.__note,
@@ -49,9 +95,17 @@ class InControlSurface(IColorManager):
     def tick(self) -> None:
         """Occasionally refresh lights since launchkey lights are sorta buggy
         """
-        if self.__ticker_timer % REFRESH_INTERVAL == 0:
-            self.updateColor()
         self.__ticker_timer += 1
+        if self.__ticker_timer < self.__interval:
+            return
+        self.__ticker_timer = 0
+        if self.__written:
+            # Sent recently, so no need to refresh it yet
+            self.__written = False
+            return
+        with backgroundOutput():
+            self.updateColor()
+        self.__written = False
 
 
 class ColorInControlSurface(InControlSurface):
@@ -66,7 +120,11 @@ class ColorInControlSurface(InControlSurface):
         debug: Optional[str] = None,
     ) -> None:
         status = (event_num << 4) + channel
-        self.__colors = colors
+        # Share the lookup table of palettes where possible
+        self.__colors = colors if isinstance(colors, Palette) \
+            else Palette(colors)
+        self.__exact = getContext().settings.handle(
+            "debug.exact_color_matching")
         self.__debug = debug
         super().__init__(status, note_num)
 
@@ -75,7 +133,7 @@ class ColorInControlSurface(InControlSurface):
         """Called when the color changes"""
         if self.__debug is not None:
             print(self.__debug, new)
-        self.setColor(self.__colors[new.closest(list(self.__colors.keys()))])
+        self.setColor(self.__colors.lookup(new, self.__exact.value))
         self.updateColor()
 
 
@@ -9,13 +9,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-
-__all__ = [
-    'lk_25_37',
-    'lk_49_61',
-]
-
-from . import (
-    lk_25_37,
-    lk_49_61,
-)
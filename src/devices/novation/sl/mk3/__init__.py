@@ -6,9 +6,3 @@ Device definitions for SL Mk3 series
 Authors:
 * Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
 """
-
-__all__ = [
-    'device',
-]
-
-from . import device
@@ -13,7 +13,7 @@ more details.
 from fl_classes import FlMidiMsg
 from control_surfaces.managers import IColorManager
 from common.types import Color
-from common.util.events import forwardEvent
+from common.output_queue import queueOutput
 
 
 class SlColorSurface(IColorManager):
@@ -34,7 +34,8 @@ class SlColorSurface(IColorManager):
         # Ignore whenever the light isn't enabled, as a fix for bad contrast
         if not new.enabled and self.__contrast_fix:
             new = Color()
-        forwardEvent(
+        # Bytes up to the property index identify the control
+        queueOutput(
             FlMidiMsg([
                 0xF0,
                 0x00,
@@ -52,6 +53,7 @@ class SlColorSurface(IColorManager):
                 0xF7,
             ]),
             2,
+            address_length=10,
         )
 
     def tick(self) -> None:
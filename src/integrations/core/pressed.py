@@ -11,8 +11,8 @@ This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
 
-from typing import Any
-from time import time
+from typing import Any, Callable, Optional
+from time import monotonic
 from common.types import Color
 from common.extension_manager import ExtensionManager
 from control_surfaces import (
@@ -26,25 +26,43 @@ from control_surfaces import (
     PitchWheel,
     ControlSurface,
 )
-from control_surfaces import ControlShadow
+from control_surfaces import ControlShadow, ControlShadowEvent
 from devices import DeviceShadow
 from integrations import CoreIntegration
 
 # How much time to fade buttons to black
 FADE_TIME = 1.0
 
+# Number of steps in the fade used to color controls
+FADE_STEPS = 256
 
-def fadeOverTime(control: ControlSurface) -> float:
+
+def pressColor(position: float) -> Color:
+    """Returns the color to show for a control at a position in its fade"""
+    return Color.gradient(Color.BLACK, Color.WHITE, FADE_STEPS)[
+        round(position * (FADE_STEPS - 1))]
+
+
+def fadeOverTime(
+    control: ControlSurface,
+    now: Optional[float] = None,
+) -> float:
     """Fade to black over time"""
+    if now is None:
+        now = monotonic()
     # The longer it's been since we tweaked this control, the
     # more faded it should be
-    return max(1.0 - (time() - control.last_tweaked) / FADE_TIME, 0)
+    return max(1.0 - (now - control.last_tweaked) / FADE_TIME, 0)
 
 
 class Press(CoreIntegration):
     """
     Used to add colors to each control surface when it is pressed or recently
     tweaked.
+
+    Only the controls that are currently pressed or fading are updated during
+    each tick. Controls become active when they receive an event, and stop
+    being active once they are no longer colored.
     """
 
     def bind_all(
@@ -75,6 +93,21 @@ class Press(CoreIntegration):
             + self.bind_all(shadow, ModWheel)
             + self.bind_all(shadow, PitchWheel)
         )
+        # Function used to update each control, based on its type
+        self._updaters: dict[
+            ControlShadow,
+            Callable[[ControlShadow, float], bool],
+        ] = {}
+        for c in self._velocities:
+            self._updaters[c] = self.updateVelocity
+        for c in self._buttons:
+            self._updaters[c] = self.updateButton
+        for c in self._others:
+            self._updaters[c] = self.updateOther
+        for c in self._updaters:
+            c.connected = False
+        # Controls that are currently pressed or fading
+        self._active: set[ControlShadow] = set()
         super().__init__(shadow)
 
     @classmethod
@@ -87,46 +120,52 @@ class Press(CoreIntegration):
 
     def any(
         self,
+        control: ControlShadowEvent,
         *args: Any
     ) -> bool:
+        self._active.add(control.getShadow())
         return False
 
     def tick(self, *args):
-        self.tickVelocities()
-        self.tickButtons()
-        self.tickOthers()
+        if not self._active:
+            return
+        now = monotonic()
+        finished = [
+            c for c in self._active if not self._updaters[c](c, now)
+        ]
+        self._active.difference_update(finished)
+
+    def updateVelocity(self, c: ControlShadow, now: float) -> bool:
+        control = c.getControl()
+        if c.value:
+            c.connected = True
+            c.color = pressColor(
+                control.value
+                # * fadeOverTime(control, now)
+            )
+            return True
+        c.connected = False
+        return False
 
-    def tickVelocities(self):
-        for c in self._velocities:
-            control = c.getControl()
-            if c.value:
-                c.connected = True
-                c.color = Color.fade(
-                    Color.BLACK, Color.WHITE, control.value
-                    # * fadeOverTime(control)
-                )
-            else:
-                c.connected = False
-
-    def tickButtons(self):
-        for c in self._buttons:
-            control = c.getControl()
-            if control.value:
-                c.connected = True
-                c.color = Color.WHITE
-                # Color.fade(Color.BLACK, Color.WHITE, fadeOverTime(control))
-            else:
-                c.connected = False
-
-    def tickOthers(self):
-        for c in self._others:
-            control = c.getControl()
-            fade = fadeOverTime(control)
-            if fade:
-                c.connected = True
-                c.color = Color.fade(Color.BLACK, Color.WHITE, fade)
-            else:
-                c.connected = False
+    def updateButton(self, c: ControlShadow, now: float) -> bool:
+        control = c.getControl()
+        if control.value:
+            c.connected = True
+            c.color = Color.WHITE
+            # pressColor(fadeOverTime(control, now))
+            return True
+        c.connected = False
+        return False
+
+    def updateOther(self, c: ControlShadow, now: float) -> bool:
+        control = c.getControl()
+        fade = fadeOverTime(control, now)
+        if fade:
+            c.connected = True
+            c.color = pressColor(fade)
+            return True
+        c.connected = False
+        return False
 
 
 ExtensionManager.super_special.register(Press)
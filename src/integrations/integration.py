@@ -107,7 +107,8 @@ class Integration:
         * `bool`: whether the event should be handled
         """
         log("plugins",
-            f"Processing event at {type(self)}", verbosity=verbosity.EVENT)
+            "Processing event at {}", verbosity=verbosity.EVENT,
+            args=(type(self),))
         return self._shadow.processEvent(mapping, index)
 
     @final
@@ -12,19 +12,10 @@ more details.
 __all__ = [
     'basicPluginBuilder',
     'default_integration',
-    'fl',
-    'klevgrand',
-    'matt_tytel',
-    'spitfire',
-    'xfer',
 ]
 
 from .basic_faders import basicPluginBuilder
-from . import (
-    default_integration,
-    fl,
-    klevgrand,
-    matt_tytel,
-    spitfire,
-    xfer,
-)
+from . import default_integration
+
+# Other plugin integrations are imported lazily by the extension manager,
+# using the manifest at `common/extension_manager/manifest.py`
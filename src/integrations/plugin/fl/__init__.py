@@ -9,20 +9,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-__all__ = [
-    'fpc',
-    'flex',
-    'parametric_eq',
-    'transistor_bass',
-    'harmless',
-    'slicers',
-]
-
-from . import (
-    fpc,
-    flex,
-    parametric_eq,
-    transistor_bass,
-    harmless,
-    slicers
-)
@@ -9,10 +9,3 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
-from . import (
-    daw_cassette,
-)
-
-__all__ = [
-    'daw_cassette',
-]
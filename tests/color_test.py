@@ -10,6 +10,9 @@ This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
 
+import copy
+import pickle
+import random
 import pytest
 from common.types import Color
 
@@ -232,3 +235,130 @@ def test_grayscale_int():
 def test_closest_grayscale():
     c = Color.fromGrayscale(0.7)
     assert c.closestGrayscale([0.0, 0.2, 0.3, 0.6, 0.9]) == 0.6
+
+
+def test_empty_color_shared():
+    assert Color() is Color.BLACK
+    assert Color.fromInteger(0) is Color.BLACK
+
+
+def test_interned():
+    """Creating an interned color should return the same object"""
+    assert Color.fromRgb(255, 0, 0) is Color.RED
+    c = Color.intern(Color.fromInteger(0x123456, 0.25, True))
+    assert Color.fromInteger(0x123456, 0.25, True) is c
+    # Different grayscale or enabled values give a different color
+    assert Color.fromInteger(0x123456, 0.5, True) is not c
+    assert Color.fromInteger(0x123456, 0.25, False) is not c
+
+
+def test_hsv_cached():
+    c = Color.fromInteger(0x654321)
+    assert c.hsv is c.hsv
+
+
+def test_with_enabled():
+    c = Color.fromInteger(0x123456)
+    d = c.withEnabled(False)
+    assert c.enabled and not d.enabled
+    assert d == c
+    assert d.grayscale == c.grayscale
+    assert c.withEnabled(True) is c
+
+
+def test_with_grayscale():
+    c = Color.fromInteger(0x123456)
+    d = c.withGrayscale(0.9)
+    assert d.grayscale == 0.9
+    assert d == c and d.enabled == c.enabled
+    assert c.withGrayscale(c.grayscale) is c
+
+
+def test_copy():
+    """Colors are immutable, so copies can be the same object"""
+    c = Color.fromInteger(0x123456, 0.3, False)
+    assert copy.copy(c) is c
+    assert copy.deepcopy([c])[0] is c
+    d = pickle.loads(pickle.dumps(c))
+    assert (d, d.grayscale, d.enabled) == (c, 0.3, False)
+
+
+def assertWithinOne(a: Color, b: Color):
+    assert abs(a.red - b.red) <= 1
+    assert abs(a.green - b.green) <= 1
+    assert abs(a.blue - b.blue) <= 1
+    assert abs(a.grayscale - b.grayscale) <= 1 / 255
+
+
+def fadePairs() -> list[tuple[Color, Color]]:
+    """Pairs of colors for which the integer fade is used"""
+    rand = random.Random(1234)
+    pairs = []
+    for _ in range(50):
+        # Grays
+        pairs.append((
+            Color.fromGrayscale(rand.random()),
+            Color.fromGrayscale(rand.random()),
+        ))
+        # Same hue and saturation
+        c = Color.fromInteger(rand.randrange(0x1000000))
+        pairs.append((c, Color.fromHsv(c.hue, c.saturation, rand.random())))
+    pairs.append((Color.BLACK, Color.WHITE))
+    return pairs
+
+
+@pytest.mark.parametrize('start, end', fadePairs())
+def test_fade_integer_within_one(start: Color, end: Color):
+    """Integer fades should be within one unit of fades in the HSV color
+    space
+    """
+    for i in range(101):
+        assertWithinOne(
+            Color.fade(start, end, i / 100),
+            Color.fadeHsv(start, end, i / 100),
+        )
+
+
+def test_fade_other_colors_unchanged():
+    """Colors that can't use the integer path should fade in the HSV color
+    space
+    """
+    rand = random.Random(1234)
+    for _ in range(100):
+        a = Color.fromInteger(rand.randrange(0x1000000))
+        b = Color.fromInteger(rand.randrange(0x1000000))
+        p = rand.random()
+        for fade, expected in [
+            (Color.fade(a, b, p), Color.fadeHsv(a, b, p)),
+            (a.fadeBlack(p), Color.fadeHsv(a, Color.BLACK, p)),
+        ]:
+            assert fade == expected
+            assert fade.grayscale == expected.grayscale
+
+
+@pytest.mark.parametrize('start, end, steps', [
+    (start, end, 256) for start, end in fadePairs()[:10]
+] + [
+    # Fades with a large change in hue need more steps
+    (Color.RED, Color.BLUE, 1024),
+    (Color.fromInteger(0x123456), Color.fromInteger(0xFEDCBA), 1024),
+])
+def test_gradient_within_one(start: Color, end: Color, steps: int):
+    """Picking the closest entry of a gradient table should be within one
+    unit of the fade
+    """
+    table = Color.gradient(start, end, steps)
+    assert len(table) == steps
+    assert Color.gradient(start, end, steps) is table
+    rand = random.Random(1234)
+    for _ in range(100):
+        p = rand.random()
+        assertWithinOne(
+            table[round(p * (steps - 1))],
+            Color.fadeHsv(start, end, p),
+        )
+
+
+def test_gradient_too_short():
+    with pytest.raises(ValueError):
+        Color.gradient(Color.BLACK, Color.WHITE, 1)
@@ -0,0 +1,103 @@
+"""
+tests > control_perf_test
+
+Tests for the memory usage and attribute access performance of control
+surfaces and the events they produce.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+import pytest
+from fl_classes import FlMidiMsg
+from common.types import Color
+from control_surfaces import (
+    Button,
+    ControlMapping,
+    ControlShadowEvent,
+    ControlShadowStore,
+)
+from devices import DeviceShadow
+from tests.helpers.devices import DummyDeviceBasic
+from tests.helpers.performance import (
+    perfTestsSkipped,
+    benchmark,
+    instanceSize,
+)
+
+
+def test_event_no_instance_dict():
+    """Events are created for every message, so shouldn't have an instance
+    dictionary
+    """
+    d = DummyDeviceBasic()
+    event = d.matchEvent(FlMidiMsg(0, 0, 127))
+    assert event is not None
+    shadow = d.getControlShadows()[0]
+    for obj in [
+        event,
+        ControlMapping(d.play_button),
+        ControlShadowEvent(event, shadow),
+        shadow,
+    ]:
+        assert not hasattr(obj, '__dict__'), type(obj)
+
+
+def test_control_surface_no_instance_dict():
+    """Control surfaces shouldn't allocate an instance dictionary unless a
+    subclass needs one
+    """
+    d = DummyDeviceBasic()
+    assert d.play_button.__dict__ == {}
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_event_memory():
+    d = DummyDeviceBasic()
+    event = d.matchEvent(FlMidiMsg(0, 0, 127))
+    assert instanceSize(event) <= 100
+
+
+def deviceShadowSize(shadow: DeviceShadow) -> int:
+    """Returns the memory used by a device shadow and the state it owns. The
+    device and its controls are shared between shadows, so aren't counted.
+    """
+    store = shadow._store
+    return instanceSize(shadow) \
+        + instanceSize(shadow._free) \
+        + instanceSize(shadow._assigned_controls) \
+        + instanceSize(store) \
+        + sum(
+            instanceSize(v) for k, v in vars(store).items()
+            if k != 'controls'
+        )
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_device_shadow_copy_memory():
+    """Copying a device shadow should only allocate the arrays holding the
+    state of its controls, rather than creating an object for each control
+    """
+    controls = [Button() for _ in range(1000)]
+    s = DeviceShadow(DummyDeviceBasic(), ControlShadowStore(controls))
+    for c in s.getControlMatches(Button):
+        c.colorize(Color.RED)
+    copy = s.copy()
+    assert deviceShadowSize(copy) / len(controls) <= 40
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_event_attribute_access():
+    d = DummyDeviceBasic()
+    event = d.matchEvent(FlMidiMsg(0, 0, 127))
+    assert event is not None
+    assert benchmark(lambda: event.value + event.channel) < 0.5
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_match_event_speed():
+    d = DummyDeviceBasic()
+    msg = FlMidiMsg(0, 0, 127)
+    assert benchmark(lambda: d.matchEvent(msg), 10_000) < 20
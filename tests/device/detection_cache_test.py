@@ -0,0 +1,121 @@
+"""
+tests > device > detection_cache_test
+
+Tests that recognized devices are cached, and that cached devices are loaded
+and verified correctly
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from pathlib import Path
+from fl_model import FlContext
+from fl_classes import FlMidiMsg
+from common import getContext, unsafeResetContext
+from common.detection_cache import DetectionCache, hashResponse
+from common.states import WaitingForDevice, VerifyingDevice
+from tests.device.manual_mapping_test import DummyState
+
+PORT = "My Controller"
+
+SL_MK3 = [
+    0xF0, 0x7E, 0x00, 0x06, 0x02, 0x00, 0x20, 0x29, 0x01, 0x01, 0x00, 0x00,
+    0x01, 0x02, 0x03, 0x04, 0xF7,
+]
+LK_MINI_MK3 = [
+    0xF0, 0x7E, 0x00, 0x06, 0x02, 0x00, 0x20, 0x29, 0x02, 0x01, 0x00, 0x00,
+    0x01, 0x02, 0x03, 0x04, 0xF7,
+]
+
+
+def initialize(cache: DetectionCache) -> None:
+    unsafeResetContext()
+    getContext().settings.set("bootstrap.delay_enquiry", False)
+    getContext().initialize(WaitingForDevice(DummyState, cache))
+
+
+def test_hash_stable():
+    """Hashes shouldn't depend on Python's hash randomization"""
+    assert hashResponse(FlMidiMsg(SL_MK3)) == hashResponse(FlMidiMsg(SL_MK3))
+    assert hashResponse(FlMidiMsg(SL_MK3)) \
+        != hashResponse(FlMidiMsg(LK_MINI_MK3))
+    assert hashResponse(None) == ''
+
+
+def test_store_and_lookup(tmp_path: Path):
+    cache = DetectionCache(str(tmp_path / "cache.txt"))
+    assert cache.lookup(PORT) is None
+    cache.store(PORT, "abc", "My.Device")
+    cache.store("Other", "def", "Other.Device")
+    assert cache.lookup(PORT) == ("abc", "My.Device")
+    cache.remove(PORT)
+    assert cache.lookup(PORT) is None
+    assert cache.lookup("Other") == ("def", "Other.Device")
+
+
+def test_recognized_device_cached(tmp_path: Path):
+    """Devices recognized using sysex should be stored in the cache"""
+    cache = DetectionCache(str(tmp_path / "cache.txt"))
+    with FlContext() as fl:
+        fl.device.name = PORT
+        initialize(cache)
+        getContext().processEvent(FlMidiMsg(SL_MK3))
+        assert getContext().getDeviceId() == "Novation.SL.Mk3"
+    assert cache.lookup(PORT) == (
+        hashResponse(FlMidiMsg(SL_MK3)), "Novation.SL.Mk3")
+
+
+def test_cached_device_loaded_immediately(tmp_path: Path):
+    """Cached devices should be loaded before the device responds"""
+    cache = DetectionCache(str(tmp_path / "cache.txt"))
+    cache.store(PORT, hashResponse(FlMidiMsg(SL_MK3)), "Novation.SL.Mk3")
+    with FlContext() as fl:
+        fl.device.name = PORT
+        initialize(cache)
+        assert getContext().getDeviceId() == "Novation.SL.Mk3"
+        assert isinstance(getContext().state, VerifyingDevice)
+        # Once the response is received, it stops verifying
+        getContext().processEvent(FlMidiMsg(SL_MK3))
+        assert isinstance(getContext().state, DummyState)
+        assert getContext().getDeviceId() == "Novation.SL.Mk3"
+
+
+def test_cached_device_mismatch(tmp_path: Path):
+    """If the response doesn't match the cached device, the script should
+    switch to the correct device and update the cache
+    """
+    cache = DetectionCache(str(tmp_path / "cache.txt"))
+    cache.store(PORT, hashResponse(FlMidiMsg(SL_MK3)), "Novation.SL.Mk3")
+    with FlContext() as fl:
+        fl.device.name = PORT
+        initialize(cache)
+        getContext().processEvent(FlMidiMsg(LK_MINI_MK3))
+        assert isinstance(getContext().state, DummyState)
+        assert getContext().getDeviceId() == "Novation.Launchkey.Mk3.Mini"
+    assert cache.lookup(PORT) == (
+        hashResponse(FlMidiMsg(LK_MINI_MK3)), "Novation.Launchkey.Mk3.Mini")
+
+
+def test_cached_device_unknown(tmp_path: Path):
+    """Cached devices that don't exist should be ignored"""
+    cache = DetectionCache(str(tmp_path / "cache.txt"))
+    cache.store(PORT, "abc", "Not.A.Device")
+    with FlContext() as fl:
+        fl.device.name = PORT
+        initialize(cache)
+        assert isinstance(getContext().state, WaitingForDevice)
+    assert cache.lookup(PORT) is None
+
+
+def test_cache_disabled(tmp_path: Path):
+    cache = DetectionCache(str(tmp_path / "cache.txt"))
+    cache.store(PORT, hashResponse(FlMidiMsg(SL_MK3)), "Novation.SL.Mk3")
+    with FlContext() as fl:
+        fl.device.name = PORT
+        unsafeResetContext()
+        getContext().settings.set("bootstrap.detection_cache", False)
+        getContext().initialize(WaitingForDevice(DummyState, cache))
+        assert isinstance(getContext().state, WaitingForDevice)
@@ -0,0 +1,145 @@
+"""
+tests > device > device_index_test
+
+Tests for the device index, used to recognize devices quickly
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import pytest
+from typing import Optional
+from fl_classes import FlMidiMsg
+from common import ExtensionManager
+from common.extension_manager.device_index import DeviceIndex, identityKeys
+from control_surfaces.event_patterns import BasicPattern, IEventPattern
+from devices import Device
+from tests.helpers.devices import DummyDeviceAbstract
+from tests.helpers.performance import perfTestsSkipped, benchmark
+
+
+def test_keys_short_manufacturer():
+    assert identityKeys([0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x47, 0x49, 0x00]) \
+        == [(0x47, 0x49)]
+
+
+def test_keys_extended_manufacturer():
+    assert identityKeys(
+        [0xF0, 0x7E, 0x00, 0x06, 0x02, 0x00, 0x20, 0x29, 0x01, 0x01]
+    ) == [(0x00, 0x20, 0x29, 0x01)]
+
+
+def test_keys_expanded():
+    assert identityKeys(
+        [0xF0, 0x7E, ..., 0x06, 0x02, 0x00, 0x20, 0x29, (0x36, 0x37)]
+    ) == [(0x00, 0x20, 0x29, 0x36), (0x00, 0x20, 0x29, 0x37)]
+
+
+@pytest.mark.parametrize('sysex', [
+    # Wildcard manufacturer
+    [0xF0, 0x7E, 0x7F, 0x06, 0x02, ..., 0x49, 0x00],
+    # Wildcard family
+    [0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x47, ...],
+    # Too short
+    [0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x00, 0x20],
+    # Not an identity reply
+    [0xF0, 0x00, 0x20, 0x29, 0x02, 0x0F, 0x01],
+])
+def test_keys_unknown(sysex):
+    assert identityKeys(sysex) is None
+
+
+@pytest.mark.parametrize(
+    'dev',
+    [
+        d for d in ExtensionManager.devices.all()
+        if isinstance(d.getUniversalEnquiryResponsePattern(), BasicPattern)
+    ]
+)
+def test_index_matches_all_devices(dev: type[Device]):
+    """Every device should be recognized from its own response"""
+    pattern = dev.getUniversalEnquiryResponsePattern()
+    assert isinstance(pattern, BasicPattern)
+    event = pattern.fulfil()
+    index = DeviceIndex(ExtensionManager.devices.all())
+    assert index.matchSysex(event) is dev
+
+
+def makeDevice(
+    sysex: Optional[list] = None,
+    name: Optional[str] = None,
+) -> type[Device]:
+    class Dev(DummyDeviceAbstract):
+        @staticmethod
+        def getUniversalEnquiryResponsePattern() -> Optional[IEventPattern]:
+            return None if sysex is None else BasicPattern(sysex)
+
+        @staticmethod
+        def getDeviceNamePattern() -> Optional[str]:
+            return name
+
+    # Use the default name matching, since the dummy device overrides it
+    Dev.matchDeviceName = classmethod(  # type: ignore
+        Device.matchDeviceName.__func__)  # type: ignore
+    return Dev
+
+
+def test_unindexed_devices_checked():
+    """Devices with patterns that can't be indexed should still be matched
+    """
+    a = makeDevice([0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x01, 0x02])
+    b = makeDevice([0xF0, 0x7E, 0x7F, 0x06, 0x02, ..., 0x03])
+    index = DeviceIndex([a, b])
+    assert index.matchSysex(
+        FlMidiMsg([0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x05, 0x03, 0xF7])) is b
+    assert index.matchSysex(
+        FlMidiMsg([0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x01, 0x02, 0xF7])) is a
+    assert index.matchSysex(
+        FlMidiMsg([0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x01, 0x04, 0xF7])) is None
+
+
+def test_registration_order_preferred():
+    """If multiple devices match, the first registered should be used"""
+    a = makeDevice([0xF0, 0x7E, 0x7F, 0x06, 0x02, ..., 0x02])
+    b = makeDevice([0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x01, 0x02])
+    event = FlMidiMsg([0xF0, 0x7E, 0x7F, 0x06, 0x02, 0x01, 0x02, 0xF7])
+    assert DeviceIndex([a, b]).matchSysex(event) is a
+    assert DeviceIndex([b, a]).matchSysex(event) is b
+
+
+def test_match_name():
+    a = makeDevice(name="My Controller( MIDI)?")
+    b = makeDevice(name="Other Controller.*")
+    c = makeDevice(name="(?P<model>My) Controller")
+    index = DeviceIndex([a, b, c])
+    assert index.matchName("My Controller MIDI") is a
+    assert index.matchName("My Controller") is a
+    assert index.matchName("Other Controller 2") is b
+    assert index.matchName("My Controller 2") is None
+    assert a.matchDeviceName("My Controller")
+
+
+def test_match_name_custom():
+    """Devices overriding matchDeviceName should still be checked"""
+    Dev = makeDevice()
+    Dev.matchDeviceName = staticmethod(  # type: ignore
+        lambda name: name == "Custom")
+    index = DeviceIndex([makeDevice(name="Other"), Dev])
+    assert index.matchName("Custom") is Dev
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_index_speed():
+    """Recognizing a device shouldn't get much slower with more devices"""
+    devices = [
+        makeDevice([0xF0, 0x7E, ..., 0x06, 0x02, 0x00, 0x20, i, 0x01])
+        for i in range(100)
+    ]
+    index = DeviceIndex(devices)
+    event = FlMidiMsg(
+        [0xF0, 0x7E, 0x00, 0x06, 0x02, 0x00, 0x20, 99, 0x01, 0xF7])
+    assert index.matchSysex(event) is devices[-1]
+    assert benchmark(lambda: index.matchSysex(event), 10_000) < 20
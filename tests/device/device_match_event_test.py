@@ -11,6 +11,7 @@ more details.
 """
 
 from fl_classes import FlMidiMsg
+from common import getContext, unsafeResetContext
 from control_surfaces import Note, PlayButton, Fader
 from tests.helpers.devices import DummyDeviceBasic
 
@@ -43,3 +44,27 @@ def test_match_faders():
         assert match is not None
         assert isinstance(match.getControl(), Fader)
         assert match.getControl() == d.faders[i]
+
+
+def test_double_press():
+    """Are two quick presses of a button detected as a double press"""
+    unsafeResetContext()
+    d = DummyDeviceBasic()
+    first = d.matchEvent(FlMidiMsg(0, 0, 127))
+    d.matchEvent(FlMidiMsg(0, 0, 0))
+    second = d.matchEvent(FlMidiMsg(0, 0, 127))
+    assert first is not None and second is not None
+    assert not first.double
+    assert second.double
+
+
+def test_double_press_setting_change():
+    """Is the double press time reloaded when the setting changes"""
+    unsafeResetContext()
+    d = DummyDeviceBasic()
+    d.matchEvent(FlMidiMsg(0, 0, 127))
+    getContext().settings.set("controls.double_press_time", 0.0)
+    d.matchEvent(FlMidiMsg(0, 0, 0))
+    second = d.matchEvent(FlMidiMsg(0, 0, 127))
+    assert second is not None
+    assert not second.double
@@ -0,0 +1,80 @@
+"""
+tests > device > device_shadow > copy_test
+
+Tests to ensure device shadows store and copy the state of their controls
+correctly
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from common.types import Color
+from control_surfaces import PlayButton
+from devices import DeviceShadow
+from tests.helpers.devices import DummyDeviceBasic
+
+
+def test_shadow_properties():
+    """Make sure properties set on a control shadow can be read back"""
+    s = DeviceShadow(DummyDeviceBasic())
+    c = s.getControlMatches(PlayButton)[0]
+    c.color = Color.fromInteger(0x123456, 0.25, True)
+    c.annotation = "Play"
+    c.value = 0.5
+
+    assert c.color == Color.fromInteger(0x123456)
+    assert c.color.grayscale == 0.25
+    assert c.color.enabled
+    assert c.annotation == "Play"
+    assert c.value == 0.5
+
+
+def test_copy_is_fresh():
+    """Make sure copying a device shadow gives a fresh shadow, without the
+    state or bindings of the original
+    """
+    s = DeviceShadow(DummyDeviceBasic())
+    s.bindMatch(PlayButton, lambda *_: True) \
+        .colorize(Color.RED) \
+        .annotate("Play")
+
+    copy = s.copy()
+    c = copy.getControlMatches(PlayButton)[0]
+    assert c.color == Color.BLACK
+    assert c.annotation == ""
+
+
+def test_copy_independent():
+    """Make sure modifying a copy doesn't modify the original"""
+    s = DeviceShadow(DummyDeviceBasic())
+    copy = s.copy()
+    copy.getControlMatches(PlayButton)[0] \
+        .colorize(Color.RED) \
+        .annotate("Play")
+
+    c = s.getControlMatches(PlayButton)[0]
+    assert c.color == Color.BLACK
+    assert c.annotation == ""
+
+
+def test_copy_shares_only_controls():
+    """Copying a device shadow shouldn't create a shadow for each control,
+    and should only share the controls themselves with the original
+    """
+    s = DeviceShadow(DummyDeviceBasic())
+    s.getControlMatches(PlayButton)[0].colorize(Color.RED)
+    copy = s.copy()
+    assert copy._store._shadows == {}
+    assert copy._store.controls is s._store.controls
+    assert copy._store.rgb is not s._store.rgb
+    assert copy._store.annotations is not s._store.annotations
+
+
+def test_apply_thorough_creates_no_shadows():
+    """Applying all controls shouldn't create a shadow for each control"""
+    s = DeviceShadow(DummyDeviceBasic())
+    s.apply(thorough=True)
+    assert s._store._shadows == {}
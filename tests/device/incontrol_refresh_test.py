@@ -0,0 +1,83 @@
+"""
+tests > device > incontrol_refresh_test
+
+Tests for the periodic refreshing of lights on Launchkey controls
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import pytest
+from fl_classes import FlMidiMsg
+import common.output_queue
+from common import getContext
+from common.types import Color
+from devices.novation.launchkey.incontrol.controls.incontrol_surface import (
+    InControlSurface,
+    RefreshScheduler,
+)
+from tests.helpers.devices import DummyDeviceContext
+
+INTERVAL = 20
+NUM_CONTROLS = 40
+
+
+@pytest.fixture
+def sent(monkeypatch: pytest.MonkeyPatch) -> list[FlMidiMsg]:
+    """Capture events sent by the output queue"""
+    events: list[FlMidiMsg] = []
+    monkeypatch.setattr(
+        common.output_queue,
+        '_send',
+        lambda event, num: events.append(event),
+    )
+    return events
+
+
+class Surface(InControlSurface):
+    def onColorChange(self, new_color: Color) -> None:
+        self.setColor(new_color.enabled)
+        self.updateColor()
+
+
+def makeControls(n: int = NUM_CONTROLS) -> list[InControlSurface]:
+    scheduler = RefreshScheduler(INTERVAL)
+    return [Surface(0x90, i, scheduler) for i in range(n)]
+
+
+def tickAll(controls: list[InControlSurface], sent: list) -> int:
+    """Tick all controls, and return the number of events sent"""
+    before = len(sent)
+    for c in controls:
+        c.tick()
+    getContext().getDevice().getOutputQueue().flush()
+    return len(sent) - before
+
+
+def test_refresh_staggered(sent: list[FlMidiMsg]):
+    """Refreshes should be spread evenly across ticks"""
+    with DummyDeviceContext():
+        controls = makeControls()
+        counts = [tickAll(controls, sent) for _ in range(INTERVAL * 3)]
+    assert max(counts) == NUM_CONTROLS // INTERVAL
+    # Every control is still refreshed once per interval
+    assert sum(counts) == NUM_CONTROLS * 3
+    assert {e.data1 for e in sent} == set(range(NUM_CONTROLS))
+
+
+def test_recent_write_skips_refresh(sent: list[FlMidiMsg]):
+    """Controls that were written recently shouldn't be refreshed"""
+    with DummyDeviceContext():
+        c = makeControls(1)[0]
+        c.setColor(5)
+        c.updateColor()
+        counts = [tickAll([c], sent) for _ in range(INTERVAL * 2)]
+    # The write itself is sent, but the first refresh is skipped
+    assert counts[0] == 1
+    assert counts[INTERVAL - 1] == 0
+    assert counts[INTERVAL * 2 - 1] == 1
+    assert sum(counts) == 2
+    assert sent[-1] == FlMidiMsg(0x90, 0, 5)
@@ -15,6 +15,7 @@ more details.
 
 import pytest
 from fl_model import FlContext
+from common import getContext
 
 from tests.helpers.devices import DummyDeviceBasic2, DummyDeviceContext
 
@@ -110,3 +111,16 @@ def testForwardChecking():
         with FlContext() as fl:
             fl.device.dispatch_targets = [1]
             forwardEvent(FlMidiMsg(7, 8, 9))
+
+
+def test_forwarded_header_cached():
+    """Forwarded event headers should be built once for each device number
+    """
+    with DummyDeviceContext(2):
+        dev = getContext().getDevice()
+        header = dev.getForwardedHeader(2)
+        assert header == b'\xF0\x7DDummy.Device\x00\x02'
+        assert dev.getForwardedHeader(2) is header
+        assert dev.getForwardedHeader(3) == b'\xF0\x7DDummy.Device\x00\x03'
+        assert FlMidiMsg(encodeForwardedEvent(FlMidiMsg(1, 2, 3))).sysex \
+            == header + bytes([0, 3, 2, 1, 0xF7])
@@ -0,0 +1,380 @@
+"""
+tests > forward_v2_test
+
+Tests for the version 2 forwarding envelope, and the handshake used to agree
+on a session handle
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import random
+import pytest
+from fl_classes import FlMidiMsg
+import common.forward_session
+from common import getContext
+from common.forward_session import ForwardSession
+from common.settings import SettingHandle
+from common.util.events import (
+    FORWARD_ANNOUNCE,
+    FORWARD_CONTROL,
+    FORWARD_HELLO,
+    decodeForwardControl,
+    decodeForwardedBatch,
+    decodeForwardedEvent,
+    encodeForwardedBatch,
+    encodeForwardedBatchEntry,
+    encodeForwardedEvent,
+    getSessionHandle,
+    isForwardedBatch,
+    isEventForwardedHere,
+    isEventForwardedHereFrom,
+    isEventForwardedV2,
+    isForwardControlMessage,
+)
+from tests.helpers.devices import (
+    DummyDeviceContext,
+    DummyDeviceBasic,
+    DummyDeviceBasic2,
+)
+from tests.helpers.performance import perfTestsSkipped, benchmark
+
+
+@pytest.fixture
+def sent(monkeypatch: pytest.MonkeyPatch) -> list[FlMidiMsg]:
+    """Capture control messages dispatched by forwarding sessions"""
+    messages: list[FlMidiMsg] = []
+    monkeypatch.setattr(
+        common.forward_session,
+        '_dispatch',
+        lambda data: messages.append(FlMidiMsg(list(data))),
+    )
+    return messages
+
+
+class DummyDeviceColliding(DummyDeviceBasic):
+    """A dummy device whose preferred session handle is the same as that of
+    DummyDeviceBasic
+    """
+    @staticmethod
+    def getId() -> str:
+        return "Dummy.Colliding.47"
+
+
+def newSession(max_batch_size: int = 1024) -> ForwardSession:
+    return ForwardSession(
+        SettingHandle("advanced.forward_batch_size", max_batch_size))
+
+
+def startSessionV2(num: int) -> None:
+    """Set up the forwarding session of the current context as if the
+    handshake with device 2 had completed
+    """
+    handle = getSessionHandle("Dummy.Device")
+    if num == 1:
+        getContext().forwarding.announce()
+        getContext().forwarding._v2_devices.add(2)
+    else:
+        getContext().forwarding.handle = handle
+
+
+def randomEvents(n: int) -> list[FlMidiMsg]:
+    rand = random.Random(1234)
+    events = []
+    for _ in range(n):
+        if rand.random() < 0.5:
+            events.append(FlMidiMsg(
+                rand.randrange(0x80, 0xF0),
+                rand.randrange(0x80),
+                rand.randrange(0x80),
+            ))
+        else:
+            events.append(FlMidiMsg(
+                [0xF0]
+                + [rand.randrange(0x80) for _ in range(rand.randrange(30))]
+                + [0xF7]
+            ))
+    return events
+
+
+def test_handshake(sent: list[FlMidiMsg]):
+    """Main and forwarder scripts should agree on a session handle"""
+    main = newSession()
+    forwarder = newSession()
+    with DummyDeviceContext(1):
+        main.announce()
+    assert len(sent) == 1
+    assert isForwardControlMessage(sent[0])
+    kind, num, _ = decodeForwardControl(sent[0])
+    assert (kind, num) == (FORWARD_ANNOUNCE, 0)
+    # Main shouldn't use v2 until the forwarder responds
+    assert main.getHandle(2) is None
+
+    with DummyDeviceContext(2):
+        forwarder.processControl(sent.pop())
+    assert forwarder.handle == main.handle
+    assert forwarder.getHandle(2) == main.handle
+    kind, num, _ = decodeForwardControl(sent[0])
+    assert (kind, num) == (FORWARD_HELLO, 2)
+
+    with DummyDeviceContext(1):
+        main.processControl(sent.pop())
+    assert main.getHandle(2) == main.handle
+    assert main.getHandle(3) is None
+
+
+def test_handshake_forwarder_first(sent: list[FlMidiMsg]):
+    """The handshake should work if the forwarder starts first"""
+    main = newSession()
+    forwarder = newSession()
+    with DummyDeviceContext(2):
+        forwarder.hello()
+    with DummyDeviceContext(1):
+        main.processControl(sent.pop())
+    assert main.getHandle(2) is not None
+    kind, num, _ = decodeForwardControl(sent[0])
+    assert (kind, num) == (FORWARD_ANNOUNCE, 2)
+    with DummyDeviceContext(2):
+        forwarder.processControl(sent.pop())
+    assert forwarder.handle == main.handle
+    # No need to say hello again
+    assert len(sent) == 0
+
+
+def test_handshake_other_device(sent: list[FlMidiMsg]):
+    """Handshakes for other devices should be ignored"""
+    forwarder = newSession()
+    with DummyDeviceContext(1):
+        newSession().announce()
+    with DummyDeviceContext(2, DummyDeviceBasic2):
+        forwarder.processControl(sent.pop())
+    assert forwarder.handle is None
+    assert len(sent) == 0
+
+
+def test_handshake_colliding_ids(sent: list[FlMidiMsg]):
+    """Devices whose IDs hash to the same handle should be given different
+    handles
+    """
+    assert getSessionHandle(DummyDeviceColliding.getId()) \
+        == getSessionHandle("Dummy.Device")
+    main = newSession()
+    other = newSession()
+    forwarder = newSession()
+    with DummyDeviceContext(1):
+        main.announce()
+    with DummyDeviceContext(1, DummyDeviceColliding):
+        other.announce()
+    assert main.handle == other.handle
+    # Deliver each message to the main script and the forwarder until the
+    # handshake settles
+    for _ in range(20):
+        if not sent:
+            break
+        event = sent.pop(0)
+        with DummyDeviceContext(1):
+            main.processControl(event)
+        with DummyDeviceContext(2):
+            forwarder.processControl(event)
+    assert len(sent) == 0
+    assert main.handle is not None
+    assert main.handle != other.handle
+    assert forwarder.handle == main.handle
+    assert main.getHandle(2) == main.handle
+
+    # Events for the other device shouldn't be accepted by the forwarder
+    with DummyDeviceContext(1, DummyDeviceColliding):
+        getContext().forwarding = other
+        other._v2_devices.add(2)
+        encoded = FlMidiMsg(encodeForwardedEvent(FlMidiMsg(1, 2, 3), 2))
+    assert isEventForwardedV2(encoded)
+    with DummyDeviceContext(2):
+        getContext().forwarding = forwarder
+        assert not isEventForwardedHereFrom(encoded)
+
+
+def test_handshake_no_free_handles(sent: list[FlMidiMsg]):
+    """If every handle is used by another device, version 1 should be used
+    """
+    main = newSession()
+    forwarder = newSession()
+    with DummyDeviceContext(1):
+        main.announce()
+    with DummyDeviceContext(2):
+        forwarder._foreign = {f"Other.{i}": i for i in range(FORWARD_CONTROL)}
+        forwarder.processControl(sent.pop())
+        assert forwarder.handle is None
+    with DummyDeviceContext(1):
+        main.processControl(sent.pop())
+    assert main.getHandle(2) is None
+    # All forwarders should be told to use version 1
+    kind, num, data = decodeForwardControl(sent[0])
+    assert (kind, num, data[0]) == (FORWARD_ANNOUNCE, 0, FORWARD_CONTROL)
+    with DummyDeviceContext(2):
+        forwarder.processControl(sent.pop(0))
+    assert forwarder.handle is None
+    assert forwarder.getHandle(2) is None
+
+
+def test_v1_by_default():
+    """The v1 envelope should be used until the handshake completes"""
+    with DummyDeviceContext(2):
+        encoded = FlMidiMsg(encodeForwardedEvent(FlMidiMsg(1, 2, 3)))
+        assert not isEventForwardedV2(encoded)
+    with DummyDeviceContext(1):
+        assert isEventForwardedHereFrom(encoded, 2)
+
+
+def test_v2_header_size():
+    with DummyDeviceContext(2):
+        startSessionV2(2)
+        encoded = FlMidiMsg(encodeForwardedEvent(FlMidiMsg(1, 2, 3), 2))
+        assert isEventForwardedV2(encoded)
+        assert len(encoded.sysex) == 10
+
+
+@pytest.mark.parametrize('event', randomEvents(50))
+@pytest.mark.parametrize('v2', [False, True])
+def test_round_trip_from_forwarder(event: FlMidiMsg, v2: bool):
+    """Events forwarded to the main script should decode to the same event
+    """
+    with DummyDeviceContext(2):
+        if v2:
+            startSessionV2(2)
+        encoded = FlMidiMsg(encodeForwardedEvent(event))
+        assert isEventForwardedV2(encoded) == v2
+    with DummyDeviceContext(1):
+        if v2:
+            startSessionV2(1)
+        assert isEventForwardedHere(encoded)
+        assert isEventForwardedHereFrom(encoded, 2)
+        assert not isEventForwardedHereFrom(encoded, 3)
+        assert decodeForwardedEvent(encoded) == event
+
+
+@pytest.mark.parametrize('event', randomEvents(50))
+@pytest.mark.parametrize('v2', [False, True])
+def test_round_trip_to_forwarder(event: FlMidiMsg, v2: bool):
+    """Events forwarded from the main script should decode to the same event
+    """
+    with DummyDeviceContext(1):
+        if v2:
+            startSessionV2(1)
+        encoded = FlMidiMsg(encodeForwardedEvent(event, 2))
+        assert isEventForwardedV2(encoded) == v2
+    with DummyDeviceContext(2):
+        if v2:
+            startSessionV2(2)
+        assert isEventForwardedHereFrom(encoded)
+        assert decodeForwardedEvent(encoded) == event
+    with DummyDeviceContext(3):
+        if v2:
+            startSessionV2(3)
+        assert not isEventForwardedHereFrom(encoded)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_batch_round_trip(seed: int):
+    """Batches should decode to the same events, in the same order"""
+    events = randomEvents(seed * 5)
+    batch = FlMidiMsg(list(encodeForwardedBatch(
+        [encodeForwardedBatchEntry(e) for e in events], 0x12, 2)))
+    assert isForwardedBatch(batch)
+    assert decodeForwardedBatch(batch) == events
+
+
+def test_batch_long_sysex():
+    """Sysex events longer than 127 bytes should be batched correctly"""
+    event = FlMidiMsg([0xF0] + [i % 0x80 for i in range(300)] + [0xF7])
+    batch = FlMidiMsg(list(encodeForwardedBatch(
+        [encodeForwardedBatchEntry(event)], 0x12, 2)))
+    assert decodeForwardedBatch(batch) == [event]
+
+
+def test_queue_until_flush(sent: list[FlMidiMsg]):
+    """Events should be sent in a single batch when the session is flushed
+    """
+    events = randomEvents(20)
+    session = newSession()
+    with DummyDeviceContext(1):
+        session.announce()
+        session._v2_devices.add(2)
+        sent.clear()
+        for e in events:
+            assert session.queue(e, 2)
+        assert len(sent) == 0
+        session.flush()
+    assert len(sent) == 1
+    assert decodeForwardedBatch(sent[0]) == events
+    # Nothing left to send
+    session.flush()
+    assert len(sent) == 1
+
+
+def test_queue_max_size(sent: list[FlMidiMsg]):
+    """Batches shouldn't exceed the maximum size"""
+    events = randomEvents(50)
+    session = newSession(64)
+    with DummyDeviceContext(1):
+        session.announce()
+        session._v2_devices.add(2)
+        sent.clear()
+        unbatched = []
+        for e in events:
+            if not session.queue(e, 2):
+                unbatched.append(e)
+        session.flush()
+    assert all(len(b.sysex) <= 64 for b in sent)
+    assert [e for b in sent for e in decodeForwardedBatch(b)] + unbatched \
+        == [e for e in events if e not in unbatched] + unbatched
+
+
+def test_queue_requires_v2():
+    """Events shouldn't be batched for forwarders that only support v1"""
+    session = newSession()
+    with DummyDeviceContext(1):
+        session.announce()
+        assert not session.queue(FlMidiMsg(1, 2, 3), 2)
+
+
+def test_queue_disabled():
+    session = newSession(0)
+    with DummyDeviceContext(1):
+        session.announce()
+        session._v2_devices.add(2)
+        assert not session.queue(FlMidiMsg(1, 2, 3), 2)
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_encode_throughput():
+    """Encoding with the v2 envelope should be faster than with v1"""
+    event = FlMidiMsg(0x90, 0x40, 0x7F)
+    with DummyDeviceContext(1):
+        v1 = benchmark(lambda: encodeForwardedEvent(event, 2), 20_000)
+        startSessionV2(1)
+        v2 = benchmark(lambda: encodeForwardedEvent(event, 2), 20_000)
+    assert v2 < v1
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_decode_throughput():
+    """Checking and decoding with the v2 envelope should be faster than with
+    v1
+    """
+    event = FlMidiMsg(0x90, 0x40, 0x7F)
+    with DummyDeviceContext(2):
+        v1_event = FlMidiMsg(encodeForwardedEvent(event))
+        startSessionV2(2)
+        v2_event = FlMidiMsg(encodeForwardedEvent(event))
+
+    def check(e: FlMidiMsg):
+        return isEventForwardedHereFrom(e, 2) and decodeForwardedEvent(e)
+
+    with DummyDeviceContext(1):
+        startSessionV2(1)
+        v1 = benchmark(lambda: check(v1_event), 20_000)
+        v2 = benchmark(lambda: check(v2_event), 20_000)
+    assert v2 < v1
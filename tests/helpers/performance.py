@@ -1,9 +1,20 @@
 """
+tests > helpers > performance
 
+Helper code for tests and benchmarks which depend on CPU performance.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
 """
 
 import os
+import sys
 import functools
+from time import perf_counter
+from typing import Any, Callable
 
 
 @functools.cache
@@ -29,3 +40,38 @@ def perfTestsSkipped() -> dict:
         'condition': os.environ.get('UCS_PERF_TEST', '') == '',
         'reason': 'Performance tests disabled'
     }
+
+
+def benchmark(func: Callable[[], Any], iterations: int = 100_000) -> float:
+    """
+    Time how long a function takes to run, on average.
+
+    ### Args:
+    * `func` (`Callable[[], Any]`): function to benchmark
+    * `iterations` (`int`, optional): number of times to call the function.
+      Defaults to `100_000`.
+
+    ### Returns:
+    * `float`: average time per call, in microseconds
+    """
+    start = perf_counter()
+    for _ in range(iterations):
+        func()
+    return (perf_counter() - start) / iterations * 1_000_000
+
+
+def instanceSize(obj: object) -> int:
+    """
+    Returns the memory used by an object, including its instance dictionary
+    if it has one. The objects it refers to are not counted.
+
+    ### Args:
+    * `obj` (`object`): object to measure
+
+    ### Returns:
+    * `int`: size in bytes
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
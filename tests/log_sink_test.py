@@ -0,0 +1,160 @@
+"""
+tests > log_sink_test
+
+Tests for the binary log sink, and the tool used to query it
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from pathlib import Path
+import pytest
+from common import getContext
+from common.logger import verbosity
+from common.logger.logger import Log
+from common.logger.log_sink import LogSink, readLog, MAGIC
+from common.logger.log_query import main, parseVerbosity
+from tests.helpers.devices import DummyDeviceContext
+
+
+def writeLog(path: Path) -> None:
+    sink = LogSink(str(path))
+    sink.write("device.event.in", verbosity.EVENT, "event", "details")
+    sink.write("device.event.out", verbosity.INFO, "output")
+    sink.write("general", verbosity.WARNING, "warning")
+    sink.flush()
+
+
+def test_round_trip(tmp_path: Path):
+    """Items should be read back in the order they were written"""
+    path = tmp_path / "log.ucslog"
+    writeLog(path)
+    records = list(readLog(str(path)))
+    assert [
+        (r.category, r.verbosity, r.message, r.details) for r in records
+    ] == [
+        ("device.event.in", verbosity.EVENT, "event", "details"),
+        ("device.event.out", verbosity.INFO, "output", ""),
+        ("general", verbosity.WARNING, "warning", ""),
+    ]
+    times = [r.time for r in records]
+    assert times == sorted(times)
+    assert all(t >= 0 for t in times)
+
+
+def test_buffered(tmp_path: Path):
+    """Nothing should be written until the sink is flushed"""
+    path = tmp_path / "log.ucslog"
+    sink = LogSink(str(path))
+    sink.write("general", verbosity.INFO, "message")
+    assert not path.exists()
+    sink.flush()
+    assert path.read_bytes().startswith(MAGIC)
+
+
+def test_sessions_appended(tmp_path: Path):
+    """Each sink should append a new session to the file"""
+    path = tmp_path / "log.ucslog"
+    writeLog(path)
+    writeLog(path)
+    records = list(readLog(str(path)))
+    assert len(records) == 6
+    assert [r.session for r in records] == [0, 0, 0, 1, 1, 1]
+    # Category IDs are reset for each session
+    assert records[3].category == "device.event.in"
+
+
+def test_truncated(tmp_path: Path):
+    """Incomplete records at the end of the file should be ignored"""
+    path = tmp_path / "log.ucslog"
+    writeLog(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    assert len(list(readLog(str(path)))) == 2
+
+
+def test_not_log(tmp_path: Path):
+    path = tmp_path / "log.ucslog"
+    path.write_bytes(b"hello")
+    with pytest.raises(ValueError):
+        list(readLog(str(path)))
+
+
+def test_log_writes_to_sink(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Items at or below the binary log verbosity should be written once the
+    log is flushed
+    """
+    monkeypatch.setattr("common.settings.scripts_dir", str(tmp_path))
+    with DummyDeviceContext():
+        log = Log()
+        settings = getContext().settings
+        settings.set("logger.binary_log", True)
+        settings.set("logger.binary_log_verbosity", verbosity.INFO)
+        log("general", "recorded", verbosity.INFO)
+        log("general", "not recorded", verbosity.NOTE)
+        log.flush()
+    records = list(readLog(str(tmp_path / "log.ucslog")))
+    assert [r.message for r in records] == ["recorded"]
+
+
+def test_log_records_discarded_events(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Events should be written to the binary log with the default settings,
+    even though they are discarded from the history
+    """
+    monkeypatch.setattr("common.settings.scripts_dir", str(tmp_path))
+    with DummyDeviceContext():
+        log = Log()
+        settings = getContext().settings
+        settings.set("logger.binary_log", True)
+        assert settings.get("logger.discard_verbosity") < verbosity.EVENT
+        log("device.event.in", "event", verbosity.EVENT, "details")
+        log("general", "too verbose", verbosity.MOST_VERBOSE)
+        assert len(log) == 0
+        log.flush()
+    records = list(readLog(str(tmp_path / "log.ucslog")))
+    assert [(r.category, r.message, r.details) for r in records] \
+        == [("device.event.in", "event", "details")]
+
+
+def test_parse_verbosity():
+    assert parseVerbosity("event") == verbosity.EVENT
+    assert parseVerbosity("3") == 3
+
+
+def test_query_filters(tmp_path: Path, capsys: pytest.CaptureFixture):
+    """The query tool should filter by category and verbosity"""
+    path = tmp_path / "log.ucslog"
+    writeLog(path)
+    assert main([str(path), "--category", "device.event"]) == 0
+    out: str = capsys.readouterr().out
+    assert "event" in out and "output" in out and "warning" not in out
+    assert main([str(path), "--verbosity", "INFO"]) == 0
+    out = capsys.readouterr().out
+    assert "output" in out and "warning" in out and ": event" not in out
+
+
+def test_query_time(tmp_path: Path, capsys: pytest.CaptureFixture):
+    """The query tool should filter by time"""
+    path = tmp_path / "log.ucslog"
+    writeLog(path)
+    assert main([str(path), "--start", "1000"]) == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_query_count(tmp_path: Path, capsys: pytest.CaptureFixture):
+    path = tmp_path / "log.ucslog"
+    writeLog(path)
+    writeLog(path)
+    assert main([str(path), "--count", "--session", "1"]) == 0
+    out: str = capsys.readouterr().out
+    assert out.splitlines()[0].split() == ["device.event.in", "1"]
+
+
+def test_query_missing_file(tmp_path: Path):
+    assert main([str(tmp_path / "missing.ucslog")]) == 1
@@ -15,8 +15,13 @@ more details.
 
 import pytest
 
+from common import getContext
 from common.logger import log
 from common.logger import verbosity
+from common.logger.logger import Log
+from common.logger.log_item import LogItem
+from common.logger.log_history import LogHistory
+from tests.helpers.devices import DummyDeviceContext
 
 
 def test_log_too_verbose(capsys: pytest.CaptureFixture):
@@ -42,3 +47,133 @@ def test_log_verbosity(capsys: pytest.CaptureFixture):
 #
 #     out: str = captured.out
 #     assert out.find("test\n") != -1
+
+
+def makeItem(index: int, category: str = "general") -> LogItem:
+    return LogItem(category, f"item {index}", "", verbosity.INFO, index)
+
+
+def test_history_wraps():
+    """Once the history is full, the oldest items should be replaced"""
+    history = LogHistory(3)
+    for i in range(5):
+        history.append(makeItem(i))
+    assert len(history) == 3
+    assert history.total == 5
+    assert [item.index for item in history] == [2, 3, 4]
+    assert [item.index for item in reversed(history)] == [4, 3, 2]
+
+
+def test_history_get():
+    """Items should be found by their log index, if they are still stored"""
+    history = LogHistory(3)
+    for i in range(5):
+        history.append(makeItem(i))
+    assert history.get(1) is None
+    assert history.get(5) is None
+    item = history.get(3)
+    assert item is not None and item.index == 3
+    item = history.get(-1)
+    assert item is not None and item.index == 4
+
+
+def test_history_counts():
+    """Items discarded from the history should still be counted"""
+    history = LogHistory(2)
+    history.append(makeItem(0, "a"))
+    history.append(makeItem(1, "a"))
+    history.append(makeItem(2, "b"))
+    assert history.logged == {"a": 2, "b": 1}
+    assert history.discarded == {"a": 1}
+
+
+def test_history_resize():
+    """Shrinking the history should keep the most recent items"""
+    history = LogHistory(5)
+    for i in range(4):
+        history.append(makeItem(i))
+    history.setCapacity(2)
+    assert [item.index for item in history] == [2, 3]
+    assert history.discarded == {"general": 2}
+    history.setCapacity(4)
+    history.append(makeItem(4))
+    assert [item.index for item in history] == [2, 3, 4]
+
+
+def test_log_bounded(capsys: pytest.CaptureFixture):
+    """The log shouldn't store more items than the `logger.max_history`
+    setting allows, but should still be able to recall them
+    """
+    with DummyDeviceContext():
+        getContext().settings.set("logger.max_history", 10)
+        getContext().settings.set("logger.discard_verbosity", verbosity.NOTE)
+        log = Log()
+        for i in range(25):
+            log("general", f"message {i}", verbosity.INFO)
+        assert len(log) == 10
+        capsys.readouterr()
+        log.recall(verbosity=verbosity.INFO)
+        out: str = capsys.readouterr().out
+        assert "message 24" in out
+        assert "message 14" not in out
+        assert "15 older items no longer in history" in out
+        log.inspect(20)
+        assert "message 20" in capsys.readouterr().out
+
+
+def test_lazy_message_not_formatted():
+    """Messages that won't be kept shouldn't be formatted"""
+    def fail() -> str:
+        raise AssertionError("Message was formatted")
+
+    with DummyDeviceContext():
+        getContext().settings.set("logger.discard_verbosity", verbosity.NOTE)
+        log = Log()
+        log("general", fail, verbosity.EVENT, detailed_msg=fail)
+        assert len(log) == 0
+
+
+def test_lazy_message_formatted():
+    """Messages that are kept should be formatted"""
+    with DummyDeviceContext():
+        log = Log()
+        log("general", lambda: "from callable", verbosity.INFO)
+        log("general", "{} {}", verbosity.INFO, args=("from", "template"))
+        assert [item.message for item in log._history] \
+            == ["from callable", "from template"]
+
+
+def test_threshold_updated():
+    """Changing the discard verbosity should take effect straight away"""
+    with DummyDeviceContext():
+        log = Log()
+        log("general", "discarded", verbosity.EVENT)
+        getContext().settings.set("logger.discard_verbosity", verbosity.EVENT)
+        log("general", "kept", verbosity.EVENT)
+        assert [item.message for item in log._history] == ["kept"]
+
+
+def test_watched_category_printed(capsys: pytest.CaptureFixture):
+    """Watched categories and their sub-categories should be printed at the
+    watched verbosity
+    """
+    with DummyDeviceContext():
+        log = Log()
+        log.watch("device.event")
+        capsys.readouterr()
+        log("device.event.in", "watched", verbosity.INFO)
+        log("device.eventful", "not watched", verbosity.INFO)
+        out: str = capsys.readouterr().out
+        assert "watched" in out
+        assert "not watched" not in out
+
+
+def test_unwatch(capsys: pytest.CaptureFixture):
+    """Categories should stop being printed once they are unwatched"""
+    with DummyDeviceContext():
+        log = Log()
+        log.watch("device")
+        log.unwatch("device")
+        capsys.readouterr()
+        log("device.event.in", "message", verbosity.INFO)
+        assert capsys.readouterr().out == ""
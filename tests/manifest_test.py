@@ -0,0 +1,114 @@
+"""
+tests > manifest_test
+
+Tests for the extension manifest, which allows devices and plugin
+integrations to be imported lazily.
+
+These tests run in a separate interpreter, since other tests will have
+already imported many of the extensions.
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+import os
+import subprocess
+import sys
+import pytest
+from tests.helpers.performance import perfTestsSkipped
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+
+
+def runScript(script: str) -> str:
+    """Run a Python script in a new interpreter and return its output
+    """
+    return subprocess.run(
+        [sys.executable, '-c', 'import tests\n' + script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def test_manifest_up_to_date():
+    """Make sure the manifest matches the extensions that are registered.
+    If this fails, run `python -m common.extension_manager.manifest_builder`
+    from the `src` directory.
+    """
+    generated = runScript(
+        "from common.extension_manager.manifest_builder import *\n"
+        "print(formatManifest(*buildManifest()), end='')\n"
+    )
+    with open(os.path.join(
+        ROOT, 'src', 'common', 'extension_manager', 'manifest.py'
+    )) as f:
+        assert f.read() == generated
+
+
+def test_devices_not_imported_at_startup():
+    """Device modules shouldn't be imported until they are needed"""
+    out = runScript(
+        "import sys\n"
+        "import common\n"
+        "print('devices.novation.sl.mk3.device' in sys.modules)\n"
+        "common.ExtensionManager.devices.getById('Novation.SL.Mk3')\n"
+        "print('devices.novation.sl.mk3.device' in sys.modules)\n"
+        "print('devices.akai.mk3.mpk_mini_mk3' in sys.modules)\n"
+    )
+    assert out.split() == ['False', 'True', 'False']
+
+
+def test_plugins_not_imported_at_startup():
+    """Plugin integrations shouldn't be imported until they are needed"""
+    out = runScript(
+        "import sys\n"
+        "import common\n"
+        "from tests.helpers.devices import DummyDeviceBasic\n"
+        "print('integrations.plugin.fl.transistor_bass' in sys.modules)\n"
+        "common.ExtensionManager.plugins.get(\n"
+        "    'Transistor Bass', DummyDeviceBasic())\n"
+        "print('integrations.plugin.fl.transistor_bass' in sys.modules)\n"
+        "print('integrations.plugin.fl.harmless' in sys.modules)\n"
+    )
+    assert out.split() == ['False', 'True', 'False']
+
+
+def test_all_loads_everything():
+    """Listing all extensions should import them"""
+    out = runScript(
+        "from common.extension_manager import ExtensionManager, manifest\n"
+        "print(len(ExtensionManager.devices) == len(manifest.DEVICES))\n"
+        "plugs = ExtensionManager.plugins.all()\n"
+        "print(set(manifest.PLUGINS) <= {\n"
+        "    i for p in plugs for i in p.getPlugIds()\n"
+        "})\n"
+    )
+    assert out.split() == ['True', 'True']
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_startup_time():
+    """Lazily importing extensions should make startup faster than importing
+    all of them
+    """
+    timer = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import common\n"
+        "{}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    lazy = min(
+        float(runScript(timer.format(''))) for _ in range(5)
+    )
+    eager = min(
+        float(runScript(timer.format(
+            "common.ExtensionManager.devices.loadAll()\n"
+            "common.ExtensionManager.plugins.loadAll()"
+        ))) for _ in range(5)
+    )
+    assert lazy < eager
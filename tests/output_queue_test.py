@@ -0,0 +1,308 @@
+"""
+tests > output_queue_test
+
+Tests for the output queue, which removes redundant MIDI events sent to a
+device during a tick
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import pytest
+from time import monotonic
+from fl_classes import FlMidiMsg
+import common.output_queue
+from common import getContext
+from common.output_queue import OutputQueue, backgroundOutput, queueOutput
+from common.settings import SettingHandle
+from common.types import Color
+from control_surfaces import Button
+from control_surfaces.managers import IColorManager
+from tests.helpers.devices import DummyDeviceContext
+
+
+@pytest.fixture
+def sent(monkeypatch: pytest.MonkeyPatch) -> list[tuple[FlMidiMsg, int]]:
+    """Capture events sent by output queues"""
+    events: list[tuple[FlMidiMsg, int]] = []
+    monkeypatch.setattr(
+        common.output_queue,
+        '_send',
+        lambda event, num: events.append((event, num)),
+    )
+    return events
+
+
+def test_last_write_wins(sent: list[tuple[FlMidiMsg, int]]):
+    q = OutputQueue()
+    q.queue(FlMidiMsg(0x90, 0x10, 0x01))
+    q.queue(FlMidiMsg(0x90, 0x10, 0x02))
+    assert sent == []
+    q.flush()
+    assert sent == [(FlMidiMsg(0x90, 0x10, 0x02), 1)]
+    assert (q.sent, q.suppressed) == (1, 1)
+
+
+def test_order_stable(sent: list[tuple[FlMidiMsg, int]]):
+    """Events should be sent in the order their destinations were first
+    written to
+    """
+    q = OutputQueue()
+    q.queue(FlMidiMsg(0x90, 0x10, 0x01))
+    q.queue(FlMidiMsg(0x90, 0x11, 0x01))
+    q.queue(FlMidiMsg(0x90, 0x10, 0x02))
+    q.flush()
+    assert [e for e, _ in sent] == [
+        FlMidiMsg(0x90, 0x10, 0x02),
+        FlMidiMsg(0x90, 0x11, 0x01),
+    ]
+
+
+def test_destinations_separate(sent: list[tuple[FlMidiMsg, int]]):
+    """Events with different statuses or device numbers shouldn't replace
+    each other
+    """
+    q = OutputQueue()
+    q.queue(FlMidiMsg(0x90, 0x10, 0x01))
+    q.queue(FlMidiMsg(0x91, 0x10, 0x01))
+    q.queue(FlMidiMsg(0x90, 0x10, 0x01), 2)
+    q.flush()
+    assert len(sent) == 3
+    assert q.suppressed == 0
+
+
+def test_sysex_address(sent: list[tuple[FlMidiMsg, int]]):
+    q = OutputQueue()
+    q.queue(FlMidiMsg([0xF0, 0x01, 0x02, 0x03, 0xF7]), address_length=3)
+    q.queue(FlMidiMsg([0xF0, 0x01, 0x02, 0x04, 0xF7]), address_length=3)
+    q.queue(FlMidiMsg([0xF0, 0x01, 0x05, 0x04, 0xF7]), address_length=3)
+    q.flush()
+    assert [e for e, _ in sent] == [
+        FlMidiMsg([0xF0, 0x01, 0x02, 0x04, 0xF7]),
+        FlMidiMsg([0xF0, 0x01, 0x05, 0x04, 0xF7]),
+    ]
+
+
+def test_sysex_no_address(sent: list[tuple[FlMidiMsg, int]]):
+    """Without an address, only identical sysex events are replaced"""
+    q = OutputQueue()
+    q.queue(FlMidiMsg([0xF0, 0x01, 0x02, 0xF7]))
+    q.queue(FlMidiMsg([0xF0, 0x01, 0x03, 0xF7]))
+    q.queue(FlMidiMsg([0xF0, 0x01, 0x02, 0xF7]))
+    q.flush()
+    assert len(sent) == 2
+    assert q.suppressed == 1
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self) -> None:
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+
+def limitedQueue(rate: int, clock: FakeClock) -> OutputQueue:
+    return OutputQueue(
+        SettingHandle("advanced.output_rate_limit", rate), clock)
+
+
+def sysex(n: int, size: int = 10) -> FlMidiMsg:
+    return FlMidiMsg([0xF0, n] + [0] * (size - 3) + [0xF7])
+
+
+def test_rate_limited(sent: list[tuple[FlMidiMsg, int]]):
+    """Events that don't fit within the rate limit should be sent later"""
+    clock = FakeClock()
+    # Burst of 100 bytes
+    q = limitedQueue(1000, clock)
+    for i in range(25):
+        q.queue(sysex(i))
+    q.flush()
+    assert len(sent) == 10
+    assert len(q) == 15
+    # Flushing again straight away shouldn't send anything
+    q.flush()
+    assert len(sent) == 10
+    # After 50 ms, there's room for another 50 bytes
+    clock.time = 0.05
+    q.flush()
+    assert len(sent) == 15
+    clock.time = 1.0
+    q.flush()
+    assert len(sent) == 25
+    assert [e for e, _ in sent] == [sysex(i) for i in range(25)]
+    assert q.delayed == 15 + 15 + 10
+
+
+def test_rate_limit_per_port(sent: list[tuple[FlMidiMsg, int]]):
+    """Each device number should have its own limit"""
+    q = limitedQueue(100, FakeClock())
+    q.queue(sysex(1))
+    q.queue(sysex(2))
+    q.queue(sysex(1), 2)
+    q.flush()
+    assert [(e.sysex[1], n) for e, n in sent] == [(1, 1), (1, 2)]
+
+
+def test_rate_limit_oversized(sent: list[tuple[FlMidiMsg, int]]):
+    """Events larger than the burst size should be sent when the bucket is
+    full
+    """
+    clock = FakeClock()
+    q = limitedQueue(100, clock)
+    q.queue(sysex(1, 50))
+    q.flush()
+    assert len(sent) == 1
+    q.queue(sysex(2, 50))
+    clock.time = 0.2
+    q.flush()
+    # Bucket isn't full yet, since the last event overdrew it
+    assert len(sent) == 1
+    clock.time = 1.0
+    q.flush()
+    assert len(sent) == 2
+
+
+def test_rate_limit_forced(sent: list[tuple[FlMidiMsg, int]]):
+    """A forced flush should send every event, ignoring the rate limit"""
+    q = limitedQueue(100, FakeClock())
+    for i in range(25):
+        q.queue(sysex(i))
+    q.flush(force=True)
+    assert [e for e, _ in sent] == [sysex(i) for i in range(25)]
+    assert len(q) == 0
+
+
+def test_rate_limit_drained_on_deinitialize(
+    sent: list[tuple[FlMidiMsg, int]],
+):
+    """Events held back by the rate limit shouldn't be dropped when the
+    script is deinitialized
+    """
+    with DummyDeviceContext():
+        getContext().settings.set("advanced.output_rate_limit", 100)
+        for i in range(25):
+            queueOutput(sysex(i), 2)
+        getContext().deinitialize()
+    assert [e for e, _ in sent] == [sysex(i) for i in range(25)]
+
+
+def test_feedback_before_background(sent: list[tuple[FlMidiMsg, int]]):
+    """Feedback should be sent before background refreshes"""
+    clock = FakeClock()
+    q = limitedQueue(100, clock)
+    with backgroundOutput():
+        for i in range(3):
+            q.queue(sysex(i))
+    q.queue(sysex(10))
+    # Only one event fits in each flush
+    for t in range(4):
+        clock.time = t
+        q.flush()
+    assert [e for e, _ in sent] == [sysex(10)] + [sysex(i) for i in range(3)]
+
+
+def test_feedback_not_demoted(sent: list[tuple[FlMidiMsg, int]]):
+    """A background refresh shouldn't delay feedback for the same destination
+    """
+    clock = FakeClock()
+    q = limitedQueue(100, clock)
+    q.queue(sysex(1))
+    q.queue(sysex(2))
+    with backgroundOutput():
+        q.queue(sysex(3))
+        q.queue(sysex(1))
+    q.queue(sysex(4))
+    for t in range(4):
+        clock.time = t
+        q.flush()
+    assert [e for e, _ in sent] == [sysex(i) for i in (1, 2, 4, 3)]
+
+
+class QueueColorManager(IColorManager):
+    """Color manager that queues an event for each color change"""
+
+    def __init__(self, q: OutputQueue, note: int) -> None:
+        self.q = q
+        self.note = note
+
+    def onColorChange(self, new_color: Color) -> None:
+        self.q.queue(FlMidiMsg(0x90, self.note, new_color.integer % 0x80))
+
+    def tick(self) -> None:
+        pass
+
+
+def test_pressed_control_before_repaint(
+    sent: list[tuple[FlMidiMsg, int]],
+):
+    """Changes to a control that was just pressed should be sent before a
+    repaint of the other controls
+    """
+    clock = FakeClock()
+    # Only one event fits in each flush
+    q = limitedQueue(30, clock)
+    controls = [
+        Button(color_manager=QueueColorManager(q, i)) for i in range(10)
+    ]
+    pressed = controls[-1]
+    pressed.last_pressed = monotonic()
+    # A plugin repaints every control, including the one that was pressed
+    for c in controls:
+        c.color = Color.fromInteger(0x00FF00)
+        c.doTick(False)
+    q.flush()
+    assert [e.data1 for e, _ in sent] == [9]
+    for t in range(1, 10):
+        clock.time = t
+        q.flush()
+    assert [e.data1 for e, _ in sent] == [9] + list(range(9))
+
+
+def test_no_limit(sent: list[tuple[FlMidiMsg, int]]):
+    q = limitedQueue(0, FakeClock())
+    for i in range(100):
+        q.queue(sysex(i))
+    q.flush()
+    assert len(sent) == 100
+
+
+def test_flushed_on_tick(sent: list[tuple[FlMidiMsg, int]]):
+    """The device's output queue should be flushed at the end of each tick
+    """
+    with DummyDeviceContext():
+        queueOutput(FlMidiMsg(0x90, 0x10, 0x01), 2)
+        queueOutput(FlMidiMsg(0x90, 0x10, 0x02), 2)
+        assert sent == []
+        dev = getContext().getDevice()
+        dev.doTick()
+        assert sent == [(FlMidiMsg(0x90, 0x10, 0x02), 2)]
+        assert len(dev.getOutputQueue()) == 0
+
+
+def test_flushed_before_deinitialize(
+    sent: list[tuple[FlMidiMsg, int]],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Queued events should be sent before the device is deinitialized, since
+    it may change the device's mode
+    """
+    with DummyDeviceContext():
+        dev = getContext().getDevice()
+        monkeypatch.setattr(
+            dev,
+            'deinitialize',
+            lambda: sent.append((FlMidiMsg(0xB0, 0x00, 0x00), 0)),
+        )
+        queueOutput(FlMidiMsg(0x90, 0x10, 0x01), 2)
+        getContext().deinitialize()
+    assert sent == [
+        (FlMidiMsg(0x90, 0x10, 0x01), 2),
+        (FlMidiMsg(0xB0, 0x00, 0x00), 0),
+    ]
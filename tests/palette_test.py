@@ -0,0 +1,73 @@
+"""
+tests > palette_test
+
+Tests for palettes, used to match colors to the colors available on a device
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import random
+import pytest
+from common.types import Color, Palette
+from devices.novation.launchkey.incontrol.colors.mk2 import COLORS as MK2
+from devices.novation.launchkey.incontrol.colors.mk3 import COLORS as MK3
+from tests.helpers.performance import perfTestsSkipped, benchmark
+
+
+def randomColors(n: int) -> list[Color]:
+    rand = random.Random(1234)
+    return [Color.fromInteger(rand.randrange(0x1000000)) for _ in range(n)]
+
+
+def test_empty():
+    with pytest.raises(ValueError):
+        Palette({})
+
+
+@pytest.mark.parametrize('palette', [MK2, MK3])
+def test_palette_colors_match_themselves(palette: Palette[int]):
+    for color, value in palette.items():
+        assert palette.lookup(color) == value
+
+
+@pytest.mark.parametrize('palette', [MK2, MK3])
+def test_exact(palette: Palette[int]):
+    """Exact matching should give the same result as Color.closest"""
+    for c in randomColors(100):
+        assert palette.closest(c, exact=True) == c.closest(list(palette))
+
+
+@pytest.mark.parametrize('palette', [MK2, MK3])
+def test_quantized_mostly_exact(palette: Palette[int]):
+    """Quantized matching should usually agree with exact matching"""
+    colors = randomColors(500)
+    matches = sum(
+        palette.closest(c) == palette.closest(c, exact=True) for c in colors)
+    assert matches >= 0.8 * len(colors)
+
+
+def test_quantized_cell_consistent():
+    """Colors in the same cell should always give the same match"""
+    palette = Palette({
+        Color.fromInteger(0x000000): 0,
+        Color.fromInteger(0xFF0000): 1,
+        Color.fromInteger(0x0000FF): 2,
+    })
+    assert palette.lookup(Color.fromRgb(200, 10, 10)) == 1
+    assert palette.lookup(Color.fromRgb(201, 11, 13)) == 1
+    assert palette.lookup(Color.fromRgb(10, 10, 200)) == 2
+
+
+@pytest.mark.skipif(**perfTestsSkipped())
+def test_lookup_speed():
+    """Looking up colors should be much faster than comparing against every
+    palette color
+    """
+    c = Color.fromInteger(0x123456)
+    exact = benchmark(lambda: MK3.lookup(c, exact=True), 1_000)
+    quantized = benchmark(lambda: MK3.lookup(c), 1_000)
+    assert quantized * 10 < exact
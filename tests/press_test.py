@@ -0,0 +1,60 @@
+"""
+tests > press_test
+
+Tests for the pressed controls integration, which colors controls when they
+are tweaked
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+from time import monotonic
+from common.plug_indexes import WindowIndex
+from control_surfaces import ControlEvent
+from devices import DeviceShadow
+from integrations.core.pressed import Press, FADE_TIME
+from tests.helpers.devices import DummyDeviceBasic
+
+
+def tweak(shadow: DeviceShadow, device: DummyDeviceBasic, value: float):
+    device.faders[0].last_tweaked = monotonic()
+    shadow.processEvent(ControlEvent(
+        ...,  # type: ignore
+        device.faders[0],
+        value,
+        0,
+        False,
+    ), WindowIndex.MIXER)
+
+
+def test_only_active_controls_updated():
+    """Controls should only be updated once they receive an event"""
+    device = DummyDeviceBasic()
+    shadow = DeviceShadow(device)
+    press = Press(shadow)
+    assert len(press._active) == 0
+    # Nothing to do
+    press.tick()
+    assert not any(c.connected for c in press._updaters)
+
+    tweak(shadow, device, 0.5)
+    assert len(press._active) == 1
+    press.tick()
+    fader = next(iter(press._active))
+    assert fader.connected
+
+
+def test_faded_controls_removed():
+    """Controls should stop being active once they finish fading"""
+    device = DummyDeviceBasic()
+    shadow = DeviceShadow(device)
+    press = Press(shadow)
+    tweak(shadow, device, 0.5)
+    fader = next(iter(press._active))
+    device.faders[0].last_tweaked -= FADE_TIME * 2
+    press.tick()
+    assert len(press._active) == 0
+    assert not fader.connected
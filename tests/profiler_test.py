@@ -12,10 +12,19 @@ Authors:
 This code is licensed under the GPL v3 license. Refer to the LICENSE file for
 more details.
 """
+import json
 import pytest
 import time
+from pathlib import Path
 from common import getContext, unsafeResetContext
-from common.profiler import ProfilerContext, profilerDecoration
+from common.profiler import (
+    ProfilerContext,
+    ProfilerManager,
+    isProfilingEnabled,
+    profilerDecoration,
+)
+from common.profiler import profiler_context
+from common.profiler.histogram import LatencyHistogram
 from tests.helpers import floatApproxEqMagnitude
 from tests.helpers.performance import perfTestsSkipped
 
@@ -88,3 +97,249 @@ def test_maxes():
             time.sleep(t)
     res = getContext().profiler.getMaxes()  # type: ignore
     assert floatApproxEqMagnitude(50.0, res["test"], 1)
+
+
+@pytest.fixture(autouse=True)
+def restoreProfiling(monkeypatch: pytest.MonkeyPatch):
+    """Restore whether profiling is enabled after each test, so that enabling
+    the profiler doesn't affect other tests
+    """
+    monkeypatch.setattr(
+        profiler_context, "_enabled", profiler_context._enabled)
+
+
+@pytest.fixture
+def profilingDisabled(monkeypatch: pytest.MonkeyPatch):
+    """Disable profiling, as if it was disabled when the script started"""
+    monkeypatch.setattr(profiler_context, "_enabled", False)
+
+
+def test_disabled_context_shared(profilingDisabled):
+    """When profiling is disabled, all contexts should be the same no-op
+    context, and lazy names shouldn't be evaluated
+    """
+    def name() -> str:
+        raise AssertionError("Name was evaluated")
+
+    unsafeResetContext()
+    a = ProfilerContext("a")
+    with ProfilerContext(name) as b:
+        pass
+    assert a is ProfilerContext("b")
+    assert b is None
+
+
+def test_disabled_decorator(profilingDisabled):
+    """When profiling is disabled, decorated functions shouldn't open a
+    profile
+    """
+    unsafeResetContext()
+    getContext().profiler = ProfilerManager(False)
+
+    @profilerDecoration("test")
+    def func() -> int:
+        return 1
+    assert func() == 1
+    assert getContext().profiler.getNumbers() == {}  # type: ignore
+
+
+def test_enable_after_decorating(profilingDisabled):
+    """Functions decorated before the profiler is enabled should be profiled
+    once it is enabled
+    """
+    unsafeResetContext()
+
+    @profilerDecoration("test")
+    def func() -> None:
+        pass
+    func()
+    getContext().enableProfiler()
+    func()
+    assert getContext().profiler.getNumbers() == {  # type: ignore
+        "test": 1
+    }
+
+
+def test_reset_context_disables_profiling():
+    """Resetting the context should disable profiling if the setting is
+    disabled, so that enabling the profiler doesn't leak between contexts
+    """
+    unsafeResetContext()
+    getContext().enableProfiler()
+    assert isProfilingEnabled()
+    unsafeResetContext()
+    assert isProfilingEnabled() \
+        == getContext().settings.get("debug.profiling")
+
+
+def test_lazy_name():
+    """Lazy names should be evaluated when profiling is enabled"""
+    unsafeResetContext()
+    getContext().enableProfiler()
+    with ProfilerContext(lambda: "lazy"):
+        pass
+    assert getContext().profiler.getNumbers() == {  # type: ignore
+        "lazy": 1
+    }
+
+
+def test_histogram_percentiles():
+    """Percentiles should be within the precision of the histogram"""
+    h = LatencyHistogram()
+    for i in range(1, 1001):
+        h.record(i * 1000)
+    assert len(h) == 1000
+    for p in (50, 90, 99, 99.9):
+        expected = p * 10 * 1000
+        assert expected <= h.percentile(p) <= expected * 1.07
+
+
+def test_histogram_max():
+    """The 100th percentile should be the largest recorded time"""
+    h = LatencyHistogram()
+    h.record(5)
+    h.record(123_456_789)
+    assert h.percentile(100) == 123_456_789
+    assert h.percentile(50) == 5
+
+
+def test_histogram_large():
+    """Times larger than the histogram's range should still be recorded"""
+    h = LatencyHistogram()
+    h.record(1 << 50)
+    assert h.percentile(50) == 1 << 50
+
+
+def test_histogram_empty():
+    with pytest.raises(ValueError):
+        LatencyHistogram().percentile(50)
+
+
+def test_profiler_percentiles():
+    """The profiler should record the distribution of each profile's times
+    """
+    unsafeResetContext()
+    getContext().enableProfiler()
+    for _ in range(10):
+        with ProfilerContext("test"):
+            pass
+    profiler = getContext().profiler
+    assert profiler is not None
+    p99 = profiler.getPercentile(99)
+    assert p99.keys() == {"test"}
+    assert p99["test"] <= profiler.getMaxes()["test"]
+
+
+def test_profiler_reset():
+    """Resetting the profiler should remove recorded times"""
+    unsafeResetContext()
+    getContext().enableProfiler()
+    with ProfilerContext("test"):
+        pass
+    profiler = getContext().profiler
+    assert profiler is not None
+    profiler.reset()
+    assert profiler.getNumbers() == {}
+    assert profiler.getPercentile(50) == {}
+    with ProfilerContext("test"):
+        pass
+    assert profiler.getNumbers() == {"test": 1}
+
+
+def profileTicks(profiler: ProfilerManager, n: int) -> None:
+    for _ in range(n):
+        profiler.openProfile("tick")
+        profiler.openProfile("device")
+        profiler.closeProfile()
+        profiler.openProfile("plugin")
+        profiler.openProfile("device")
+        profiler.closeProfile()
+        profiler.closeProfile()
+        profiler.closeProfile()
+
+
+def test_spans_not_kept():
+    """Spans shouldn't be kept by default"""
+    profiler = ProfilerManager(False)
+    profileTicks(profiler, 1)
+    assert profiler.getSpans() == []
+
+
+def test_spans_bounded():
+    """Only the most recent spans should be kept"""
+    profiler = ProfilerManager(False, 10)
+    profileTicks(profiler, 5)
+    spans = profiler.getSpans()
+    assert len(spans) == 10
+    # Spans are kept in the order they were closed
+    assert [s.path for s in spans[-4:]] \
+        == ["tick.device", "tick.plugin.device", "tick.plugin", "tick"]
+    assert all(s.duration >= 0 for s in spans)
+
+
+def test_export_chrome(tmp_path: Path):
+    profiler = ProfilerManager(False, 100)
+    profileTicks(profiler, 2)
+    path = tmp_path / "trace.json"
+    profiler.export(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert len(events) == 8
+    assert events[0]["name"] == "tick"
+    assert events[0]["ph"] == "X"
+    assert {e["args"]["path"] for e in events} \
+        == {"tick", "tick.device", "tick.plugin", "tick.plugin.device"}
+
+
+def test_export_speedscope(tmp_path: Path):
+    """Speedscope events should be correctly nested"""
+    profiler = ProfilerManager(False, 100)
+    profileTicks(profiler, 3)
+    path = tmp_path / "profile.speedscope.json"
+    profiler.export(str(path), "speedscope")
+    data = json.loads(path.read_text())
+    frames = [f["name"] for f in data["shared"]["frames"]]
+    events = data["profiles"][0]["events"]
+    assert len(events) == 24
+    stack: list[str] = []
+    last = 0
+    for e in events:
+        assert e["at"] >= last
+        last = e["at"]
+        if e["type"] == "O":
+            stack.append(frames[e["frame"]])
+        else:
+            assert stack.pop() == frames[e["frame"]]
+    assert stack == []
+
+
+def test_export_unknown_format(tmp_path: Path):
+    profiler = ProfilerManager(False, 100)
+    with pytest.raises(ValueError):
+        profiler.export(str(tmp_path / "profile.json"), "flamegraph")
+
+
+def test_path_records_shared():
+    """Each profile path should have a single record, which is reused each
+    time the path is opened
+    """
+    profiler = ProfilerManager(False)
+    profileTicks(profiler, 3)
+    assert profiler.getNumbers() == {
+        "tick": 3,
+        "tick.device": 3,
+        "tick.plugin": 3,
+        "tick.plugin.device": 3,
+    }
+    assert len(profiler._records) == 4
+    assert [r.id for r in profiler._records] == [0, 1, 2, 3]
+
+
+def test_reset_while_open():
+    """Profiles that are open when the profiler is reset should be recorded
+    when they close
+    """
+    profiler = ProfilerManager(False)
+    profiler.openProfile("tick")
+    profiler.reset()
+    profiler.closeProfile()
+    assert profiler.getNumbers() == {"tick": 1}
@@ -0,0 +1,69 @@
+"""
+tests > settings_test
+
+Tests for the settings container
+
+Authors:
+* Maddy Guthridge [hello@maddyguthridge.com, HDSQ#2154]
+
+This code is licensed under the GPL v3 license. Refer to the LICENSE file for
+more details.
+"""
+
+import pytest
+from common.settings import Settings
+
+
+def test_get():
+    s = Settings()
+    assert s.get("controls.double_press_time") == 0.3
+
+
+def test_get_category():
+    s = Settings()
+    assert s.get("controls")["double_press_time"] == 0.3
+
+
+def test_get_missing():
+    s = Settings()
+    with pytest.raises(KeyError):
+        s.get("controls.not_a_setting")
+
+
+def test_set():
+    s = Settings()
+    s.set("controls.double_press_time", 0.5)
+    assert s.get("controls.double_press_time") == 0.5
+    assert s.get("controls")["double_press_time"] == 0.5
+
+
+def test_handle_updates():
+    s = Settings()
+    h = s.handle("controls.double_press_time")
+    assert h.value == 0.3
+    s.set("controls.double_press_time", 0.5)
+    assert h.value == 0.5
+
+
+def test_handle_shared():
+    s = Settings()
+    assert s.handle("controls.double_press_time") \
+        is s.handle("controls.double_press_time")
+
+
+def test_listener():
+    s = Settings()
+    values: list[object] = []
+    s.addListener("controls.double_press_time", values.append)
+    s.set("controls.double_press_time", 0.5)
+    assert values == [0.3, 0.5]
+
+
+def test_listener_category_set():
+    """Replacing a whole category should notify listeners of its values"""
+    s = Settings()
+    values: list[object] = []
+    s.addListener("debug.profiling", values.append)
+    s.set("debug", {"profiling": True, "exec_tracing": False})
+    assert values == [False, True]
+    assert s.get("debug.profiling") is True
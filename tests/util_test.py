@@ -12,7 +12,8 @@ more details.
 
 from common.util.dict_tools import (
     recursiveMergeDictionaries,
-    expandDictShorthand
+    expandDictShorthand,
+    flattenDict,
 )
 from common.util.snap import snap
 
@@ -37,6 +38,23 @@ def test_expand_dict_shorthand():
     assert expandDictShorthand(t) == exp
 
 
+def test_flatten_dict():
+    t = {
+        "a": {
+            "b": 1,
+            "c": {
+                "d": 2,
+            },
+        },
+        "e": 3,
+    }
+    assert flattenDict(t) == {
+        "a.b": 1,
+        "a.c.d": 2,
+        "e": 3,
+    }
+
+
 def test_expand_dict_shorthand_complex():
     t = {
         "a.b": 1,